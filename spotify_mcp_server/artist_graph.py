@@ -0,0 +1,153 @@
+"""
+Artist Graph Class
+Persistent weighted artist-similarity graph, fed by Last.fm similar-artist responses and
+expanded in memory
+"""
+
+from typing import Dict, List, Tuple
+import logging
+from util.sqlite_store import SQLiteStore
+from resolution_cache import normalize_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ArtistGraph(SQLiteStore):
+    """
+    Artist Graph Class
+
+    Nodes are normalised artist names; an edge source -> target carries the Last.fm match
+    weight (0..1). A node is "expanded" once its own similar artists have been fetched, only
+    unexpanded nodes ever need a Last.fm request. The whole graph is kept in memory and
+    written through to SQLite.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS artist_nodes (
+        artist_key TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        expanded_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS artist_edges (
+        source_key TEXT NOT NULL,
+        target_key TEXT NOT NULL,
+        weight REAL NOT NULL,
+        PRIMARY KEY (source_key, target_key)
+    );
+    """
+    STATS_TABLE = 'artist_nodes'
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.names: Dict[str, str] = {}
+        self.expanded_at: Dict[str, float] = {}
+        self.edges: Dict[str, Dict[str, float]] = {}
+        for artist_key, name, expanded_at in self._query('SELECT artist_key, name, expanded_at FROM artist_nodes'):
+            self.names[artist_key] = name
+            if expanded_at is not None:
+                self.expanded_at[artist_key] = expanded_at
+        for source_key, target_key, weight in self._query('SELECT source_key, target_key, weight FROM artist_edges'):
+            self.edges.setdefault(source_key, {})[target_key] = weight
+
+    @staticmethod
+    def artist_key(artist_name: str) -> str:
+        """Normalised artist name"""
+        return normalize_key(artist_name)
+
+    def is_expanded(self, artist_name: str, max_age: float = None) -> bool:
+        """Whether the artist's similar artists are in the graph (and not older than max_age seconds)"""
+        expanded_at = self.expanded_at.get(self.artist_key(artist_name))
+        if expanded_at is None:
+            return False
+        return max_age is None or self._now() - expanded_at <= max_age
+
+    def add_similar(self, similar_per_artist: Dict[str, List[Tuple[str, float]]]):
+        """
+        Merge Last.fm responses into the graph, marking the source artists as expanded
+
+        Args:
+            similar_per_artist: artist name -> [(similar artist name, match weight)]
+        """
+        now = self._now()
+        nodes, edges = [], []
+        for artist_name, similar in similar_per_artist.items():
+            source_key = self.artist_key(artist_name)
+            self.names.setdefault(source_key, artist_name)
+            self.expanded_at[source_key] = now
+            nodes.append((source_key, self.names[source_key], now))
+            neighbours = self.edges.setdefault(source_key, {})
+            for name, weight in similar:
+                target_key = self.artist_key(name)
+                if not target_key or target_key == source_key:
+                    continue
+                if target_key not in self.names:
+                    self.names[target_key] = name
+                    nodes.append((target_key, name, None))
+                neighbours[target_key] = weight
+                edges.append((source_key, target_key, weight))
+        # an expanded node keeps its expanded_at, a new neighbour is inserted unexpanded
+        self._write_many(
+            'INSERT INTO artist_nodes (artist_key, name, expanded_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(artist_key) DO UPDATE SET expanded_at = COALESCE(excluded.expanded_at, expanded_at)',
+            nodes,
+        )
+        self._write_many(
+            'INSERT OR REPLACE INTO artist_edges (source_key, target_key, weight) VALUES (?, ?, ?)',
+            edges,
+        )
+
+    def neighbours_by_key(self, artist_key: str, min_weight: float = 0.0, fan_out: int = None) -> List[Tuple[str, float]]:
+        """[(similar artist key, weight)] with weight >= min_weight, strongest first, at most fan_out"""
+        neighbours = self.edges.get(artist_key, {})
+        return sorted(
+            ((target_key, weight) for target_key, weight in neighbours.items() if weight >= min_weight),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:fan_out]
+
+    def neighbours(self, artist_name: str, min_weight: float = 0.0, fan_out: int = None) -> List[Tuple[str, float]]:
+        """One-hop expansion: [(similar artist name, weight)], strongest first"""
+        return [
+            (self.names[target_key], weight)
+            for target_key, weight in self.neighbours_by_key(self.artist_key(artist_name), min_weight, fan_out)
+        ]
+
+    def expand_hop(self, scores: Dict[str, float], min_weight: float = 0.0, fan_out: int = None) -> Dict[str, float]:
+        """
+        One expansion step: every scored node contributes its fan_out strongest neighbours with
+        weight >= min_weight, each scored parent score * edge weight (best path wins)
+        """
+        reached = {}
+        for source_key, score in scores.items():
+            for target_key, weight in self.neighbours_by_key(source_key, min_weight, fan_out):
+                reached[target_key] = max(reached.get(target_key, 0.0), score * weight)
+        return reached
+
+    def expand(self, artist_names: List[str], hops: int = 2, min_weight: float = 0.0, fan_out: int = None) -> List[Tuple[str, float]]:
+        """
+        Multi-hop expansion in memory, no requests: seeds score 1, every hop multiplies by the
+        edge weight. Unexpanded nodes simply have no neighbours yet.
+
+        Returns:
+            [(artist name, score)] including the seeds, best score first
+        """
+        scores = {self.artist_key(name): 1.0 for name in artist_names}
+        names = {self.artist_key(name): name for name in artist_names}
+        current = dict(scores)
+        for _ in range(hops):
+            reached = self.expand_hop(current, min_weight, fan_out)
+            current = {key: score for key, score in reached.items() if score > scores.get(key, 0.0)}
+            if not current:
+                break
+            scores.update(current)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(names.get(key) or self.names[key], score) for key, score in ranked]
+
+    def stats(self):
+        """Hit/miss counters plus node, expanded node and edge counts"""
+        stats = super().stats()
+        stats['expanded'] = len(self.expanded_at)
+        stats['edges'] = sum(len(neighbours) for neighbours in self.edges.values())
+        return stats
@@ -0,0 +1,249 @@
+"""
+Candidate Pool Class
+Warm pool of the user's recalled candidate tracks, counted per mood-plane region and refreshed
+in the background, so the recommend tools can answer without a network recall
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+import logging
+import numpy as np
+from track_table import TrackRow, TrackTable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# regions of a resolution 2 grid, as named in prompt.txt
+QUADRANT_NAMES = {(0, 0): 'Sad', (0, 1): 'Angry', (1, 0): 'Relaxed', (1, 1): 'Happy'}
+
+
+class CandidatePool:
+    """
+    Candidate Pool Class
+
+    The pool is one TrackTable filled by the general recall (stream_all_tracks) plus the
+    number of rows in every cell of a resolution x resolution valence/energy grid; the
+    default grid is the four quadrants of prompt.txt. A refresh recalls until every region
+    holds per_region rows (or the recall runs out) and swaps the new table in. The
+    background loop refreshes once the pool is older than refresh_interval or the library
+    mirror changed. A top-up recalls into a table of its own, skipping the tracks the pool
+    already has, and merges it in afterwards; rows are only ever appended, so row indices
+    stay valid. Neither the merge nor the swap of a refresh awaits, so they cannot interleave,
+    and a refresh carries over the rows merged while it was recalling.
+    """
+
+    def __init__(
+        self,
+        spotify_client,
+        lastfm_client=None,
+        resolution: int = 2,
+        per_region: int = 100,
+        refresh_interval: float = 3600,
+        check_interval: float = 300,
+    ):
+        """
+        Args:
+            spotify_client: SpotifySuperClient used for recall and library sync
+            lastfm_client: Last.fm client for similar artists, None to skip them
+            resolution: Grid cells per axis (2 = Sad/Angry/Relaxed/Happy quadrants)
+            per_region: Rows a refresh tries to collect in every region
+            refresh_interval: Seconds after which the pool is rebuilt
+            check_interval: Seconds between two checks of the background loop
+        """
+        self.spotify_client = spotify_client
+        self.lastfm_client = lastfm_client
+        self.resolution = resolution
+        self.per_region = per_region
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        self.table: Optional[TrackTable] = None
+        self.region_counts = np.zeros((resolution, resolution), dtype=np.int64)
+        self.built_at: Optional[float] = None
+        self.library_fingerprint: Optional[str] = None
+        self.refreshes = 0
+        self.top_ups = 0
+        self.last_error: Optional[str] = None
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_warm(self) -> bool:
+        return self.table is not None
+
+    def region_of(self, valence: float, energy: float) -> Tuple[int, int]:
+        """Grid cell of a point; a value on a border belongs to the lower cell, like in prompt.txt"""
+        def cell(value):
+            return min(max(math.ceil(value * self.resolution) - 1, 0), self.resolution - 1)
+        return cell(valence), cell(energy)
+
+    def region_name(self, region: Tuple[int, int]) -> str:
+        if self.resolution == 2:
+            return QUADRANT_NAMES[region]
+        return f'valence{region[0]}_energy{region[1]}'
+
+    def count_in_region(self, valence_range: Sequence[float], energy_range: Sequence[float], target_point: Sequence[float] = None, radius: float = 0.15) -> int:
+        """Pooled rows inside the valence/energy box, or within radius of target_point for a collapsed box"""
+        if self.table is None or len(self.table) == 0:
+            return 0
+        index = self.table.mood_index
+        if valence_range[0] == valence_range[1] and energy_range[0] == energy_range[1]:
+            center = target_point if target_point is not None else (valence_range[0], energy_range[0])
+            return len(index.radius(center, radius)[0])
+        return len(index.rect(valence_range, energy_range))
+
+    def select_polygon(self, vertices: Sequence[Sequence[float]], limit: int = 0) -> np.ndarray:
+        """
+        Row indices of the pooled tracks inside a polygon of (valence, energy) vertices,
+        nearest to the vertex centroid first, at most limit of them (0 for all)
+        """
+        if self.table is None or len(self.table) == 0:
+            return np.empty(0, dtype=np.int64)
+        index = self.table.mood_index
+        rows = index.polygon(vertices)
+        center = np.asarray(vertices, dtype=np.float64).reshape(-1, 2).mean(axis=0)
+        distances = np.hypot(index.points[rows, 0] - center[0], index.points[rows, 1] - center[1])
+        rows = rows[np.lexsort((rows, distances))]
+        return rows[:limit] if limit > 0 else rows
+
+    def _library_fingerprint(self) -> Optional[str]:
+        mirror = getattr(self.spotify_client, 'library_mirror', None)
+        return mirror.fingerprint() if mirror is not None else None
+
+    def is_stale(self) -> bool:
+        """Whether the pool is cold, too old, or built before the last library change"""
+        if self.table is None or self.built_at is None:
+            return True
+        if time.time() - self.built_at > self.refresh_interval:
+            return True
+        return self._library_fingerprint() != self.library_fingerprint
+
+    def _merge(self, rows: Iterable[TrackRow]) -> int:
+        """Append rows of another table to the pool (no await), return how many were new"""
+        if self.table is None:
+            self.table, self.region_counts = TrackTable(), np.zeros_like(self.region_counts)
+        added = 0
+        for row in rows:
+            num_rows = len(self.table)
+            self.table.append(row.to_track())
+            if len(self.table) > num_rows:
+                self.region_counts[self.region_of(row.valence, row.energy)] += 1
+                added += 1
+        return added
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Rebuild the pool from a general recall and swap it in"""
+        async with self._refresh_lock:
+            start = time.perf_counter()
+            fingerprint = self._library_fingerprint()
+            base = self.table
+            base_rows = len(base) if base is not None else 0
+            counts = np.zeros((self.resolution, self.resolution), dtype=np.int64)
+
+            def regions_filled(table, row):
+                counts[self.region_of(row.valence, row.energy)] += 1
+                return counts.min() >= self.per_region
+
+            table = await self.spotify_client.collect_track_table(
+                self.spotify_client.stream_all_tracks(self.lastfm_client), stop=regions_filled
+            )
+            # rows top-ups merged into the old table while the recall ran
+            current = self.table
+            carried = []
+            if current is not None:
+                carried = [current[i] for i in range(base_rows if current is base else 0, len(current))]
+            self.table, self.region_counts = table, counts
+            self._merge(carried)
+            self.built_at, self.library_fingerprint = time.time(), fingerprint
+            self.refreshes += 1
+            logger.info(f'Candidate pool refreshed with {len(table)} tracks in {time.perf_counter() - start:.1f}s')
+            return self.stats()
+
+    async def top_up(self, limit: int, count_in_target: Callable[[], int], in_target: Callable[[TrackRow], bool]) -> TrackTable:
+        """
+        Make sure the pool holds limit rows in a target region, recalling more if it does not.
+
+        The general recall skips the tracks already pooled and stops once count_in_target()
+        plus the new rows in the target reach limit. It is collected without any lock (a
+        running refresh does not hold it up) and merged in afterwards. While the pool is cold
+        the recalled rows become the pool; it stays stale, so the background loop still
+        rebuilds it with every region filled.
+
+        Args:
+            limit: Rows wanted in the target region
+            count_in_target: Rows of the pool in the target region right now
+            in_target: Whether a recalled row is in the target region
+
+        Returns:
+            The pool's table (empty if the pool is cold and nothing was recalled)
+        """
+        num_in_target = count_in_target()
+        if num_in_target >= limit:
+            logger.info(f'{num_in_target} tracks in target region from the candidate pool, skipping recall')
+            return self.table if self.table is not None else TrackTable()
+        logger.info(f'Candidate pool has {num_in_target} tracks in target region, topping up')
+
+        def enough_in_target(table, row):
+            nonlocal num_in_target
+            num_in_target += bool(in_target(row))
+            if num_in_target >= limit:
+                logger.info(f'{num_in_target} tracks in target region after {len(table)} new candidates, stopping recall early')
+                return True
+            return False
+
+        skip_track_ids = set(self.table.ids) if self.table is not None else set()
+        new_rows = await self.spotify_client.collect_track_table(
+            self.spotify_client.stream_all_tracks(self.lastfm_client, skip_track_ids=skip_track_ids),
+            stop=enough_in_target,
+        )
+        self._merge(new_rows)
+        self.top_ups += 1
+        return self.table
+
+    async def run(self):
+        """Background loop: sync the library mirror, refresh the pool when it is stale"""
+        while True:
+            try:
+                if hasattr(self.spotify_client, 'sync_library'):
+                    await asyncio.to_thread(self.spotify_client.sync_library)
+                if self.is_stale():
+                    await self.refresh()
+                self.last_error = None
+            except Exception as e:
+                logger.error(f'Candidate pool refresh failed: {e}')
+                self.last_error = str(e)
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> asyncio.Task:
+        """Start the background loop on the running event loop (once)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel the background loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, rows per region and refresh state"""
+        return {
+            'tracks': len(self.table) if self.table is not None else 0,
+            'regions': {
+                self.region_name((x, y)): int(self.region_counts[x, y])
+                for x in range(self.resolution) for y in range(self.resolution)
+            },
+            'built_at': self.built_at,
+            'stale': self.is_stale(),
+            'refreshes': self.refreshes,
+            'top_ups': self.top_ups,
+            'running': self._task is not None and not self._task.done(),
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,207 @@
+"""
+Coordinate Cache Class
+Persistent cache of the LLM's activity -> start / end valence and energy coordinates, keyed by
+(normalised activity, sorted genres), with TTL and a similarity lookup for near-duplicate
+phrasings
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+from util.sqlite_store import SQLiteStore
+from resolution_cache import normalize_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COORDINATE_KEYS = ('start_valence', 'start_energy', 'end_valence', 'end_energy')
+
+# words that do not change the mood of an activity description
+STOPWORDS = frozenset({
+    'a', 'an', 'the', 'at', 'in', 'on', 'for', 'of', 'and', 'my', 'me', 'i', 'im', 'while',
+    'with', 'some', 'music', 'songs', 'playlist', 'during', 'when', 'am', 'is', 'be', 'being',
+})
+# words that set the direction of a mood change ("from happy to sad")
+DIRECTION_WORDS = frozenset({
+    'to', 'from', 'into', 'toward', 'towards', 'until', 'till', 'then', 'before', 'after', 'than',
+})
+# negations, 't' is what normalize_key leaves of "n't" ("can't" -> "can t")
+NEGATION_WORDS = frozenset({
+    'not', 'no', 'never', 'without', 'nor', 'neither', 'none', 'nothing', 'non', 't',
+    'cant', 'dont', 'doesnt', 'didnt', 'isnt', 'arent', 'wasnt', 'wont', 'aint',
+})
+# words that only ever match themselves and are never skipped by a near-duplicate match
+STRUCTURAL_WORDS = DIRECTION_WORDS | NEGATION_WORDS
+
+
+def activity_tokens(activity_key: str) -> Tuple[str, ...]:
+    """Content words of a normalised activity, in order"""
+    return tuple(token for token in activity_key.split() if token not in STOPWORDS)
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance of two strings"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def tokens_match(a: str, b: str) -> bool:
+    """Same word, or a one-letter typo of a word of 5+ letters; structural words must be equal"""
+    if a == b:
+        return True
+    if a in STRUCTURAL_WORDS or b in STRUCTURAL_WORDS:
+        return False
+    return (
+        min(len(a), len(b)) >= 5 and abs(len(a) - len(b)) <= 1 and a[0] == b[0]
+        and edit_distance(a, b) <= 1
+    )
+
+
+def similarity(tokens_a: Tuple[str, ...], tokens_b: Tuple[str, ...]) -> float:
+    """
+    Share of aligned words of two ordered token sequences, 0..1
+
+    The sequences are aligned in order (longest common subsequence under tokens_match). They
+    only count as similar when the words left over are all on one side, i.e. one activity is
+    the other with words added; a word that was replaced or moved ("from happy to sad" vs
+    "from sad to happy") leaves words on both sides and scores 0. A left-over direction or
+    negation word ("not working out" vs "working out") scores 0 as well.
+    """
+    if tokens_a == tokens_b:
+        return 1.0 if tokens_a else 0.0
+    n, m = len(tokens_a), len(tokens_b)
+    if not n or not m:
+        return 0.0
+    lengths = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        for j in range(m - 1, -1, -1):
+            if tokens_match(tokens_a[i], tokens_b[j]):
+                lengths[i][j] = lengths[i + 1][j + 1] + 1
+            else:
+                lengths[i][j] = max(lengths[i + 1][j], lengths[i][j + 1])
+    left_a, left_b = [], []
+    i = j = 0
+    while i < n and j < m:
+        if tokens_match(tokens_a[i], tokens_b[j]) and lengths[i][j] == lengths[i + 1][j + 1] + 1:
+            i, j = i + 1, j + 1
+        elif lengths[i + 1][j] >= lengths[i][j + 1]:
+            left_a.append(tokens_a[i])
+            i += 1
+        else:
+            left_b.append(tokens_b[j])
+            j += 1
+    left_a.extend(tokens_a[i:])
+    left_b.extend(tokens_b[j:])
+    if (left_a and left_b) or STRUCTURAL_WORDS.intersection(left_a + left_b):
+        return 0.0
+    return lengths[0][0] / max(n, m)
+
+
+class CoordinateCache(SQLiteStore):
+    """
+    Coordinate Cache Class
+
+    An exact hit needs the same normalised activity and the same set of genres. Otherwise
+    the activities cached for those genres are compared by their content words in order
+    (see similarity), and the most similar one is used if it scores at least min_similarity.
+    The unexpired keys are kept in memory, so a lookup does not touch SQLite.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS activity_coordinates (
+        activity_key TEXT NOT NULL,
+        genres_key TEXT NOT NULL,
+        activity TEXT NOT NULL,
+        coordinates TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (activity_key, genres_key)
+    );
+    """
+    STATS_TABLE = 'activity_coordinates'
+
+    def __init__(self, path: str, ttl: float = 30 * 24 * 3600, min_similarity: float = 0.8):
+        """
+        Args:
+            path: SQLite file path
+            ttl: Seconds the coordinates of an activity are trusted before the LLM is asked again
+            min_similarity: Score (0..1) a near-duplicate activity needs to count as a hit
+        """
+        super().__init__(path)
+        self.ttl = ttl
+        self.min_similarity = min_similarity
+        self.similar_hits = 0
+        # genres_key -> activity_key -> (content tokens, coordinates, expires_at)
+        self._entries: Dict[str, Dict[str, Tuple[Tuple[str, ...], Dict[str, float], float]]] = {}
+        self._entries_lock = threading.Lock()
+        for activity_key, genres_key, coordinates, expires_at in self._query(
+            'SELECT activity_key, genres_key, coordinates, expires_at FROM activity_coordinates WHERE expires_at > ?',
+            [self._now()],
+        ):
+            self._remember(activity_key, genres_key, json.loads(coordinates), expires_at)
+
+    @staticmethod
+    def make_key(activity: str, genres: Optional[List[str]] = None) -> Tuple[str, str]:
+        """(normalised activity, sorted normalised genres joined by '|')"""
+        genre_keys = sorted({normalize_key(genre) for genre in genres or []} - {''})
+        return normalize_key(activity), '|'.join(genre_keys)
+
+    def _remember(self, activity_key: str, genres_key: str, coordinates: Dict[str, float], expires_at: float):
+        with self._entries_lock:
+            self._entries.setdefault(genres_key, {})[activity_key] = (activity_tokens(activity_key), coordinates, expires_at)
+
+    def get(self, activity: str, genres: Optional[List[str]] = None) -> Optional[Dict[str, float]]:
+        """
+        Coordinates cached for the activity (or a near-duplicate of it) and genres
+
+        Returns:
+            {'start_valence', 'start_energy', 'end_valence', 'end_energy'}, None on a miss
+        """
+        activity_key, genres_key = self.make_key(activity, genres)
+        now = self._now()
+        with self._entries_lock:
+            entries = self._entries.get(genres_key, {})
+            entry = entries.get(activity_key)
+            if entry is not None and entry[2] > now:
+                self.record(hits=1)
+                return dict(entry[1])
+            tokens = activity_tokens(activity_key)
+            best_key, best_score = None, self.min_similarity
+            for other_key, (other_tokens, _, expires_at) in entries.items():
+                # an activity of stopwords only has nothing to compare; the length ratio bounds the score
+                if expires_at <= now or min(len(tokens), len(other_tokens)) < best_score * max(len(tokens), len(other_tokens), 1):
+                    continue
+                score = similarity(tokens, other_tokens)
+                if score >= best_score:
+                    best_key, best_score = other_key, score
+            if best_key is None:
+                self.record(misses=1)
+                return None
+            self.record(hits=1)
+            self.similar_hits += 1
+            logger.info(f"Coordinate cache: '{activity_key}' matched '{best_key}' (similarity {best_score:.2f})")
+            return dict(entries[best_key][1])
+
+    def put(self, activity: str, genres: Optional[List[str]], coordinates: Dict[str, Any], ttl: Optional[float] = None):
+        """Store the coordinates returned for an activity and genres"""
+        activity_key, genres_key = self.make_key(activity, genres)
+        coordinates = {key: float(coordinates[key]) for key in COORDINATE_KEYS}
+        expires_at = self._now() + (self.ttl if ttl is None else ttl)
+        self._write(
+            'INSERT OR REPLACE INTO activity_coordinates (activity_key, genres_key, activity, coordinates, expires_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [activity_key, genres_key, activity, json.dumps(coordinates), expires_at],
+        )
+        self._remember(activity_key, genres_key, coordinates, expires_at)
+
+    def stats(self):
+        """Hit/miss counters plus hits that came from a near-duplicate activity"""
+        stats = super().stats()
+        stats['similar_hits'] = self.similar_hits
+        return stats
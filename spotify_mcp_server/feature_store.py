@@ -0,0 +1,98 @@
+"""
+Feature Store Class
+Persistent SQLite store of Reccobeats audio features, keyed by Spotify track id and Reccobeats id
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+import logging
+from util.sqlite_store import SQLiteStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The nine features returned by SpotifySuperClient.get_reccobeats_track_audio_features
+FEATURE_NAMES = [
+    'acousticness',
+    'danceability',
+    'energy',
+    'instrumentalness',
+    'liveness',
+    'loudness',
+    'speechiness',
+    'tempo',
+    'valence',
+]
+
+
+class FeatureStore(SQLiteStore):
+    """Feature Store Class, audio features of a track never change so entries never expire"""
+
+    SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS audio_features (
+        spotify_id TEXT PRIMARY KEY,
+        reccobeats_id TEXT NOT NULL,
+        {', '.join(f'{name} REAL' for name in FEATURE_NAMES)},
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_audio_features_reccobeats_id ON audio_features (reccobeats_id);
+    """
+    STATS_TABLE = 'audio_features'
+
+    @staticmethod
+    def _row_to_entry(row: tuple) -> Dict[str, Any]:
+        spotify_id, reccobeats_id, *values = row
+        features = {'id': reccobeats_id}
+        features.update(zip(FEATURE_NAMES, values))
+        return {'spotify_id': spotify_id, 'reccobeats_id': reccobeats_id, 'features': features}
+
+    def _get_many(self, column: str, keys: List[str], record: bool = True) -> Dict[str, Dict[str, Any]]:
+        keys = list(dict.fromkeys(key for key in keys if key))
+        entries = {}
+        for chunk in self._chunks(keys):
+            rows = self._query(
+                f"SELECT spotify_id, reccobeats_id, {', '.join(FEATURE_NAMES)} FROM audio_features "
+                f"WHERE {column} IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in rows:
+                entry = self._row_to_entry(row)
+                entries[entry[column]] = entry
+        if record:
+            self.record(hits=len(entries), misses=len(keys) - len(entries))
+        return entries
+
+    def get_many(self, spotify_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up stored features by Spotify track id
+
+        Returns:
+            Dict[str, Dict]: spotify_id -> {'spotify_id', 'reccobeats_id', 'features'}, hits only;
+            'features' has the same shape as get_reccobeats_track_audio_features()['data']
+        """
+        return self._get_many('spotify_id', spotify_ids)
+
+    def get_many_by_reccobeats_id(self, reccobeats_ids: List[str], record: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up stored features by Reccobeats id, reccobeats_id -> entry (hits only).
+        Pass record=False for a second lookup of keys already counted by get_many.
+        """
+        return self._get_many('reccobeats_id', reccobeats_ids, record=record)
+
+    def put_many(self, entries: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        """
+        Store features
+
+        Args:
+            entries: (spotify_id, reccobeats_id, audio features dict) tuples
+        """
+        now = self._now()
+        self._write_many(
+            f"INSERT OR REPLACE INTO audio_features (spotify_id, reccobeats_id, {', '.join(FEATURE_NAMES)}, updated_at) "
+            f"VALUES ({', '.join('?' * (len(FEATURE_NAMES) + 3))})",
+            (
+                (spotify_id, reccobeats_id, *(features.get(name, 0) for name in FEATURE_NAMES), now)
+                for spotify_id, reccobeats_id, features in entries
+                if spotify_id and reccobeats_id
+            ),
+        )
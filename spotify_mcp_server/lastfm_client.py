@@ -1,19 +1,108 @@
 import pylast
 import os
-from typing import List, Dict
+import asyncio
+from typing import Any, List, Dict, Optional, Tuple
 import httpx
 import logging
+from artist_graph import ArtistGraph
+from similar_artist_cache import SimilarArtistCache
+from util.http_retry import get_json_with_retries
+from util.rate_limiter import RateLimiter
+from util.sqlite_store import default_cache_path
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class LastfmAPIError(Exception):
+    """Error payload returned by the Last.fm API, e.g. {"error": 6, "message": "The artist you supplied could not be found"}"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"Last.fm error {code}: {message}")
+        self.code = code
+
+
 class LastfmClient:
-    def __init__(self, api_key, api_secret):
+    API_URL = "https://ws.audioscrobbler.com/2.0/"
+
+    def __init__(self, api_key, api_secret, timeout: float = 15.0, max_retries: int = 2, max_connections: int = 10,
+                 requests_per_second: float = 5, burst: int = 20):
+        """
+        Last.fm requests go to the REST API directly over one pooled httpx client, concurrently,
+        under a token-bucket rate limit (Last.fm asks for at most 5 requests per second, averaged
+        over 5 minutes, so a short burst is fine). pylast is kept for its Album objects.
+        """
         self.api_key = api_key
         self.api_secret = api_secret
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.rate_limiter = RateLimiter(requests_per_second, burst=burst)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
         self._init_lastfm_client()
 
+    def _get_client(self) -> httpx.AsyncClient:
+        """Pooled client of the running event loop, created on first use"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            # an httpx client cannot be shared across event loops (e.g. successive asyncio.run calls)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def _call(self, method: str, **params) -> Dict[str, Any]:
+        """
+        Call one Last.fm API method and decode the JSON body
+
+        Raises:
+            httpx.HTTPError: Request failed after retries
+            LastfmAPIError: Last.fm answered with an error payload
+        """
+        await self.rate_limiter.acquire()
+        data = await get_json_with_retries(
+            self._get_client(),
+            self.API_URL,
+            max_retries=self.max_retries,
+            description=f"Last.fm {method} {params}",
+            params={'method': method, 'api_key': self.api_key, 'format': 'json', 'autocorrect': 1, **params},
+        )
+        if 'error' in data:
+            raise LastfmAPIError(data['error'], data.get('message', ''))
+        return data
+
+    @staticmethod
+    def _as_list(items) -> List[Any]:
+        """Last.fm returns a single object instead of a one-element list"""
+        if items is None:
+            return []
+        return items if isinstance(items, list) else [items]
+
+    async def aclose(self):
+        """Close the pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    @property
+    def similar_artist_cache(self) -> SimilarArtistCache:
+        """Persistent similar-artist cache, opened on first use"""
+        if getattr(self, '_similar_artist_cache', None) is None:
+            self._similar_artist_cache = SimilarArtistCache(default_cache_path('lastfm.sqlite3'))
+        return self._similar_artist_cache
+
+    @property
+    def artist_graph(self) -> ArtistGraph:
+        """Persistent artist-similarity graph, loaded on first use"""
+        if getattr(self, '_artist_graph', None) is None:
+            self._artist_graph = ArtistGraph(default_cache_path('artist_graph.sqlite3'))
+        return self._artist_graph
+
     def _init_lastfm_client(self):
         logger.info('api_key: %s', self.api_key)
         logger.info('api_secret: %s', self.api_secret)
@@ -47,6 +136,87 @@ class LastfmClient:
         # self.lastfm.session_key = session_key
 
 
+    async def _fetch_similar_artists(self, artist_name: str, limit: int) -> List[Tuple[str, float]]:
+        """artist.getSimilar, [(similar artist name, match weight)]"""
+        data = await self._call('artist.getSimilar', artist=artist_name, limit=limit)
+        similar = self._as_list(data.get('similarartists', {}).get('artist'))
+        return [(artist['name'], float(artist.get('match', 0))) for artist in similar][:limit]
+
+    async def get_weighted_similar_artists(self, artist_names: List[str], limit: int = 10) -> Dict[str, List[Tuple[str, float]]]:
+        """Get weighted similar artists per artist name, cached.
+
+        Names are de-duplicated (case/accent-insensitively) before any lookup, cached lists are
+        served from the similar-artist cache and only misses go to Last.fm, concurrently under
+        the rate limit. Artists whose lookup failed are left out (and not cached).
+
+        Returns:
+            Dict[str, List[Tuple[str, float]]]: artist name -> [(similar artist name, match weight)]
+        """
+        if isinstance(artist_names, str):
+            artist_names = [artist_names]
+        names_by_key = {}
+        for artist_name in artist_names:
+            names_by_key.setdefault(self.similar_artist_cache.artist_key(artist_name), artist_name)
+        cached = self.similar_artist_cache.get_many(list(names_by_key), limit)
+        missing = [artist_key for artist_key in names_by_key if artist_key not in cached]
+
+        outcomes = await asyncio.gather(
+            *(self._fetch_similar_artists(names_by_key[artist_key], limit) for artist_key in missing),
+            return_exceptions=True,
+        )
+        fetched = {}
+        for artist_key, outcome in zip(missing, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Failed to get similar artists of {names_by_key[artist_key]}: {outcome}")
+                continue
+            fetched[artist_key] = outcome
+        self.similar_artist_cache.put_many(fetched, limit)
+        self.artist_graph.add_similar({names_by_key[artist_key]: similar for artist_key, similar in fetched.items()})
+        # cached lists also (re)fill graph nodes that are missing or went stale
+        max_age = self.similar_artist_cache.ttl
+        self.artist_graph.add_similar({
+            names_by_key[artist_key]: similar for artist_key, similar in cached.items()
+            if not self.artist_graph.is_expanded(names_by_key[artist_key], max_age=max_age)
+        })
+
+        results = {**cached, **fetched}
+        return {names_by_key[artist_key]: results[artist_key] for artist_key in names_by_key if artist_key in results}
+
+    async def expand_artists(self, artist_names: List[str], hops: int = 2, min_weight: float = 0.2, fan_out: int = 5,
+                             max_artists: int = None, limit: int = 10) -> List[str]:
+        """Expand artist names through the artist-similarity graph.
+
+        Every hop, only frontier artists whose similar artists were never fetched, or were
+        fetched longer ago than the similar-artist cache TTL, go to Last.fm (concurrently); the hops themselves are computed in memory by ArtistGraph.expand. Each
+        artist contributes its fan_out most similar neighbours with match weight >= min_weight,
+        scored by the product of weights along the best path.
+
+        Args:
+            artist_names (List[str]): Seed artist names.
+            hops (int, optional): Number of expansion steps. Defaults to 2.
+            min_weight (float, optional): Minimum Last.fm match weight of a followed edge. Defaults to 0.2.
+            fan_out (int, optional): Neighbours followed per artist and hop. Defaults to 5.
+            max_artists (int, optional): Keep only the best-scored artists. Defaults to all.
+            limit (int, optional): Similar artists fetched per frontier artist. Defaults to 10.
+
+        Returns:
+            List[str]: Seeds first, then the expanded artists by descending score.
+        """
+        if isinstance(artist_names, str):
+            artist_names = [artist_names]
+        graph = self.artist_graph
+        max_age = self.similar_artist_cache.ttl
+        for hop in range(hops):
+            # artists reachable in fewer hops whose similar artists are missing or stale
+            reached = graph.expand(artist_names, hops=hop, min_weight=min_weight, fan_out=fan_out)
+            frontier = [name for name, _ in reached if not graph.is_expanded(name, max_age=max_age)]
+            graph.record(hits=len(reached) - len(frontier), misses=len(frontier))
+            if frontier:
+                await self.get_weighted_similar_artists(frontier, limit=limit)
+        ranked = graph.expand(artist_names, hops=hops, min_weight=min_weight, fan_out=fan_out)
+        logger.info(f'Expanded {len(artist_names)} artists to {len(ranked)} over {hops} hops')
+        return [name for name, _ in ranked[:max_artists]]
+
     async def get_similar_artists(self, artist_names: List[str], limit: int = 10, include_original: bool = False):
         """Get similar artists for a given list of artist names.
 
@@ -57,19 +227,13 @@ class LastfmClient:
         Returns:
             list: A list of similar artists.
         """
-        try:
-            similar_artists = []
-            if isinstance(artist_names, str):
-                artist_names = [artist_names]
-            async with httpx.AsyncClient() as client:
-                for artist_name in artist_names:
-                    artist = self.lastfm.get_artist(artist_name)
-                    similar_artists.extend([similar.item.name for similar in artist.get_similar(limit=limit)])
-            if include_original:
-                similar_artists.extend(artist_names)
-            return list(set(similar_artists))
-        except (pylast.WSError, httpx.HTTPError):
-            return []
+        if isinstance(artist_names, str):
+            artist_names = [artist_names]
+        similar_per_artist = await self.get_weighted_similar_artists(artist_names, limit=limit)
+        similar_artists = [name for similar in similar_per_artist.values() for name, _ in similar]
+        if include_original:
+            similar_artists.extend(artist_names)
+        return list(set(similar_artists))
 
     # get albums of artists
     async def get_albums_of_artists(self, artist_names: List[str], limit: int = 10) -> Dict[str, List[pylast.Album]]:   
@@ -82,19 +246,23 @@ class LastfmClient:
         Returns:
             Dict[str, List[pylast.Album]]: A dictionary of artist names and their albums.
         """
-        try:
-            if isinstance(artist_names, str):
-                artist_names = [artist_names]
-            async with httpx.AsyncClient() as client:
-                artists_albums_dict = {}
-                for artist_name in artist_names:
-                    albums = []
-                    artist = self.lastfm.get_artist(artist_name)
-                    albums.extend([album.item for album in artist.get_top_albums(limit=limit)])
-                    artists_albums_dict[artist_name] = albums
-                return artists_albums_dict
-        except (pylast.WSError, httpx.HTTPError):
-            return {}
+        if isinstance(artist_names, str):
+            artist_names = [artist_names]
+        artist_names = list(dict.fromkeys(artist_names))
+
+        async def top_albums(artist_name):
+            data = await self._call('artist.getTopAlbums', artist=artist_name, limit=limit)
+            albums = self._as_list(data.get('topalbums', {}).get('album'))[:limit]
+            return [pylast.Album(album.get('artist', {}).get('name', artist_name), album['name'], self.lastfm) for album in albums]
+
+        outcomes = await asyncio.gather(*(top_albums(artist_name) for artist_name in artist_names), return_exceptions=True)
+        artists_albums_dict = {}
+        for artist_name, outcome in zip(artist_names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Failed to get albums of {artist_name}: {outcome}")
+                continue
+            artists_albums_dict[artist_name] = outcome
+        return artists_albums_dict
 
     # get track titles of an album
     async def get_track_titles_of_albums(self, albums: List[pylast.Album], limit: int = 10) -> Dict[str, List[str]]:
@@ -107,16 +275,19 @@ class LastfmClient:
         Returns:
             Dict[str, List[str]]: A dictionary of album title and its track titles.
         """
-        try:
-            if isinstance(albums, pylast.Album):
-                albums = [albums]
-            async with httpx.AsyncClient() as client:
-                albums_tracks_dict = {}
-                for album in albums:
-                    tracks = album.get_tracks()
-                    albums_tracks_dict[album.title] = []
-                    for track in tracks:
-                        albums_tracks_dict[album.title].append(track.title)
-                return albums_tracks_dict
-        except (pylast.WSError, httpx.HTTPError):
-            return {}
+        if isinstance(albums, pylast.Album):
+            albums = [albums]
+
+        async def track_titles(album):
+            data = await self._call('album.getInfo', artist=album.artist.name, album=album.title)
+            tracks = self._as_list(data.get('album', {}).get('tracks', {}).get('track'))
+            return [track['name'] for track in tracks]
+
+        outcomes = await asyncio.gather(*(track_titles(album) for album in albums), return_exceptions=True)
+        albums_tracks_dict = {}
+        for album, outcome in zip(albums, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Failed to get tracks of album {album.title}: {outcome}")
+                continue
+            albums_tracks_dict[album.title] = outcome
+        return albums_tracks_dict
@@ -0,0 +1,185 @@
+"""
+Library Mirror Class
+Local mirror of the user's Spotify library (playlists and their tracks, saved tracks, saved albums),
+synced incrementally by SpotifySuperClient.sync_library
+"""
+
+import hashlib
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+from util.sqlite_store import SQLiteStore
+from resolution_cache import compact_track
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def compact_album(album: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a Spotify album object the recall paths use"""
+    return {
+        'id': album['id'],
+        'name': album.get('name', ''),
+        'artists': [{'name': artist['name'], 'id': artist.get('id', '')} for artist in album.get('artists', [])],
+    }
+
+
+class LibraryMirror(SQLiteStore):
+    """
+    Library Mirror Class
+
+    Playlists are stored with the snapshot_id their tracks were read at, so an unchanged
+    playlist is never re-read. Saved tracks / albums keep Spotify's added_at, the newest one
+    tells the next sync where to stop paging.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS playlists (
+        playlist_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        snapshot_id TEXT NOT NULL,
+        synced_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS playlist_tracks (
+        playlist_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        track_id TEXT NOT NULL,
+        track TEXT NOT NULL,
+        PRIMARY KEY (playlist_id, position)
+    );
+    CREATE TABLE IF NOT EXISTS saved_tracks (
+        track_id TEXT PRIMARY KEY,
+        added_at TEXT NOT NULL,
+        track TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS saved_albums (
+        album_id TEXT PRIMARY KEY,
+        added_at TEXT NOT NULL,
+        album TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sync_state (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL
+    );
+    """
+    SAVED_TABLES = {
+        'saved_tracks': ('track_id', 'track', compact_track),
+        'saved_albums': ('album_id', 'album', compact_album),
+    }
+
+    def playlist_snapshots(self) -> Dict[str, str]:
+        """playlist_id -> snapshot_id of the mirrored playlists"""
+        return dict(self._query('SELECT playlist_id, snapshot_id FROM playlists'))
+
+    def replace_playlist(self, playlist_id: str, name: str, snapshot_id: str, tracks: List[Dict[str, Any]]):
+        """Store a playlist's tracks as of snapshot_id, replacing the previous copy"""
+        rows = [
+            (playlist_id, position, track['id'], json.dumps(compact_track(track)))
+            for position, track in enumerate(tracks)
+        ]
+        with self._lock:
+            self._conn.execute('DELETE FROM playlist_tracks WHERE playlist_id = ?', (playlist_id,))
+            self._conn.executemany(
+                'INSERT INTO playlist_tracks (playlist_id, position, track_id, track) VALUES (?, ?, ?, ?)', rows
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO playlists (playlist_id, name, snapshot_id, synced_at) VALUES (?, ?, ?, ?)',
+                (playlist_id, name, snapshot_id, self._now()),
+            )
+            self._conn.commit()
+
+    def remove_playlists(self, playlist_ids: List[str]):
+        """Forget playlists the user no longer has"""
+        self._write_many('DELETE FROM playlist_tracks WHERE playlist_id = ?', ((playlist_id,) for playlist_id in playlist_ids))
+        self._write_many('DELETE FROM playlists WHERE playlist_id = ?', ((playlist_id,) for playlist_id in playlist_ids))
+
+    def latest_added_at(self, table: str) -> Optional[str]:
+        """Newest added_at in saved_tracks / saved_albums, None when empty"""
+        return self._query(f'SELECT MAX(added_at) FROM {table}')[0][0]
+
+    def has_saved(self, table: str, item_id: str) -> bool:
+        """Whether a saved track / album is already mirrored"""
+        id_column, _, _ = self.SAVED_TABLES[table]
+        return bool(self._query(f'SELECT 1 FROM {table} WHERE {id_column} = ?', [item_id]))
+
+    def add_saved(self, table: str, items: List[Tuple[str, Dict[str, Any]]], replace: bool = False):
+        """
+        Store saved tracks / albums
+
+        Args:
+            table: 'saved_tracks' or 'saved_albums'
+            items: [(added_at, Spotify track / album object)]
+            replace: Drop everything mirrored before (full resync)
+        """
+        id_column, value_column, compact = self.SAVED_TABLES[table]
+        rows = [(item['id'], added_at, json.dumps(compact(item))) for added_at, item in items]
+        with self._lock:
+            if replace:
+                self._conn.execute(f'DELETE FROM {table}')
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO {table} ({id_column}, added_at, {value_column}) VALUES (?, ?, ?)', rows
+            )
+            self._conn.commit()
+
+    def mark_synced(self):
+        """Remember when the last sync finished"""
+        self._write('INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)', ['synced_at', self._now()])
+
+    def last_synced(self) -> Optional[float]:
+        """Unix time of the last finished sync, None if never synced"""
+        rows = self._query("SELECT value FROM sync_state WHERE name = 'synced_at'")
+        return rows[0][0] if rows else None
+
+    def sample_tracks(self, limit: int) -> List[Dict[str, Any]]:
+        """Up to limit random mirrored tracks (saved and in playlists), de-duplicated; only those are decoded"""
+        rows = self._query(
+            'SELECT MIN(track) FROM ('
+            'SELECT track_id, track FROM saved_tracks UNION ALL SELECT track_id, track FROM playlist_tracks'
+            ') GROUP BY track_id ORDER BY RANDOM() LIMIT ?',
+            [limit],
+        )
+        return [json.loads(track) for (track,) in rows]
+
+    def artists(self, source: str, limit: int = None) -> List[Tuple[str, str]]:
+        """
+        (artist_id, artist_name) pairs of one mirrored source, most frequent first
+
+        Args:
+            source: 'playlists', 'saved_tracks' or 'saved_albums'
+            limit: Keep only the most frequent artists
+        """
+        if source == 'playlists':
+            rows = self._query('SELECT track FROM playlist_tracks')
+        elif source == 'saved_tracks':
+            rows = self._query('SELECT track FROM saved_tracks')
+        else:
+            rows = self._query('SELECT album FROM saved_albums')
+        counts = Counter()
+        names = {}
+        for (item,) in rows:
+            for artist in json.loads(item)['artists']:
+                counts[artist['id']] += 1
+                names.setdefault(artist['id'], artist['name'])
+        return [(artist_id, names[artist_id]) for artist_id, _ in counts.most_common(limit)]
+
+    def fingerprint(self) -> str:
+        """Changes whenever a playlist snapshot or the saved tracks / albums change"""
+        digest = hashlib.sha1()
+        for row in self._query('SELECT playlist_id, snapshot_id FROM playlists ORDER BY playlist_id'):
+            digest.update(repr(row).encode())
+        for table in self.SAVED_TABLES:
+            digest.update(repr(self._query(f'SELECT COUNT(*), MAX(added_at) FROM {table}')[0]).encode())
+        return digest.hexdigest()
+
+    def stats(self) -> Dict[str, Any]:
+        """Mirrored item counts and time of the last sync"""
+        return {
+            'path': self.path,
+            'playlists': self._query('SELECT COUNT(*) FROM playlists')[0][0],
+            'playlist_tracks': self._query('SELECT COUNT(*) FROM playlist_tracks')[0][0],
+            'saved_tracks': self._query('SELECT COUNT(*) FROM saved_tracks')[0][0],
+            'saved_albums': self._query('SELECT COUNT(*) FROM saved_albums')[0][0],
+            'last_synced': self.last_synced(),
+        }
@@ -1,16 +1,93 @@
+import asyncio
+import functools
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import dashscope
 from dashscope import Generation
 
+
+class LLMTimeoutError(TimeoutError):
+    """No usable LLM response before the per-call deadline"""
+
+
+class JSONObjectScanner:
+    """
+    Finds complete top-level JSON objects in text that arrives in chunks.
+
+    Braces are counted outside of strings (escapes handled), so every character is looked at
+    once no matter how the text is split.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.current = []
+
+    def feed(self, chunk):
+        """Add a chunk, return the text of every object completed by it"""
+        objects = []
+        self.buffer.append(chunk)
+        for char in chunk:
+            if self.depth == 0:
+                if char == '{':
+                    self.depth, self.current = 1, ['{']
+                continue
+            self.current.append(char)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    objects.append(''.join(self.current))
+        return objects
+
+    @property
+    def text(self):
+        """Everything fed so far"""
+        return ''.join(self.buffer)
+
+
 class LLMClient:
-    def __init__(self, dashscope_api_key):
+    def __init__(self, dashscope_api_key, timeout=20.0, hedge_percentile=90, hedge_min_samples=5, max_workers=8):
         """
         Initialize the LLMClient with the DASHSCOPE API key.
         
         Args:
             dashscope_api_key (str): The API key for DashScope service.
+            timeout (float, optional): Default deadline of agenerate in seconds.
+            hedge_percentile (float, optional): Latency percentile after which agenerate sends a second, hedged request.
+            hedge_min_samples (int, optional): Successful calls to observe before hedging starts.
+            max_workers (int, optional): Threads running the blocking DashScope calls.
         """
         self.api_key = dashscope_api_key
         dashscope.api_key = self.api_key
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = deque(maxlen=100)
+        self.calls = 0
+        self.timeouts = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        # calls submitted to the pool and not finished yet, abandoned ones included
+        self._busy = 0
+        self._busy_lock = threading.Lock()
 
     def generate(self, prompt, model='qwen-turbo', **kwargs):
         """
@@ -34,3 +111,181 @@ class LLMClient:
         except Exception as e:
             print(f"An error occurred during generation: {e}")
             return None
+
+    def generate_json(self, prompt, required_keys, model='qwen-turbo', cancel=None, **kwargs):
+        """
+        Generate a JSON object with a streamed request, stopping as soon as it is complete.
+
+        The stream is parsed while it arrives; the first top-level object that parses and has
+        all required_keys ends the request (the stream is closed, text the model would add
+        after the object is never waited for).
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            required_keys (Iterable[str]): Keys the object must have.
+            model (str, optional): The model to use for generation. Defaults to 'qwen-turbo'.
+            cancel (threading.Event, optional): Stop reading the stream once set.
+            **kwargs: Additional arguments for the generation request.
+
+        Returns:
+            A response shaped like generate's ({"status_code", "output": {"text"}}) whose text is
+            just the object, the full streamed text if no object qualified, or the failed chunk.
+        """
+        required_keys = set(required_keys)
+        scanner = JSONObjectScanner()
+        try:
+            stream = Generation.call(
+                model=model,
+                prompt=prompt,
+                stream=True,
+                incremental_output=True,
+                **kwargs
+            )
+        except Exception as e:
+            print(f"An error occurred during generation: {e}")
+            return None
+        try:
+            for chunk in stream:
+                if not self._succeeded(chunk):
+                    return chunk
+                for text in scanner.feed((chunk.get("output") or {}).get("text") or ''):
+                    try:
+                        candidate = json.loads(text)
+                    except ValueError:
+                        continue
+                    if isinstance(candidate, dict) and required_keys <= candidate.keys():
+                        return {"status_code": 200, "output": {"text": text}, "streamed": True}
+                if cancel is not None and cancel.is_set():
+                    return None
+        except Exception as e:
+            print(f"An error occurred during streamed generation: {e}")
+            return None
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        return {"status_code": 200, "output": {"text": scanner.text}, "streamed": True}
+
+    @staticmethod
+    def _succeeded(response):
+        return response is not None and getattr(response, 'status_code', 200) == 200
+
+    def _release_worker(self, _future):
+        with self._busy_lock:
+            self._busy -= 1
+
+    def has_free_worker(self):
+        """Whether a call submitted now would start right away instead of queueing"""
+        with self._busy_lock:
+            return self._busy < self.max_workers
+
+    def hedge_delay(self):
+        """Seconds after which a call is hedged: the hedge_percentile of recent latencies, None before enough samples"""
+        if len(self.latencies) < self.hedge_min_samples:
+            return None
+        latencies = sorted(self.latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100))
+        return latencies[index]
+
+    async def agenerate(self, prompt, model='qwen-turbo', timeout=None, hedge=True, json_keys=None, **kwargs):
+        """
+        Async version of generate: the blocking DashScope call runs on the client's thread pool,
+        so the event loop keeps serving other requests.
+
+        If the call is still running after the hedge_percentile of recent latencies, the same
+        request is sent a second time and the first successful response wins, unless every
+        thread of the pool is busy. A failed response is returned only when no other request is
+        left. Every request gets the remaining time as its transport timeout (request_timeout),
+        so an abandoned call gives its thread back by the deadline.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            model (str, optional): The model to use for generation. Defaults to 'qwen-turbo'.
+            timeout (float, optional): Deadline in seconds, defaults to the client's timeout.
+            hedge (bool, optional): Allow a hedged second request.
+            json_keys (Iterable[str], optional): Stream the response with generate_json and return
+                once a JSON object with these keys is complete.
+            **kwargs: Additional arguments for the generation request.
+
+        Returns:
+            The response from the DashScope API.
+
+        Raises:
+            LLMTimeoutError: No response before the deadline.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else timeout
+        start = loop.time()
+        deadline = start + timeout
+        hedge_delay = self.hedge_delay() if hedge else None
+        self.calls += 1
+        started = {}
+        # tells streamed requests still running in the pool to stop reading
+        cancel = threading.Event()
+        request_timeout = kwargs.pop('request_timeout', None)
+        if json_keys is not None:
+            call = functools.partial(self.generate_json, prompt, json_keys, model=model, cancel=cancel, **kwargs)
+        else:
+            call = functools.partial(self.generate, prompt, model=model, **kwargs)
+
+        def submit():
+            remaining = max(deadline - loop.time(), 0.001)
+            with self._busy_lock:
+                self._busy += 1
+            worker_future = self._executor.submit(
+                call, request_timeout=remaining if request_timeout is None else min(request_timeout, remaining)
+            )
+            # runs when the call finishes, or right away if it is cancelled while still queued
+            worker_future.add_done_callback(self._release_worker)
+            future = asyncio.wrap_future(worker_future, loop=loop)
+            started[future] = loop.time()
+            return future
+
+        first = submit()
+        pending = {first}
+        response = None
+        try:
+            while pending:
+                wait_until = deadline
+                if hedge_delay is not None and len(started) == 1:
+                    wait_until = min(deadline, start + hedge_delay)
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, wait_until - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    response = future.result()
+                    if self._succeeded(response):
+                        self.latencies.append(loop.time() - started[future])
+                        if future is not first:
+                            self.hedge_wins += 1
+                        return response
+                if done:
+                    continue
+                if loop.time() >= deadline:
+                    self.timeouts += 1
+                    raise LLMTimeoutError(f"LLM call did not finish within {timeout}s")
+                if not self.has_free_worker():
+                    # a hedge would only queue behind the running calls, wait for the first one
+                    self.hedges_skipped += 1
+                    hedge_delay = None
+                    continue
+                # slower than usual: send the same request again
+                self.hedged += 1
+                pending.add(submit())
+            return response
+        finally:
+            cancel.set()
+            for future in pending:
+                future.cancel()
+
+    def stats(self):
+        """Call counters, busy pool threads and the current hedge delay"""
+        return {
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'hedges_skipped': self.hedges_skipped,
+            'busy_workers': self._busy,
+            'hedge_delay': self.hedge_delay(),
+        }
@@ -73,7 +73,11 @@ def main():
         # Create MCP server
         logger.info("Starting MCP server...")
         # mcp_server = SpotifyMCPServer(spotify_client, lastfm_client, llm_client)
-        mcp_server = SpotifyMCPSuperServerV2(spotify_client, lastfm_client, llm_client)
+        # Optional warm-up of the caches once the server runs (SPOTIFY_MCP_WARMUP=0 disables it)
+        warmup_budget = None
+        if os.getenv("SPOTIFY_MCP_WARMUP", "1").lower() not in ("0", "false", "no"):
+            warmup_budget = float(os.getenv("SPOTIFY_MCP_WARMUP_BUDGET", "60"))
+        mcp_server = SpotifyMCPSuperServerV2(spotify_client, lastfm_client, llm_client, warmup_budget=warmup_budget)
         logger.info("MCP server initialized successfully!")
         
         # Run server
@@ -2,6 +2,7 @@
 MCP Server Class
 Using fastmcp library to manage Spotify MCP tools
 """
+import contextlib
 import json
 from typing import Dict, List, Any, Optional
 from fastmcp import FastMCP
@@ -10,10 +11,17 @@ from fastmcp import FastMCP
 from spotify_client import SpotifySuperClient as SpotifyClient
 import os
 import sys
-import numpy as np
-import random
 from lastfm_client import LastfmClient
-from llm_client import LLMClient
+from ranking import rank_candidates, sample_trajectory
+from mood_index import points_in_polygon
+from candidate_pool import CandidatePool
+from warmup import Warmup
+from mood_state import MoodState
+from util.prompt_registry import PromptRegistry
+from util.sqlite_store import default_cache_path
+from coordinate_cache import CoordinateCache, COORDINATE_KEYS
+from track_table import TrackTable
+from llm_client import LLMClient, LLMTimeoutError
 import math
 import logging
 
@@ -23,6 +31,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# prompt templates next to this module, independent of the working directory
+PROMPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROMPT_FILES = {
+    'recommend': 'prompt.txt',
+    'mood_detection': 'mood_detection_prompt.txt',
+}
+
+
 class SpotifyMCPServer:
     """Spotify MCP Server Class"""
     
@@ -36,6 +52,13 @@ class SpotifyMCPServer:
         self.spotify_client = spotify_client
         self.mcp = FastMCP("spotify-mcp-server")
         self.setup_tools()
+
+    @property
+    def mood_state(self) -> MoodState:
+        """Start / end mood points of point_meta.json, kept in memory"""
+        if getattr(self, '_mood_state', None) is None:
+            self._mood_state = MoodState('point_meta.json')
+        return self._mood_state
     
     def setup_tools(self):
         """Setup MCP tools"""
@@ -494,17 +517,21 @@ class SpotifyMCPSuperServer(SpotifyMCPServer):
             recent_limit: int = 50,
             playlist_limit: int = 50,
             album_limit: int = 50,
-            saved_tracks_limit: int = 50
-        ) -> list:
-            artist_ids = self.spotify_client.recall_artists(
+            saved_tracks_limit: int = 50,
+            concurrent: bool = True
+        ) -> dict:
+            artist_ids, artist_names = self.spotify_client.recall_artists(
                 top_limit=top_limit,
                 recent_limit=recent_limit,
                 playlist_limit=playlist_limit,
                 album_limit=album_limit,
-                saved_tracks_limit=saved_tracks_limit
+                saved_tracks_limit=saved_tracks_limit,
+                concurrent=concurrent
             )
             return {
                 "artist_ids": artist_ids,
+                "artist_names": artist_names,
+                "latency": self.spotify_client.recall_artists_latency,
                 "message": f"Successfully recalled {len(artist_ids)} artists"
             }
 
@@ -535,82 +562,12 @@ class SpotifyMCPSuperServer(SpotifyMCPServer):
                 along the valence-energy direction for relevance in MPC applications.
             """
             tracks = await self.spotify_client.recall_all_tracks(lastfm_client=self.lastfm_client)
-            data = tracks['data']
-            search_tracks = data.get('tracks', [])
-            search_track_ids = data.get('track_ids', [])
-            search_artist_names = data.get('artist_names', [])
-            
-
-            # markdown
-            # content = "# Recalled Tracks\n\n"
-            # content += f"**Total Tracks:** {len(search_tracks)}\n\n"
-            # content += "## Tracks:\n\n"
-            recall_tracks = []
-            flag_id = []
-            for i, track in enumerate(search_tracks, 1):
-                # content += f"{i}. **{track['name']}** - {', '.join([artist['name'] for artist in track['artists']])}\n"
-                # content += f"- **Album:** {track['album']['name']}\n"
-                # content += f"- **Duration:** {self.spotify_client.format_duration(track['duration_ms'])}\n"
-                # content += f"- **Spotify URI:** {track['uri']}\n"
-                if track['id'] in flag_id:
-                    continue
-                flag_id.append(track['id'])
-                # acousticness, danceability, energy, \
-                # instrumentalness, liveness, loudness, \
-                # speechiness, tempo, valence = track['features']['data']['acousticness'], \
-                # track['features']['data']['danceability'], track['features']['data']['energy'], \
-                # track['features']['data']['instrumentalness'], track['features']['data']['liveness'], \
-                # track['features']['data']['loudness'], track['features']['data']['speechiness'], \
-                # track['features']['data']['tempo'], track['features']['data']['valence']
-                acousticness = track['features']['data']['acousticness']
-                danceability = track['features']['data']['danceability']
-                energy = track['features']['data']['energy']
-                instrumentalness = track['features']['data']['instrumentalness']
-                liveness = track['features']['data']['liveness']
-                loudness = track['features']['data']['loudness']
-                speechiness = track['features']['data']['speechiness']
-                tempo = track['features']['data']['tempo']
-                valence = track['features']['data']['valence']
-                # import pdb; pdb.set_trace()
-                recall_tracks.append({
-                    "id": track['id'],
-                    "name": track['name'],
-                    "artists": [artist['name'] for artist in track['artists']],
-                    # "album": track['album']['name'],
-                    "duration_ms": track['duration_ms'],
-                    "uri": track['uri'],
-                    "valence": valence,
-                    "energy": energy,
-                })
-
-            # load point_meta
-            point_meta_path = 'point_meta.json'
-            point_start, point_end = None, None
-            if os.path.exists(point_meta_path):
-                with open(point_meta_path, 'r') as f:
-                    point_meta = json.load(f)
-                    point_start = point_meta.get('start', None)
-                    point_end = point_meta.get('end', None)
-            else:
-                point_meta = {}
-            if point_start and point_end:
-                point_start = np.array([point_start['x'], point_start['y']])
-                point_end = np.array([point_end['x'], point_end['y']])
-                recall_tracks_valence = [t['valence'] for t in recall_tracks]
-                recall_tracks_energy = [t['energy'] for t in recall_tracks]
-                recall_tracks_valence = np.array(recall_tracks_valence)
-                recall_tracks_energy = np.array(recall_tracks_energy)
-                recall_tracks_points = np.column_stack((recall_tracks_valence, recall_tracks_energy))
-                direction = point_end - point_start
-                direction = direction / np.linalg.norm(direction)
-                relative_vecs = recall_tracks_points - point_start
-                proj_dis = np.dot(relative_vecs, direction)
-                valid_mask = (proj_dis >= 0) & (proj_dis <= 1)
-                valid_recall_tracks = [recall_tracks[i] for i in range(len(recall_tracks)) if valid_mask[i]]
-                valid_proj_dis = proj_dis[valid_mask]
-                sorted_indices = np.argsort(valid_proj_dis)
-                sorted_recall_tracks = [valid_recall_tracks[i] for i in sorted_indices]
-                recall_tracks = sorted_recall_tracks
+            search_tracks = tracks['data'].get('tracks', [])
+            # tracks without audio features and repeated ids are dropped by the table
+            candidates = TrackTable(search_tracks)
+            # if point_meta has a start -> end journey, keep the tracks along it, in order
+            ranked = rank_candidates(candidates.points, trajectory=self.mood_state.trajectory(), index=candidates.mood_index)
+            recall_tracks = [candidates[int(i)].to_dict() for i in ranked.indices]
             # content += "\n\n"
             return {
                 "success": True,
@@ -637,89 +594,13 @@ class SpotifyMCPSuperServer(SpotifyMCPServer):
             # similar_artists = [similar_artists[0]]
             logger.info(f'similar_artists: {similar_artists}')
             tracks = await self.spotify_client.recall_tracks_based_on_artist_names(lastfm_similar_artists=similar_artists)
-            data = tracks['data']
-            search_tracks = data.get('tracks', [])
-            search_track_ids = data.get('track_ids', [])
-            search_artist_names = data.get('artist_names', [])
-            
-
-            # markdown
-            # content = "# Recalled Tracks\n\n"
-            # content += f"**Total Tracks:** {len(search_tracks)}\n\n"
-            # content += "## Tracks:\n\n"
-            recall_tracks = []
-            flag_id = []
-            for i, track in enumerate(search_tracks, 1):
-                # content += f"{i}. **{track['name']}** - {', '.join([artist['name'] for artist in track['artists']])}\n"
-                # content += f"- **Album:** {track['album']['name']}\n"
-                # content += f"- **Duration:** {self.spotify_client.format_duration(track['duration_ms'])}\n"
-                # content += f"- **Spotify URI:** {track['uri']}\n"
-                if track['id'] in flag_id:
-                    continue
-                if track['features']['success'] is False:
-                    continue
-                flag_id.append(track['id'])
-                # acousticness, danceability, energy, \
-                # instrumentalness, liveness, loudness, \
-                # speechiness, tempo, valence = track['features']['data']['acousticness'], \
-                # track['features']['data']['danceability'], track['features']['data']['energy'], \
-                # track['features']['data']['instrumentalness'], track['features']['data']['liveness'], \
-                # track['features']['data']['loudness'], track['features']['data']['speechiness'], \
-                # track['features']['data']['tempo'], track['features']['data']['valence']
-                acousticness = track['features']['data']['acousticness']
-                danceability = track['features']['data']['danceability']
-                energy = track['features']['data']['energy']
-                instrumentalness = track['features']['data']['instrumentalness']
-                liveness = track['features']['data']['liveness']
-                loudness = track['features']['data']['loudness']
-                speechiness = track['features']['data']['speechiness']
-                tempo = track['features']['data']['tempo']
-                valence = track['features']['data']['valence']
-                # import pdb; pdb.set_trace()
-                recall_tracks.append({
-                    "id": track['id'],
-                    "name": track['name'],
-                    "artists": [artist['name'] for artist in track['artists']],
-                    # "album": track['album']['name'],
-                    "duration_ms": track['duration_ms'],
-                    "uri": track['uri'],
-                    "valence": valence,
-                    "energy": energy,
-                })
-
-            # load point_meta
-            point_meta_path = 'point_meta.json'
-            point_start, point_end = None, None
-            if os.path.exists(point_meta_path):
-                with open(point_meta_path, 'r') as f:
-                    point_meta = json.load(f)
-                    point_start = point_meta.get('start', None)
-                    point_end = point_meta.get('end', None)
-            else:
-                point_meta = {}
-            if point_start and point_end:
-                point_start = np.array([point_start['x'], point_start['y']])
-                point_end = np.array([point_end['x'], point_end['y']])
-                recall_tracks_valence = [t['valence'] for t in recall_tracks]
-                recall_tracks_energy = [t['energy'] for t in recall_tracks]
-                recall_tracks_valence = np.array(recall_tracks_valence)
-                recall_tracks_energy = np.array(recall_tracks_energy)
-                recall_tracks_points = np.column_stack((recall_tracks_valence, recall_tracks_energy))
-                direction = point_end - point_start
-                direction = direction / np.linalg.norm(direction)
-                relative_vecs = recall_tracks_points - point_start
-                proj_dis = np.dot(relative_vecs, direction)
-                logger.info('proj_dis: ', proj_dis)
-                valid_mask = (proj_dis >= 0) & (proj_dis <= 1)
-                valid_recall_tracks = [recall_tracks[i] for i in range(len(recall_tracks)) if valid_mask[i]]
-                logger.info('valid_recall_tracks: ', valid_recall_tracks)
-                valid_proj_dis = proj_dis[valid_mask]
-                logger.info('valid_proj_dis: ', valid_proj_dis)
-                sorted_indices = np.argsort(valid_proj_dis)
-                sorted_recall_tracks = [valid_recall_tracks[i] for i in sorted_indices]
-                recall_tracks = sorted_recall_tracks
+            search_tracks = tracks['data'].get('tracks', [])
+            candidates = TrackTable(search_tracks)
+            trajectory = self.mood_state.trajectory()
+            ranked = rank_candidates(candidates.points, trajectory=trajectory, index=candidates.mood_index)
+            recall_tracks = [candidates[int(i)].to_dict() for i in ranked.indices]
             # content += "\n\n"
-            logger.info('start: ', point_start, 'end: ', point_end)
+            logger.info('trajectory: %s', trajectory)
             return {
                 "success": True,
                 # "content": content,
@@ -733,7 +614,7 @@ class SpotifyMCPSuperServer(SpotifyMCPServer):
 
 class SpotifyMCPSuperServerV2(SpotifyMCPServer):
     """Super MCP Server with recommendation tools"""
-    def __init__(self, spotify_client: SpotifyClient, lastfm_client: LastfmClient, llm_client: LLMClient):
+    def __init__(self, spotify_client: SpotifyClient, lastfm_client: LastfmClient, llm_client: LLMClient, warmup_budget: Optional[float] = None):
         """
         Initialize MCP server
         
@@ -741,13 +622,95 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
             spotify_client: Spotify client instance
             lastfm_client: Last.fm client instance
             llm_client: LLM client instance for activity to valence/energy mapping
+            warmup_budget: Seconds for the start-up warm-up, None to disable it
         """
         self.spotify_client = spotify_client
         self.lastfm_client = lastfm_client
         self.llm_client = llm_client
-        self.mcp = FastMCP("spotify-mcp-server")
+        self.prompts = PromptRegistry(PROMPT_DIR, PROMPT_FILES)
+        self.warmup = None
+        if warmup_budget is not None:
+            self.warmup = Warmup(spotify_client, lastfm_client, self.candidate_pool, budget=warmup_budget)
+        self.mcp = FastMCP("spotify-mcp-server", lifespan=self.lifespan)
         self.setup_tools()
 
+    @contextlib.asynccontextmanager
+    async def lifespan(self, server: FastMCP):
+        """Start the warm-up once the server runs, stop the background work on shutdown"""
+        if self.warmup is not None:
+            self.warmup.start()
+        try:
+            yield
+        finally:
+            if self.warmup is not None:
+                await self.warmup.stop()
+            await self.candidate_pool.stop()
+            await self.spotify_client.reccobeats.aclose()
+            if self.lastfm_client is not None:
+                await self.lastfm_client.aclose()
+
+    @property
+    def coordinate_cache(self) -> CoordinateCache:
+        """Activity -> valence/energy coordinates returned by the LLM, opened on first use"""
+        if getattr(self, '_coordinate_cache', None) is None:
+            self._coordinate_cache = CoordinateCache(default_cache_path('coordinates.sqlite3'))
+        return self._coordinate_cache
+
+    @property
+    def candidate_pool(self) -> CandidatePool:
+        """Warm pool of general recall candidates, refreshed in the background once started"""
+        if getattr(self, '_candidate_pool', None) is None:
+            self._candidate_pool = CandidatePool(self.spotify_client, self.lastfm_client)
+        return self._candidate_pool
+
+    async def recall_candidate_tracks(self, specific_artists: List[str], limit: int, valence_range, energy_range, target_point, point_radius: float = 0.15):
+        """
+        Pull streamed recall candidates into a TrackTable until `limit` of them fall inside the
+        target region, then close the stream, which cancels the outstanding upstream work.
+
+        The target region is the valence/energy box, or a circle of point_radius around
+        target_point when the box collapses to a single point. Every pulled track is kept
+        (also those outside the region), so the ranking fallback still has candidates.
+
+        Without specific_artists the candidates come from the candidate pool: a warm pool with
+        `limit` tracks in the region answers without any request, a thin or cold one is topped
+        up by the general recall.
+
+        Returns:
+            (candidates, similar_artists): candidates is a TrackTable, similar_artists is None
+            unless specific_artists is given
+        """
+        is_point = valence_range[0] == valence_range[1] and energy_range[0] == energy_range[1]
+
+        def in_region(row):
+            if is_point:
+                return math.hypot(row.valence - target_point[0], row.energy - target_point[1]) <= point_radius
+            return valence_range[0] <= row.valence <= valence_range[1] and energy_range[0] <= row.energy <= energy_range[1]
+
+        if not specific_artists:
+            pool = self.candidate_pool
+            pool.start()
+            candidates = await pool.top_up(
+                limit, lambda: pool.count_in_region(valence_range, energy_range, target_point, point_radius), in_region
+            )
+            return candidates, None
+
+        similar_artists = await self.lastfm_client.expand_artists(specific_artists, hops=2, fan_out=10, max_artists=30)
+        num_in_region = 0
+
+        def enough_in_region(table, row):
+            nonlocal num_in_region
+            num_in_region += in_region(row)
+            if num_in_region >= limit:
+                logger.info(f'{num_in_region} tracks in target region after {len(table)} candidates, stopping recall early')
+                return True
+            return False
+
+        candidates = await self.spotify_client.collect_track_table(
+            self.spotify_client.stream_recall_tracks(similar_artists), stop=enough_in_region
+        )
+        return candidates, similar_artists
+
     def setup_tools(self):
         """Setup MCP tools"""
         # @self.mcp.tool(enabled=False)
@@ -865,19 +828,19 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
             # Map activity to valence and energy ranges using LLM
             logger.info(f'Using LLM to determine valence and energy ranges for activity: {activity}')
             
-            # # Prepare prompt for LLM
-            prompt = ""
-            with open('spotify_mcp_server/prompt.txt', 'r') as f:
-                prompt = f.read()
-
-
-            # Call LLM to get start and end points
+            # Call LLM to get start and end points, unless the activity (or a near-duplicate) is cached
             try:
-                # Assuming we have an llm_client available
-                llm_response = self.llm_client.generate(prompt)["output"]["text"]
-                logger.info(f'LLM response: {llm_response}')
-                # Parse LLM response
-                points = json.loads(llm_response)
+                points = self.coordinate_cache.get(activity, genres)
+                from_llm = points is None
+                if from_llm:
+                    # # Prepare prompt for LLM
+                    prompt = self.prompts.render('recommend', activity=activity, genres=json.dumps(genres, ensure_ascii=False))
+                    llm_response = (await self.llm_client.agenerate(prompt, json_keys=COORDINATE_KEYS))["output"]["text"]
+                    logger.info(f'LLM response: {llm_response}')
+                    # Parse LLM response
+                    points = json.loads(llm_response)
+                else:
+                    logger.info(f'Cached coordinates: {points}')
                 start_point = (points['start_valence'], points['start_energy'])
                 end_point = (points['end_valence'], points['end_energy'])
                 logger.info(f'Determined points: start={start_point}, end={end_point}')
@@ -893,6 +856,8 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
                 # Validate ranges
                 if not (0 <= valence_range[0] <= valence_range[1] <= 1 and 0 <= energy_range[0] <= energy_range[1] <= 1):
                     raise ValueError("LLM returned invalid valence or energy ranges")
+                if from_llm:
+                    self.coordinate_cache.put(activity, genres, points)
                 
                 logger.info(f'Determined ranges: valence={valence_range}, energy={energy_range}')
             except Exception as e:
@@ -925,74 +890,12 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
                 logger.info(f'Using default points: start={start_point}, end={end_point}')
             
             # # Recall tracks and filter by valence and energy
-            if specific_wanted_artists_in_prompt and len(specific_wanted_artists_in_prompt) > 0:
-                similar_artists = await self.lastfm_client.get_similar_artists(specific_wanted_artists_in_prompt, limit=10, include_original=True)
-                tracks = await self.spotify_client.recall_tracks_based_on_artist_names(lastfm_similar_artists=similar_artists)
-            else:
-                tracks = await self.spotify_client.recall_all_tracks(self.lastfm_client)
-            # tracks = await self.spotify_client.recall_all_tracks(self.lastfm_client)
-            data = tracks['data']
-            search_tracks = data.get('tracks', [])
-            logger.info(f'Found {len(search_tracks)} tracks')
-            logger.info(f'search_tracks[:2]: {search_tracks[:2]}')
-            
-            filtered_tracks = []
-            flag_id = []
-            for track in search_tracks:
-                if track['id'] in flag_id:
-                    continue
-                if track.get('features', {}).get('success', False) is False:
-                    continue
-                
-                valence = track['features']['data']['valence']
-                energy = track['features']['data']['energy']
-                
-                # Check if track is within the desired valence and energy ranges
-                if valence_range[0] == valence_range[1] and energy_range[0] == energy_range[1]:
-                    # sort by distance to the point
-                    distance = math.sqrt((valence - start_point[0])**2 + (energy - start_point[1])**2)
-                    filtered_tracks.append({
-                        "id": track['id'],
-                        "name": track['name'],
-                        "artists": [artist['name'] for artist in track['artists']],
-                        "duration_ms": track['duration_ms'],
-                        "uri": track['uri'],
-                        "valence": valence,
-                        "energy": energy,
-                        "distance": distance,
-                    })
-                    continue
-                # Check if track is within the desired valence and energy ranges
-                if valence_range[0] <= valence <= valence_range[1] and energy_range[0] <= energy <= energy_range[1]:
-                    flag_id.append(track['id'])
-                    filtered_tracks.append({
-                        "id": track['id'],
-                        "name": track['name'],
-                        "artists": [artist['name'] for artist in track['artists']],
-                        "duration_ms": track['duration_ms'],
-                        "uri": track['uri'],
-                        "valence": valence,
-                        "energy": energy,
-                    })
-            if len(filtered_tracks) < limit:
-                logger.info(f'len(filtered_tracks) < limit, len(filtered_tracks): {len(filtered_tracks)}, limit: {limit}')
-                range_center_x = (valence_range[0] + valence_range[1]) / 2
-                range_center_y = (energy_range[0] + energy_range[1]) / 2
-                # get tracks in search_tracks but not in filtered_tracks
-                unselected_tracks = [track for track in search_tracks if track['id'] not in flag_id and track.get('features', {}).get('success', False) is True]
-                logger.info(f'filtered_tracks[:10]: {filtered_tracks[:10]}')
-                logger.info(f'unselected_tracks[:10]: {unselected_tracks[:10]}')
-                # calc distance to the center
-                for idx, track in enumerate(unselected_tracks):
-                    unselected_tracks[idx]['distance'] = math.sqrt((track['features']['data']['valence'] - range_center_x)**2 + (track['features']['data']['energy'] - range_center_y)**2)
-                for idx, track in enumerate(filtered_tracks):
-                    filtered_tracks[idx]['distance'] = math.sqrt((track['valence'] - range_center_x)**2 + (track['energy'] - range_center_y)**2)
-                # sort by distance to the center
-                unselected_tracks.sort(key=lambda x: x['distance'])
-                # add unselected_tracks to filtered_tracks
-                filtered_tracks.extend(unselected_tracks)
-                # sort by distance
-                filtered_tracks.sort(key=lambda x: x['distance'])
+            candidates, similar_artists = await self.recall_candidate_tracks(
+                specific_wanted_artists_in_prompt, limit, valence_range, energy_range, start_point
+            )
+            logger.info(f'Found {len(candidates)} tracks')
+            logger.info(f'candidates[:2]: {[row.to_dict() for row in candidates.rows(range(min(2, len(candidates))))]}')
+            
             
             # # Shuffle and limit the results
             # random.shuffle(filtered_tracks)
@@ -1045,69 +948,20 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
             # check track names in playlist
             track_names_in_playlist = self.spotify_client.get_playlist_tracks(playlist_id)
             # json.dump(track_names_in_playlist, open('track_names_in_playlist.json', 'w'), indent=4)
-            exist_tracks = [track['track']['name'] for track in track_names_in_playlist['data']['items']]
-            filtered_tracks = [track for track in filtered_tracks if track['name'] not in exist_tracks]
-            # logger.info(f'Number of tracks of filtered_tracks: {len(filtered_tracks)}')
-            # logger.info(f'filtered_tracks[:10]: {filtered_tracks[:10]}')
-            if 'distance' in filtered_tracks[0]:
-                filtered_tracks.sort(key=lambda x: x['distance'])
-            logger.info(f'Number of tracks of filtered_tracks: {len(filtered_tracks)}')
-            logger.info(f'filtered_tracks[:2]: {filtered_tracks[:2]}')
-            # load point_meta
-            point_meta_path = 'point_meta.json'
-            point_start, point_end = None, None
-            if os.path.exists(point_meta_path):
-                with open(point_meta_path, 'r') as f:
-                    point_meta = json.load(f)
-                    point_start = point_meta.get('start', None)
-                    point_end = point_meta.get('end', None)
-            else:
-                point_meta = {}
-            if point_start and point_end:
-                if point_start['x'] is None or point_start['y'] is None or point_end['x'] is None or point_end['y'] is None:
-                    point_start['x'], point_start['y'] = 0.5, 0.5
-                if point_end['x'] is None or point_end['y'] is None:
-                    point_end['x'], point_end['y'] = 0.5, 0.5
-                point_start = np.array([point_start['x'], point_start['y']])
-                point_end = np.array([point_end['x'], point_end['y']])
-                logger.info('point: %s, %s', point_start, point_end)
-                filtered_tracks_valence, filtered_tracks_energy = [], []
-                filtered_tracks_list = []
-                for track in filtered_tracks:
-                    if 'features' in track and 'data' in track['features'] and 'valence' in track['features']['data'] and 'energy' in track['features']['data']:
-                        filtered_tracks_valence.append(track['features']['data']['valence'])
-                        filtered_tracks_energy.append(track['features']['data']['energy'])
-                        filtered_tracks_list.append(track)
-                filtered_tracks = filtered_tracks_list
-                filtered_tracks_valence = np.array(filtered_tracks_valence)
-                filtered_tracks_energy = np.array(filtered_tracks_energy)
-                filtered_tracks_points = np.column_stack((filtered_tracks_valence, filtered_tracks_energy))
-                direction = point_end - point_start
-                direction = direction / np.linalg.norm(direction)
-                relative_vecs = filtered_tracks_points - point_start
-                proj_dis = np.dot(relative_vecs, direction)
-                # valid_mask = (proj_dis >= 0) & (proj_dis <= 1)
-                valid_mask = list((proj_dis >= 0) & (proj_dis <= 1))
-                # valid_filtered_tracks_tracks = [filtered_tracks[i] for i in range(len(filtered_tracks)) if valid_mask[i]]
-                valid_filtered_tracks_tracks = []
-                for i in range(len(filtered_tracks)):
-                    if valid_mask[i]:
-                        valid_filtered_tracks_tracks.append(filtered_tracks[i])
-                valid_proj_dis = proj_dis[valid_mask]
-                sorted_indices = np.argsort(valid_proj_dis)
-                sorted_recommended_tracks = []
-                for i in sorted_indices:
-                    sorted_recommended_tracks.append(valid_filtered_tracks_tracks[i])
-                # sorted_recommended_tracks = [valid_filtered_tracks_tracks[i] for i in sorted_indices]
-                recommended_tracks = sorted_recommended_tracks
-            # recommended_tracks = recommended_tracks[:limit]
-            # select limit tracks more average between start end points
-            indices = list(range(limit))
-            random.shuffle(indices)
-            selected_indices = indices[:limit]
-            selected_indices.sort()
-            tmp = [recommended_tracks[i] for i in selected_indices]
-            recommended_tracks = tmp
+            exist_tracks = {track['track']['name'] for track in track_names_in_playlist['data']['items'] if track.get('track')}
+            # rank the candidates: region filter, distance to the target, order along point_meta's start -> end
+            trajectory = self.mood_state.trajectory()
+            logger.info('trajectory: %s', trajectory)
+            ranked = rank_candidates(
+                candidates.points, valence_range, energy_range, start_point, limit,
+                trajectory=trajectory,
+                exclude=[name in exist_tracks for name in candidates.names],
+                index=candidates.mood_index,
+            )
+            logger.info(f'Number of ranked candidates: {len(ranked.indices)}')
+            # spread the picks evenly along the journey
+            picked = sample_trajectory(candidates.points, ranked.indices, trajectory, limit)
+            recommended_tracks = [candidates[int(i)].to_dict() for i in picked]
 
             logger.info(f'Number of tracks of recommended_tracks: {len(recommended_tracks)}')
             logger.info(f'recommended_tracks[:2]: {recommended_tracks[:2]}')
@@ -1216,19 +1070,19 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
             # Map activity to valence and energy ranges using LLM
             logger.info(f'Using LLM to determine valence and energy ranges for activity: {activity}')
             
-            # # Prepare prompt for LLM
-            prompt = ""
-            with open('spotify_mcp_server/prompt.txt', 'r') as f:
-                prompt = f.read()
-
-
-            # Call LLM to get start and end points
+            # Call LLM to get start and end points, unless the activity (or a near-duplicate) is cached
             try:
-                # Assuming we have an llm_client available
-                llm_response = self.llm_client.generate(prompt)["output"]["text"]
-                logger.info(f'LLM response: {llm_response}')
-                # Parse LLM response
-                points = json.loads(llm_response)
+                points = self.coordinate_cache.get(activity, genres)
+                from_llm = points is None
+                if from_llm:
+                    # # Prepare prompt for LLM
+                    prompt = self.prompts.render('recommend', activity=activity, genres=json.dumps(genres, ensure_ascii=False))
+                    llm_response = (await self.llm_client.agenerate(prompt, json_keys=COORDINATE_KEYS))["output"]["text"]
+                    logger.info(f'LLM response: {llm_response}')
+                    # Parse LLM response
+                    points = json.loads(llm_response)
+                else:
+                    logger.info(f'Cached coordinates: {points}')
                 start_point = (points['start_valence'], points['start_energy'])
                 end_point = (points['end_valence'], points['end_energy'])
                 logger.info(f'Determined points: start={start_point}, end={end_point}')
@@ -1244,6 +1098,8 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
                 # Validate ranges
                 if not (0 <= valence_range[0] <= valence_range[1] <= 1 and 0 <= energy_range[0] <= energy_range[1] <= 1):
                     raise ValueError("LLM returned invalid valence or energy ranges")
+                if from_llm:
+                    self.coordinate_cache.put(activity, genres, points)
                 
                 logger.info(f'Determined ranges: valence={valence_range}, energy={energy_range}')
             except Exception as e:
@@ -1276,75 +1132,12 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
                 logger.info(f'Using default points: start={start_point}, end={end_point}')
             
             # # Recall tracks and filter by valence and energy
-            similar_artists = None
-            if specific_wanted_artists_in_prompt and len(specific_wanted_artists_in_prompt) > 0:
-                similar_artists = await self.lastfm_client.get_similar_artists(specific_wanted_artists_in_prompt, limit=10, include_original=True)
-                tracks = await self.spotify_client.recall_tracks_based_on_artist_names(lastfm_similar_artists=similar_artists)
-            else:
-                tracks = await self.spotify_client.recall_all_tracks(self.lastfm_client)
-            # tracks = await self.spotify_client.recall_all_tracks(self.lastfm_client)
-            data = tracks['data']
-            search_tracks = data.get('tracks', [])
-            logger.info(f'Found {len(search_tracks)} tracks')
-            logger.info(f'search_tracks[:10]: {search_tracks[:10]}')
-            
-            filtered_tracks = []
-            flag_id = []
-            for track in search_tracks:
-                if track['id'] in flag_id:
-                    continue
-                if track.get('features', {}).get('success', False) is False:
-                    continue
-                
-                valence = track['features']['data']['valence']
-                energy = track['features']['data']['energy']
-                
-                # Check if track is within the desired valence and energy ranges
-                if valence_range[0] == valence_range[1] and energy_range[0] == energy_range[1]:
-                    # sort by distance to the point
-                    distance = math.sqrt((valence - start_point[0])**2 + (energy - start_point[1])**2)
-                    filtered_tracks.append({
-                        "id": track['id'],
-                        "name": track['name'],
-                        "artists": [artist['name'] for artist in track['artists']],
-                        "duration_ms": track['duration_ms'],
-                        "uri": track['uri'],
-                        "valence": valence,
-                        "energy": energy,
-                        "distance": distance,
-                    })
-                    continue
-                # Check if track is within the desired valence and energy ranges
-                if valence_range[0] <= valence <= valence_range[1] and energy_range[0] <= energy <= energy_range[1]:
-                    flag_id.append(track['id'])
-                    filtered_tracks.append({
-                        "id": track['id'],
-                        "name": track['name'],
-                        "artists": [artist['name'] for artist in track['artists']],
-                        "duration_ms": track['duration_ms'],
-                        "uri": track['uri'],
-                        "valence": valence,
-                        "energy": energy,
-                    })
-            if len(filtered_tracks) < limit:
-                logger.info(f'len(filtered_tracks) < limit, len(filtered_tracks): {len(filtered_tracks)}, limit: {limit}')
-                range_center_x = (valence_range[0] + valence_range[1]) / 2
-                range_center_y = (energy_range[0] + energy_range[1]) / 2
-                # get tracks in search_tracks but not in filtered_tracks
-                unselected_tracks = [track for track in search_tracks if track['id'] not in flag_id and track.get('features', {}).get('success', False) is True]
-                logger.info(f'filtered_tracks[:10]: {filtered_tracks[:10]}')
-                logger.info(f'unselected_tracks[:10]: {unselected_tracks[:10]}')
-                # calc distance to the center
-                for idx, track in enumerate(unselected_tracks):
-                    unselected_tracks[idx]['distance'] = math.sqrt((track['features']['data']['valence'] - range_center_x)**2 + (track['features']['data']['energy'] - range_center_y)**2)
-                for idx, track in enumerate(filtered_tracks):
-                    filtered_tracks[idx]['distance'] = math.sqrt((track['valence'] - range_center_x)**2 + (track['energy'] - range_center_y)**2)
-                # sort by distance to the center
-                unselected_tracks.sort(key=lambda x: x['distance'])
-                # add unselected_tracks to filtered_tracks
-                filtered_tracks.extend(unselected_tracks)
-                # sort by distance
-                filtered_tracks.sort(key=lambda x: x['distance'])
+            candidates, similar_artists = await self.recall_candidate_tracks(
+                specific_wanted_artists_in_prompt, limit, valence_range, energy_range, start_point
+            )
+            logger.info(f'Found {len(candidates)} tracks')
+            logger.info(f'candidates[:10]: {[row.to_dict() for row in candidates.rows(range(min(10, len(candidates))))]}')
+            
             
             # # Shuffle and limit the results
             # random.shuffle(filtered_tracks)
@@ -1397,87 +1190,23 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
             # check track names in playlist
             track_names_in_playlist = self.spotify_client.get_playlist_tracks(playlist_id)
             # json.dump(track_names_in_playlist, open('track_names_in_playlist.json', 'w'), indent=4)
-            exist_tracks = [track['track']['name'] for track in track_names_in_playlist['data']['items']]
-            filtered_tracks = [track for track in filtered_tracks if track['name'] not in exist_tracks]
-            # Shuffle and limit the results
-            # random.shuffle(filtered_tracks)
-            # logger.info(f'Number of tracks of filtered_tracks: {len(filtered_tracks)}')
-            # logger.info(f'filtered_tracks[:10]: {filtered_tracks[:10]}')
-            if 'distance' in filtered_tracks[0]:
-                filtered_tracks.sort(key=lambda x: x['distance'])
-            logger.info(f'Number of tracks of filtered_tracks: {len(filtered_tracks)}')
-            logger.info(f'filtered_tracks[:10]: {filtered_tracks[:10]}')
-            # load point_meta
-            point_meta_path = 'point_meta.json'
-            point_start, point_end = None, None
-            if os.path.exists(point_meta_path):
-                with open(point_meta_path, 'r') as f:
-                    point_meta = json.load(f)
-                    point_start = point_meta.get('start', None)
-                    point_end = point_meta.get('end', None)
-            else:
-                point_meta = {}
-            if point_start and point_end:
-                if point_start['x'] is None or point_start['y'] is None or point_end['x'] is None or point_end['y'] is None:
-                    point_start['x'], point_start['y'] = 0.5, 0.5
-                if point_end['x'] is None or point_end['y'] is None:
-                    point_end['x'], point_end['y'] = 0.5, 0.5
-                point_start = np.array([point_start['x'], point_start['y']])
-                point_end = np.array([point_end['x'], point_end['y']])
-                logger.info('point: %s, %s', point_start, point_end)    
-                filtered_tracks_valence, filtered_tracks_energy = [], []
-                filtered_tracks_list = []
-                for track in filtered_tracks:
-                    if 'features' in track and 'data' in track['features'] and 'valence' in track['features']['data'] and 'energy' in track['features']['data']:
-                        filtered_tracks_valence.append(track['features']['data']['valence'])
-                        filtered_tracks_energy.append(track['features']['data']['energy'])
-                        filtered_tracks_list.append(track)
-                filtered_tracks = filtered_tracks_list
-                filtered_tracks_valence = np.array(filtered_tracks_valence)
-                filtered_tracks_energy = np.array(filtered_tracks_energy)
-                filtered_tracks_points = np.column_stack((filtered_tracks_valence, filtered_tracks_energy))
-                direction = point_end - point_start
-                direction = direction / np.linalg.norm(direction)
-                relative_vecs = filtered_tracks_points - point_start
-                proj_dis = np.dot(relative_vecs, direction)
-                # valid_mask = (proj_dis >= 0) & (proj_dis <= 1)
-                valid_mask = list((proj_dis >= 0) & (proj_dis <= 1))
-                # valid_filtered_tracks_tracks = [filtered_tracks[i] for i in range(len(filtered_tracks)) if valid_mask[i]]
-                valid_filtered_tracks_tracks = []
-                for i in range(len(filtered_tracks)):
-                    if valid_mask[i]:
-                        valid_filtered_tracks_tracks.append(filtered_tracks[i])
-                valid_proj_dis = proj_dis[valid_mask]
-                sorted_indices = np.argsort(valid_proj_dis)
-                sorted_recommended_tracks = []
-                for i in sorted_indices:
-                    sorted_recommended_tracks.append(valid_filtered_tracks_tracks[i])
-                # sorted_recommended_tracks = [valid_filtered_tracks_tracks[i] for i in sorted_indices]
-                recommended_tracks = sorted_recommended_tracks
-            recommended_tracks = recommended_tracks[:limit]
+            exist_tracks = {track['track']['name'] for track in track_names_in_playlist['data']['items'] if track.get('track')}
+            # rank the candidates: region filter, distance to the target, order along point_meta's start -> end
+            trajectory = self.mood_state.trajectory()
+            logger.info('trajectory: %s', trajectory)
+            ranked = rank_candidates(
+                candidates.points, valence_range, energy_range, start_point, limit,
+                trajectory=trajectory,
+                exclude=[name in exist_tracks for name in candidates.names],
+                index=candidates.mood_index,
+            )
+            logger.info(f'Number of ranked candidates: {len(ranked.indices)}')
+            # spread the picks evenly along the journey
+            picked = sample_trajectory(candidates.points, ranked.indices, trajectory, limit)
+            recommended_tracks = [candidates[int(i)].to_dict() for i in picked]
             logger.info(f'recommended_tracks[:2]: {recommended_tracks[:2]}')
 
-            ret_tracks = []
-            flag_id = []
-            for track in recommended_tracks:
-                if track['id'] in flag_id:
-                    continue
-                if track.get('features', {}).get('success', False) is False:
-                    continue
-                flag_id.append(track['id'])
-                acousticness = track['features']['data']['acousticness']
-                danceability = track['features']['data']['danceability']
-                energy = track['features']['data']['energy']
-                valence = track['features']['data']['valence']
-                ret_tracks.append({
-                    "id": track['id'],
-                    "name": track['name'],
-                    "artists": [artist['name'] for artist in track['artists']],
-                    "duration_ms": track['duration_ms'],
-                    "uri": track['uri'],
-                    "valence": valence,
-                    "energy": energy,
-                })
+            ret_tracks = recommended_tracks
 
             return {
                 "success": True,
@@ -1491,6 +1220,158 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
 
 
 
+        @self.mcp.tool()
+        async def recommend_tracks_in_polygon(vertices: List[List[float]], limit: int = 20) -> dict:
+            """
+            Recommend tracks whose valence and energy lie inside a polygon drawn on the valence-energy plane.
+
+            Args:
+                vertices (List[List[float]]): Polygon corners as [valence, energy] pairs, at least 3, each value 0.0 to 1.0
+                limit (int): Maximum number of tracks to return
+
+            Returns:
+                dict: {
+                    "success": bool,
+                    "message": str,
+                    "recall_tracks": List[dict], each containing id, name, artists, duration_ms, uri, valence, energy
+                }
+
+            Note:
+                - Tracks come from the candidate pool, nearest to the center of the polygon first
+                - The pool is topped up by the general recall when fewer than limit tracks are inside
+            """
+            if len(vertices) < 3 or any(len(vertex) != 2 for vertex in vertices):
+                return {
+                    "success": False,
+                    "message": "A polygon needs at least 3 [valence, energy] vertices",
+                    "recall_tracks": []
+                }
+            if any(not 0.0 <= value <= 1.0 for vertex in vertices for value in vertex):
+                return {
+                    "success": False,
+                    "message": "Polygon vertices must be between 0.0 and 1.0",
+                    "recall_tracks": []
+                }
+            pool = self.candidate_pool
+            pool.start()
+            await pool.top_up(
+                limit,
+                lambda: len(pool.select_polygon(vertices)),
+                lambda row: bool(points_in_polygon([(row.valence, row.energy)], vertices)[0]),
+            )
+            picked = pool.select_polygon(vertices, limit)
+            recall_tracks = [pool.table[int(i)].to_dict() for i in picked]
+            return {
+                "success": True,
+                "message": f"Select {len(recall_tracks)} tracks inside the polygon",
+                "recall_tracks": recall_tracks
+            }
+
+        @self.mcp.tool()
+        def get_warmup_status() -> dict:
+            """
+            Get the progress of the start-up warm-up that fills the caches behind the recommendation tools.
+
+            Returns:
+                dict: {
+                    "state": "disabled" | "idle" | "running" | "done" | "timeout" | "cancelled",
+                    "steps": {step name: {"state", "detail", "seconds"}},
+                    "elapsed": float,
+                    "budget": float,
+                }
+            """
+            if self.warmup is None:
+                return {"state": "disabled"}
+            return self.warmup.status()
+
+        @self.mcp.tool()
+        def get_cache_stats() -> dict:
+            """
+            Get hit rates and sizes of the local caches used by the recommendation tools.
+
+            Returns:
+                dict: {
+                    "feature_store": {"path", "hits", "misses", "hit_rate", "entries"},
+                    "resolution_cache": {..., "negative_entries"},
+                    "tivo_cache": {..., "stale_hits", "entries_by_kind"},
+                    "similar_artist_cache": {...},
+                    "artist_graph": {..., "expanded", "edges"},
+                    "library_mirror": {"playlists", "playlist_tracks", "saved_tracks", "saved_albums", "last_synced"},
+                    "coordinate_cache": {..., "similar_hits"},
+                    "candidate_pool": {"tracks", "regions", "built_at", "stale", "refreshes", "top_ups", "running", "last_error"},
+                }
+            """
+            return {
+                "feature_store": self.spotify_client.feature_store.stats(),
+                "resolution_cache": self.spotify_client.resolution_cache.stats(),
+                "tivo_cache": self.spotify_client.tivo_cache.stats(),
+                "similar_artist_cache": self.lastfm_client.similar_artist_cache.stats(),
+                "artist_graph": self.lastfm_client.artist_graph.stats(),
+                "library_mirror": self.spotify_client.library_mirror.stats(),
+                "coordinate_cache": self.coordinate_cache.stats(),
+                "candidate_pool": self.candidate_pool.stats(),
+            }
+
+        @self.mcp.tool()
+        def set_mood_points(start_valence: Optional[float] = None, start_energy: Optional[float] = None, end_valence: Optional[float] = None, end_energy: Optional[float] = None, reset: bool = False) -> dict:
+            """
+            Set the start and/or end point of the mood journey used by the recommendation tools (point_meta.json).
+
+            Args:
+                start_valence (float): Valence of the start point, 0.0 to 1.0
+                start_energy (float): Energy of the start point, 0.0 to 1.0
+                end_valence (float): Valence of the end point, 0.0 to 1.0
+                end_energy (float): Energy of the end point, 0.0 to 1.0
+                reset (bool): Clear both points first (without other arguments: clear them)
+
+            Returns:
+                dict: {"success": bool, "data": {"start", "end"}, "message": str}
+
+            Note:
+                - A point is only changed when both its valence and energy are given
+            """
+            values = {
+                'start_valence': start_valence, 'start_energy': start_energy,
+                'end_valence': end_valence, 'end_energy': end_energy,
+            }
+            for key, value in values.items():
+                if value is not None and not 0.0 <= value <= 1.0:
+                    return {
+                        "success": False,
+                        "data": self.mood_state.get(),
+                        "message": f"{key} must be between 0.0 and 1.0, got {value}"
+                    }
+            points = {}
+            for name in ('start', 'end'):
+                valence, energy = values[f'{name}_valence'], values[f'{name}_energy']
+                if (valence is None) != (energy is None):
+                    return {
+                        "success": False,
+                        "data": self.mood_state.get(),
+                        "message": f"Both {name}_valence and {name}_energy are required to set the {name} point"
+                    }
+                if valence is not None:
+                    points[name] = (valence, energy)
+            if not points and not reset:
+                return {
+                    "success": False,
+                    "data": self.mood_state.get(),
+                    "message": "No point given"
+                }
+            try:
+                data = self.mood_state.update(reset=reset, **points)
+            except OSError as e:
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "message": f"Failed to save {self.mood_state.path}"
+                }
+            return {
+                "success": True,
+                "data": data,
+                "message": "Mood points updated"
+            }
+
         @self.mcp.tool()
         async def mood_detection(user_mood_expression: str) -> dict:
             """
@@ -1527,24 +1408,17 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
             logger.info(f'User mood expression: {user_mood_expression}')
             
             try:
-                # Read the mood detection prompt
-                prompt_path = 'spotify_mcp_server/mood_detection_prompt.txt'
-                if not os.path.exists(prompt_path):
-                    return {
-                        "success": False,
-                        "error": "prompt_file_not_found",
-                        "message": f"Mood detection prompt file not found at {prompt_path}"
-                    }
-                
-                with open(prompt_path, 'r') as f:
-                    prompt = f.read()
-                
-                # Add the user's mood expression to the prompt
-                full_prompt = f"{prompt}\n\nUser: {user_mood_expression}\n"
+                # Render the mood detection prompt with the user's mood expression
+                full_prompt = self.prompts.render('mood_detection', user_mood_expression=user_mood_expression)
                 
                 # Call LLM to get mood coordinates
                 logger.info('Using LLM to detect mood coordinates')
-                llm_response = self.llm_client.generate(full_prompt)["output"]["text"]
+                try:
+                    llm_response = (await self.llm_client.agenerate(full_prompt, json_keys=COORDINATE_KEYS))["output"]["text"]
+                except LLMTimeoutError as e:
+                    # an empty response falls through to the default coordinates below
+                    logger.error(f'{e}, using default values')
+                    llm_response = ''
                 logger.info(f'LLM response: {llm_response}')
                 
                 # Parse LLM response to extract coordinates
@@ -1596,63 +1470,20 @@ class SpotifyMCPSuperServerV2(SpotifyMCPServer):
                 is_transition = (coordinates['start_valence'] != coordinates['end_valence'] or 
                                coordinates['start_energy'] != coordinates['end_energy'])
                 
-                # Load existing point_meta.json if it exists
-                existing_point_meta = {}
-                point_meta_path = 'point_meta.json'
-                if os.path.exists(point_meta_path):
-                    try:
-                        with open(point_meta_path, 'r') as f:
-                            existing_point_meta = json.load(f)
-                        logger.info(f'Loaded existing point_meta from {point_meta_path}')
-                    except Exception as e:
-                        logger.warning(f'Failed to load existing point_meta: {e}, starting fresh')
-                        existing_point_meta = {}
-                
-                # Prepare data for point_meta.json based on transition type
+                # Save to point_meta.json: a transition sets both points, a single mood only
+                # the start point, keeping an existing end point (or using the start as end)
+                start = (coordinates['start_valence'], coordinates['start_energy'])
                 if is_transition:
-                    # For mood transition, update both start and end
-                    point_meta_data = {
-                        "start": {
-                            "x": coordinates['start_valence'],
-                            "y": coordinates['start_energy'],
-                            "type": "start"
-                        },
-                        "end": {
-                            "x": coordinates['end_valence'],
-                            "y": coordinates['end_energy'],
-                            "type": "end"
-                        }
-                    }
                     logger.info('Mood transition detected: updating both start and end points')
+                    point_meta_data = self.mood_state.update(start=start, end=(coordinates['end_valence'], coordinates['end_energy']))
+                elif self.mood_state.get()['end']:
+                    logger.info('Single mood detected: updating start point, keeping existing end point')
+                    point_meta_data = self.mood_state.update(start=start)
                 else:
-                    # For single mood, only update start point, keep existing end if available
-                    point_meta_data = {
-                        "start": {
-                            "x": coordinates['start_valence'],
-                            "y": coordinates['start_energy'],
-                            "type": "start"
-                        }
-                    }
-                    
-                    # Keep existing end point if it exists
-                    if 'end' in existing_point_meta:
-                        point_meta_data["end"] = existing_point_meta["end"]
-                        logger.info('Single mood detected: updating start point, keeping existing end point')
-                    else:
-                        # If no existing end point, set it same as start
-                        point_meta_data["end"] = {
-                            "x": coordinates['start_valence'],
-                            "y": coordinates['start_energy'],
-                            "type": "end"
-                        }
-                        logger.info('Single mood detected: setting both start and end to same point')
-                
-                logger.info(f'Point meta data prepared: {point_meta_data}')
-                # Save to point_meta.json
-                with open(point_meta_path, 'w') as f:
-                    json.dump(point_meta_data, f, indent=2)
-                
-                logger.info(f'Successfully saved mood coordinates to {point_meta_path}')
+                    logger.info('Single mood detected: setting both start and end to same point')
+                    point_meta_data = self.mood_state.update(start=start, end=start)
+                logger.info(f'Point meta data saved: {point_meta_data}')
+                logger.info(f'Successfully saved mood coordinates to {self.mood_state.path}')
                 
                 if is_transition:
                     result = {
@@ -0,0 +1,149 @@
+"""
+Mood Index Class
+Uniform-grid spatial index over tracks in the [0,1]² valence/energy plane
+"""
+
+import math
+from typing import Sequence, Tuple
+import numpy as np
+
+
+class MoodIndex:
+    """
+    Mood Index Class
+
+    Points are bucketed into a resolution x resolution grid stored CSR-style: point indices
+    sorted by cell plus per-cell offsets. A query only touches the cells overlapping its
+    bounding box, one contiguous slice per grid row, and then filters those candidates
+    exactly with vectorised NumPy. Returned indices refer to rows of the points array.
+    """
+
+    def __init__(self, points, resolution: int = 32):
+        """
+        Args:
+            points: (n, 2) array-like of (valence, energy)
+            resolution: Grid cells per axis
+        """
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.resolution = resolution
+        cells = self._cell(self.points)
+        flat = cells[:, 1] * resolution + cells[:, 0]
+        self.order = np.argsort(flat, kind='stable')
+        self.offsets = np.searchsorted(flat[self.order], np.arange(resolution * resolution + 1))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _cell(self, values) -> np.ndarray:
+        """Grid cell of each value, values outside [0,1] go to the border cells"""
+        return np.clip(np.floor(np.asarray(values) * self.resolution), 0, self.resolution - 1).astype(np.int64)
+
+    def _candidates(self, valence_min: float, valence_max: float, energy_min: float, energy_max: float) -> np.ndarray:
+        """Indices of the points in all cells overlapping the box"""
+        if len(self.points) == 0 or valence_min > valence_max or energy_min > energy_max:
+            return np.empty(0, dtype=np.int64)
+        x0, y0 = self._cell([valence_min, energy_min])
+        x1, y1 = self._cell([valence_max, energy_max])
+        rows = [
+            self.order[self.offsets[y * self.resolution + x0]:self.offsets[y * self.resolution + x1 + 1]]
+            for y in range(y0, y1 + 1)
+        ]
+        return np.concatenate(rows)
+
+    def rect(self, valence_range: Sequence[float], energy_range: Sequence[float]) -> np.ndarray:
+        """Indices of the points inside the (inclusive) valence/energy box, ascending"""
+        candidates = self._candidates(valence_range[0], valence_range[1], energy_range[0], energy_range[1])
+        points = self.points[candidates]
+        mask = (
+            (points[:, 0] >= valence_range[0]) & (points[:, 0] <= valence_range[1])
+            & (points[:, 1] >= energy_range[0]) & (points[:, 1] <= energy_range[1])
+        )
+        return np.sort(candidates[mask])
+
+    def radius(self, center: Sequence[float], radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, distances) of the points within radius of center, nearest first"""
+        candidates = self._candidates(center[0] - radius, center[0] + radius, center[1] - radius, center[1] + radius)
+        distances = np.hypot(self.points[candidates, 0] - center[0], self.points[candidates, 1] - center[1])
+        mask = distances <= radius
+        candidates, distances = candidates[mask], distances[mask]
+        order = np.lexsort((candidates, distances))
+        return candidates[order], distances[order]
+
+    def nearest(self, center: Sequence[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, distances) of the k points nearest to center, nearest first"""
+        k = min(k, len(self.points))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # grow the search radius until it holds k points; points outside [0,1]² are rare, the
+        # last step covers them by searching everything
+        radius = 1.0 / self.resolution
+        while radius < math.sqrt(2):
+            indices, distances = self.radius(center, radius)
+            if len(indices) >= k:
+                return indices[:k], distances[:k]
+            radius *= 2
+        distances = np.hypot(self.points[:, 0] - center[0], self.points[:, 1] - center[1])
+        indices = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+        order = np.lexsort((indices, distances[indices]))
+        return indices[order], distances[indices][order]
+
+    def corridor(self, start: Sequence[float], end: Sequence[float], width: float = math.inf, ordered: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Points whose projection falls on the start -> end segment and that lie within width of it
+
+        Returns:
+            (indices, offsets): offsets are the distances along the segment from start,
+            indices are ordered by offset (in grid order with ordered=False, for callers that
+            sort the result themselves)
+        """
+        start = np.asarray(start, dtype=np.float64)
+        end = np.asarray(end, dtype=np.float64)
+        length = float(np.linalg.norm(end - start))
+        if length == 0:
+            indices, _ = self.radius(start, width if math.isfinite(width) else math.sqrt(2))
+            return indices, np.zeros(len(indices))
+        direction = (end - start) / length
+        if math.isfinite(width):
+            candidates = self._candidates(
+                min(start[0], end[0]) - width, max(start[0], end[0]) + width,
+                min(start[1], end[1]) - width, max(start[1], end[1]) + width,
+            )
+            relative = self.points[candidates] - start
+        else:
+            # an unbounded corridor can lie anywhere in the plane, no cell can be skipped
+            candidates = np.arange(len(self.points))
+            relative = self.points - start
+        offsets = relative @ direction
+        mask = (offsets >= 0) & (offsets <= length)
+        if math.isfinite(width):
+            mask &= np.abs(relative[:, 0] * direction[1] - relative[:, 1] * direction[0]) <= width
+        candidates, offsets = candidates[mask], offsets[mask]
+        if not ordered:
+            return candidates, offsets
+        order = np.lexsort((candidates, offsets))
+        return candidates[order], offsets[order]
+
+    def polygon(self, vertices: Sequence[Sequence[float]]) -> np.ndarray:
+        """Indices of the points inside a simple polygon (even-odd rule), ascending"""
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+        if len(vertices) < 3:
+            return np.empty(0, dtype=np.int64)
+        (valence_min, energy_min), (valence_max, energy_max) = vertices.min(axis=0), vertices.max(axis=0)
+        candidates = self._candidates(valence_min, valence_max, energy_min, energy_max)
+        return np.sort(candidates[points_in_polygon(self.points[candidates], vertices)])
+
+
+def points_in_polygon(points, vertices) -> np.ndarray:
+    """Boolean mask of the (n, 2) points inside a simple polygon (even-odd rule)"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 2)
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    if len(vertices) < 3:
+        return inside
+    for (x0, y0), (x1, y1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        crosses = (y0 > y) != (y1 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crosses & (x < x_cross)
+    return inside
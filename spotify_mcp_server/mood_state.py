@@ -0,0 +1,128 @@
+"""
+Mood State Class
+In-memory copy of point_meta.json, the start / end mood points shared with the front-end
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MoodState:
+    """
+    Mood State Class
+
+    The points are parsed once and kept in memory. The file is re-read only when its
+    (mtime, size) changed, which is checked at most every check_interval seconds, so the
+    recommend tools do no file I/O on the hot path. A file that fails to parse (e.g. written
+    non-atomically by another process) keeps the last good points. Writes go to a temp file
+    that is renamed over point_meta.json, so readers never see a half-written file.
+    """
+
+    def __init__(self, path: str = 'point_meta.json', check_interval: float = 0.5):
+        """
+        Args:
+            path: point_meta.json location (the Next.js app writes it in its working directory)
+            check_interval: Seconds between two checks of the file's mtime
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._points: Dict[str, Any] = {'start': None, 'end': None}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        signature = self._stat()
+        if signature == self._signature:
+            return
+        if signature is None:
+            self._points, self._signature = {'start': None, 'end': None}, None
+            return
+        try:
+            with open(self.path, 'r') as f:
+                points = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load {self.path}: {e}, keeping the previous points')
+            return
+        self._points = {'start': points.get('start'), 'end': points.get('end')}
+        self._signature = signature
+        self.reloads += 1
+
+    def get(self) -> Dict[str, Any]:
+        """{'start': {'x', 'y', ...} or None, 'end': ...}"""
+        with self._lock:
+            self._refresh()
+            return dict(self._points)
+
+    def trajectory(self) -> Optional[Tuple[Tuple[float, float], Tuple[float, float]]]:
+        """
+        Start -> end mood journey drawn on the front-end plane
+
+        Returns:
+            ((start_valence, start_energy), (end_valence, end_energy)), or None without both points;
+            unset coordinates default to the center (0.5, 0.5)
+        """
+        points = self.get()
+        if not (points['start'] and points['end']):
+            return None
+        trajectory = []
+        for point in (points['start'], points['end']):
+            if point.get('x') is None or point.get('y') is None:
+                trajectory.append((0.5, 0.5))
+            else:
+                trajectory.append((point['x'], point['y']))
+        return tuple(trajectory)
+
+    def update(self, start: Optional[Tuple[float, float]] = None, end: Optional[Tuple[float, float]] = None, reset: bool = False) -> Dict[str, Any]:
+        """
+        Set the start and / or end point and write point_meta.json atomically
+
+        Args:
+            start: (valence, energy) of the start point, None keeps the current one
+            end: (valence, energy) of the end point, None keeps the current one
+            reset: Clear both points first
+
+        Returns:
+            The points now stored
+        """
+        with self._lock:
+            # merge into the latest file content, the front-end may have changed it
+            self._refresh(force=True)
+            points = {'start': None, 'end': None} if reset else dict(self._points)
+            for name, point in (('start', start), ('end', end)):
+                if point is not None:
+                    points[name] = {'x': point[0], 'y': point[1], 'type': name}
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix='.point_meta.', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(points, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._points, self._signature = points, self._stat()
+            return dict(points)
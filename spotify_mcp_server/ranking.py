@@ -0,0 +1,164 @@
+"""
+Candidate ranking stage shared by the recommend and recall tools
+Box filter, distance to the target, projection onto the start -> end direction and de-duplication
+in one vectorised NumPy pass over the (valence, energy) points of the candidates, plus an
+even-spacing sampler along the trajectory
+"""
+
+from typing import NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from mood_index import MoodIndex
+
+
+class RankedCandidates(NamedTuple):
+    """Ranked candidate rows; distances / projections are aligned with indices (NaN if unused)"""
+    indices: np.ndarray
+    distances: np.ndarray
+    projections: np.ndarray
+
+
+def rank_candidates(
+    points,
+    valence_range: Optional[Sequence[float]] = None,
+    energy_range: Optional[Sequence[float]] = None,
+    target_point: Optional[Sequence[float]] = None,
+    limit: int = 0,
+    trajectory: Optional[Tuple[Sequence[float], Sequence[float]]] = None,
+    exclude=None,
+    keys=None,
+    index: Optional[MoodIndex] = None,
+) -> RankedCandidates:
+    """
+    Rank candidates in one pass.
+
+    1. Drop excluded rows and repeated keys (first occurrence wins).
+    2. Trajectory: with (start, end), only rows projecting onto the segment are kept, and they
+       are ordered along it (ties by distance). A zero-length trajectory is ignored.
+    3. Region: if the valence/energy box collapses to a single point, every row is kept and
+       ranked by distance to target_point. Otherwise the rows inside the box are kept, ranked
+       by distance to the box center; when fewer than limit are inside, the rows outside
+       nearest to the center fill up to limit. Without a box the input order is kept.
+
+    Args:
+        points: (n, 2) array of (valence, energy)
+        valence_range, energy_range: Target box, None for no box
+        target_point: Target of a collapsed box
+        limit: Number of tracks wanted, decides whether the box is widened
+        trajectory: (start, end) points of the mood journey, None for no projection
+        exclude: Boolean mask of rows to drop (e.g. tracks already in the playlist)
+        keys: Row keys to de-duplicate on (e.g. interned ids), None if rows are unique
+        index: MoodIndex over points (e.g. TrackTable.mood_index) for the trajectory and box
+            prefilters, built here when needed and not given
+
+    Returns:
+        RankedCandidates: row indices in rank order with their distances and projections
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    keep = np.ones(len(points), dtype=bool)
+    if exclude is not None:
+        keep &= ~np.asarray(exclude, dtype=bool)
+    if keys is not None:
+        _, first = np.unique(np.asarray(keys), return_index=True)
+        unique = np.zeros(len(points), dtype=bool)
+        unique[first] = True
+        keep &= unique
+
+    def mood_index() -> MoodIndex:
+        nonlocal index
+        if index is None:
+            index = MoodIndex(points)
+        return index
+
+    projections = np.full(len(points), np.nan)
+    if trajectory is not None:
+        start, end = (np.asarray(point, dtype=np.float64) for point in trajectory)
+        if float(np.linalg.norm(end - start)) > 0:
+            on_segment, offsets = mood_index().corridor(start, end, ordered=False)
+            projections[on_segment] = offsets
+            keep &= ~np.isnan(projections)
+
+    distances = np.full(len(points), np.nan)
+    if valence_range is not None and energy_range is not None:
+        is_point = valence_range[0] == valence_range[1] and energy_range[0] == energy_range[1]
+        if is_point:
+            center = np.asarray(target_point if target_point is not None else (valence_range[0], energy_range[0]), dtype=np.float64)
+        else:
+            center = np.array([(valence_range[0] + valence_range[1]) / 2, (energy_range[0] + energy_range[1]) / 2])
+        distances = np.hypot(points[:, 0] - center[0], points[:, 1] - center[1])
+        if not is_point:
+            in_box = np.zeros(len(points), dtype=bool)
+            in_box[mood_index().rect(valence_range, energy_range)] = True
+            in_box &= keep
+            missing = limit - np.count_nonzero(in_box)
+            outside = np.flatnonzero(keep & ~in_box)
+            if missing > 0 and len(outside) > missing:
+                # fill up with the rows outside the box nearest to its center
+                outside = outside[np.argpartition(distances[outside], missing - 1)[:missing]]
+            keep = in_box
+            if missing > 0:
+                keep[outside] = True
+
+    indices = np.flatnonzero(keep)
+    sort_keys = [indices]
+    if not np.isnan(distances).all():
+        sort_keys.insert(0, distances[indices])
+    if not np.isnan(projections).all():
+        sort_keys.insert(0, projections[indices])
+    if len(sort_keys) > 1:
+        # np.lexsort sorts by the last key first
+        indices = indices[np.lexsort(sort_keys[::-1])]
+    return RankedCandidates(indices, distances[indices], projections[indices])
+
+
+def sample_trajectory(
+    points,
+    indices,
+    trajectory: Optional[Tuple[Sequence[float], Sequence[float]]],
+    limit: int,
+) -> np.ndarray:
+    """
+    Pick limit rows spread evenly along the start -> end trajectory.
+
+    The segment is split into limit equal buckets by projection, and each bucket takes the row
+    closest to the line. An empty bucket borrows the next-best row of the nearest bucket that
+    still has one, so the result is short only when there are fewer than limit rows.
+    Without a usable trajectory the first limit indices are returned unchanged.
+
+    Args:
+        points: (n, 2) array of (valence, energy)
+        indices: Candidate rows, e.g. RankedCandidates.indices
+        trajectory: (start, end) points of the mood journey
+        limit: Number of rows to pick
+
+    Returns:
+        Picked row indices ordered along the trajectory
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    if trajectory is None or limit <= 0:
+        return indices[:max(limit, 0)]
+    start, end = (np.asarray(point, dtype=np.float64) for point in trajectory)
+    length = float(np.linalg.norm(end - start))
+    if length == 0:
+        return indices[:limit]
+    direction = (end - start) / length
+    relative = np.asarray(points, dtype=np.float64).reshape(-1, 2)[indices] - start
+    projections = relative @ direction
+    if len(indices) <= limit:
+        return indices[np.lexsort((indices, projections))]
+    perpendicular = np.abs(relative[:, 0] * direction[1] - relative[:, 1] * direction[0])
+    buckets = np.clip((projections / length * limit).astype(np.int64), 0, limit - 1)
+
+    # rows grouped by bucket, closest to the line first; rank = position inside the bucket
+    order = np.lexsort((indices, perpendicular, buckets))
+    counts = np.bincount(buckets, minlength=limit)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ranks = np.arange(len(order)) - np.repeat(starts, counts)
+
+    quotas = np.minimum(counts, 1)
+    for empty in np.flatnonzero(counts == 0):
+        # nearest bucket with a spare row, ties to the earlier one
+        spare = np.flatnonzero(counts > quotas)
+        donor = spare[np.argmin(np.abs(spare - empty))]
+        quotas[donor] += 1
+    picked = order[ranks < np.repeat(quotas, counts)]
+    return indices[picked[np.lexsort((indices[picked], projections[picked]))]]
@@ -0,0 +1,78 @@
+"""
+Reccobeats Client Class
+Async client for the Reccobeats API on a pooled httpx.AsyncClient
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+import httpx
+import logging
+from util.http_retry import get_json_with_retries
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ReccobeatsClient:
+    """Reccobeats Client Class"""
+
+    BASE_URL = "https://api.reccobeats.com/v1"
+
+    def __init__(self, timeout: float = 15.0, max_retries: int = 2, retry_delay: float = 0.5, max_connections: int = 10):
+        """
+        Initialize Reccobeats client
+
+        Args:
+            timeout: Per-request timeout in seconds
+            max_retries: Retries after the first attempt on timeouts / 5XX / 429
+            retry_delay: Seconds to wait between attempts
+            max_connections: Size of the keep-alive connection pool
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Pooled client of the running event loop, created on first use"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            # an httpx client cannot be shared across event loops (e.g. successive asyncio.run calls)
+            self._client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                timeout=self.timeout,
+                headers={'Accept': 'application/json'},
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def get(self, path: str, description: str = None) -> Dict[str, Any]:
+        """
+        GET a Reccobeats endpoint and decode the JSON body
+
+        Args:
+            path: Path (and query string) relative to BASE_URL, e.g. "/track?ids=..."
+            description: What is being fetched, used in log messages
+
+        Raises:
+            httpx.HTTPError: Request failed after retries
+            json.JSONDecodeError: Response is not valid JSON
+        """
+        return await get_json_with_retries(
+            self._get_client(),
+            path,
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay,
+            description=description or f"Reccobeats {path}",
+        )
+
+    async def aclose(self):
+        """Close the pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
@@ -0,0 +1,133 @@
+"""
+Resolution Cache Class
+Persistent cache of recalled track title (+ artist) -> resolved Spotify track, with negative caching
+"""
+
+import json
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+from util.sqlite_store import SQLiteStore
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(text: Optional[str]) -> str:
+    """Case-, accent-, punctuation- and whitespace-insensitive form of a title or artist name"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+def compact_track(track: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a Spotify track object the recall paths use"""
+    return {
+        'id': track['id'],
+        'name': track.get('name', ''),
+        'artists': [{'name': artist['name'], 'id': artist.get('id', '')} for artist in track.get('artists', [])],
+        'duration_ms': track.get('duration_ms', 0),
+        'popularity': track.get('popularity', 0),
+        'uri': track.get('uri', f"spotify:track:{track['id']}"),
+        'external_urls': track.get('external_urls', {}),
+    }
+
+
+class ResolutionCache(SQLiteStore):
+    """Resolution Cache Class"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS resolutions (
+        title_key TEXT NOT NULL,
+        artist_key TEXT NOT NULL,
+        spotify_id TEXT NOT NULL,
+        track TEXT NOT NULL,
+        resolved_at REAL NOT NULL,
+        PRIMARY KEY (title_key, artist_key)
+    );
+    CREATE TABLE IF NOT EXISTS negative_resolutions (
+        title_key TEXT NOT NULL,
+        artist_key TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (title_key, artist_key)
+    );
+    """
+    STATS_TABLE = 'resolutions'
+
+    def __init__(self, path: str, negative_ttl: float = 7 * 24 * 3600):
+        """
+        Args:
+            path: SQLite file path
+            negative_ttl: Seconds a "no track found" result is trusted before searching again
+        """
+        super().__init__(path)
+        self.negative_ttl = negative_ttl
+
+    @staticmethod
+    def make_key(title: str, artist: Optional[str] = None) -> Tuple[str, str]:
+        """Normalised (title, artist) cache key"""
+        return normalize_key(title), normalize_key(artist)
+
+    def get_many(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """
+        Look up cached resolutions
+
+        Returns:
+            Dict: key -> compact Spotify track for cached hits, key -> None for unexpired
+            negative entries; keys that must be searched are absent
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        wanted = set(keys)
+        cached = {}
+        now = self._now()
+        title_keys = list({title_key for title_key, _ in keys})
+        for chunk in self._chunks(title_keys):
+            placeholders = ', '.join('?' * len(chunk))
+            for title_key, artist_key, track in self._query(
+                f'SELECT title_key, artist_key, track FROM resolutions WHERE title_key IN ({placeholders})', chunk
+            ):
+                if (title_key, artist_key) in wanted:
+                    cached[(title_key, artist_key)] = json.loads(track)
+            for title_key, artist_key in self._query(
+                f'SELECT title_key, artist_key FROM negative_resolutions WHERE title_key IN ({placeholders}) AND expires_at > ?',
+                [*chunk, now],
+            ):
+                if (title_key, artist_key) in wanted and (title_key, artist_key) not in cached:
+                    cached[(title_key, artist_key)] = None
+        self.record(hits=len(cached), misses=len(keys) - len(cached))
+        return cached
+
+    def put_hits(self, resolved: List[Tuple[Tuple[str, str], Dict[str, Any]]]):
+        """Store (key, Spotify track) resolutions"""
+        now = self._now()
+        self._write_many(
+            'INSERT OR REPLACE INTO resolutions (title_key, artist_key, spotify_id, track, resolved_at) VALUES (?, ?, ?, ?, ?)',
+            ((*key, track['id'], json.dumps(compact_track(track)), now) for key, track in resolved),
+        )
+        self._write_many(
+            'DELETE FROM negative_resolutions WHERE title_key = ? AND artist_key = ?',
+            (key for key, _ in resolved),
+        )
+
+    def put_misses(self, keys: List[Tuple[str, str]]):
+        """Remember keys whose search returned no track, for negative_ttl seconds"""
+        expires_at = self._now() + self.negative_ttl
+        self._write_many(
+            'INSERT OR REPLACE INTO negative_resolutions (title_key, artist_key, expires_at) VALUES (?, ?, ?)',
+            ((*key, expires_at) for key in keys),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus positive and unexpired negative entry counts"""
+        stats = super().stats()
+        stats['negative_entries'] = self._query(
+            'SELECT COUNT(*) FROM negative_resolutions WHERE expires_at > ?', [self._now()]
+        )[0][0]
+        return stats
@@ -0,0 +1,71 @@
+"""
+Similar Artist Cache Class
+Persistent cache of Last.fm similar artists per (normalised artist name, limit), with TTL
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+import logging
+from util.sqlite_store import SQLiteStore
+from resolution_cache import normalize_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SimilarArtistCache(SQLiteStore):
+    """Similar Artist Cache Class"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS similar_artists (
+        artist_key TEXT NOT NULL,
+        result_limit INTEGER NOT NULL,
+        similar TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (artist_key, result_limit)
+    );
+    """
+    STATS_TABLE = 'similar_artists'
+
+    def __init__(self, path: str, ttl: float = 14 * 24 * 3600):
+        """
+        Args:
+            path: SQLite file path
+            ttl: Seconds a similar-artist list is trusted before Last.fm is asked again
+        """
+        super().__init__(path)
+        self.ttl = ttl
+
+    @staticmethod
+    def artist_key(artist_name: str) -> str:
+        """Normalised artist name"""
+        return normalize_key(artist_name)
+
+    def get_many(self, artist_keys: List[str], limit: int) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Look up unexpired similar-artist lists
+
+        Returns:
+            Dict: artist_key -> [(similar artist name, match weight)], missing keys are absent
+        """
+        artist_keys = list(dict.fromkeys(artist_keys))
+        cached = {}
+        for chunk in self._chunks(artist_keys):
+            placeholders = ', '.join('?' * len(chunk))
+            for artist_key, similar in self._query(
+                f'SELECT artist_key, similar FROM similar_artists '
+                f'WHERE artist_key IN ({placeholders}) AND result_limit = ? AND expires_at > ?',
+                [*chunk, limit, self._now()],
+            ):
+                cached[artist_key] = [(name, weight) for name, weight in json.loads(similar)]
+        self.record(hits=len(cached), misses=len(artist_keys) - len(cached))
+        return cached
+
+    def put_many(self, entries: Dict[str, List[Tuple[str, float]]], limit: int, ttl: Optional[float] = None):
+        """Store artist_key -> [(similar artist name, match weight)] lists"""
+        expires_at = self._now() + (self.ttl if ttl is None else ttl)
+        self._write_many(
+            'INSERT OR REPLACE INTO similar_artists (artist_key, result_limit, similar, expires_at) VALUES (?, ?, ?, ?)',
+            ((artist_key, limit, json.dumps(similar), expires_at) for artist_key, similar in entries.items()),
+        )
@@ -7,22 +7,35 @@ from math import log
 import os
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime
 import random
-import requests
 from tqdm import tqdm
 import httpx
 import asyncio
+import contextlib
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from util.third_party_crawler import crawl_music_map_artists, crawl_boil_the_frog_artists_and_tracks
+from util.http_retry import get_json_with_retries
 import json
 import logging
 from lastfm_client import LastfmClient
+from reccobeats_client import ReccobeatsClient
+from feature_store import FeatureStore
+from resolution_cache import ResolutionCache, compact_track
+from tivo_cache import TivoCache
+from library_mirror import LibraryMirror
+from track_table import TrackTable
+from util.sqlite_store import default_cache_path
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TIVO_API_BASE = 'https://tivomusicapi-staging-elb.digitalsmiths.net/sd/tivomusicapi/taps/v3'
+
 class SpotifyClient:
     """Spotify Client Class"""
     
@@ -102,6 +115,32 @@ class SpotifyClient:
                 "message": "Failed to get user profile"
             }
     
+    def refresh_access_token(self, min_lifetime: float = 600) -> Dict[str, Any]:
+        """Refresh the cached OAuth token ahead of time when it expires within min_lifetime seconds"""
+        try:
+            auth_manager = self.sp.auth_manager
+            token_info = auth_manager.validate_token(auth_manager.cache_handler.get_cached_token())
+            if token_info is None:
+                return {
+                    "success": False,
+                    "data": None,
+                    "message": "No cached token, authorize the app first"
+                }
+            refreshed = token_info["expires_at"] - time.time() < min_lifetime
+            if refreshed:
+                token_info = auth_manager.refresh_access_token(token_info["refresh_token"])
+            return {
+                "success": True,
+                "data": {"expires_at": token_info["expires_at"], "refreshed": refreshed},
+                "message": "Access token refreshed" if refreshed else "Access token still valid"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Failed to refresh access token"
+            }
+
     def get_current_playback(self) -> Dict[str, Any]:
         """Get current playback status"""
         try:
@@ -587,86 +626,233 @@ class SpotifyClient:
                 "message": f"Failed to get tracks for album {album_id}"
             }
         
-    async def get_tivo_artist_ids(self, artist_names: List[str], max_retries: int = 3, timeout: int = 30):
-        """Get tivo artist ids (async) with retry mechanism"""
-        artist_ids = []
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            for artist_name in tqdm(artist_names):
-                artist_name = artist_name.replace(' ', '+')
-                url = f'https://tivomusicapi-staging-elb.digitalsmiths.net/sd/tivomusicapi/taps/v3/search/artist?name={artist_name}&limit=1&includeAllFields=false';
-                retries = 0
-                success = False
-                while retries <= max_retries and not success:
-                    try:
-                        response = await client.get(url)
-                        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-                        data = response.json()
-                        logger.info(f'get tivo artist id for {artist_name}, response: {data}')
-                        if 'hits' in data and data['hits'] and len(data['hits']) > 0:
-                            tivo_artist_ids = data['hits'][0]['id']
-                            artist_ids.append(tivo_artist_ids)
-                            success = True
-                        else:
-                            success = True  # No artist found, but not an error
-                    except (httpx.TimeoutException, httpx.HTTPError) as e:
-                        retries += 1
-                        if retries > max_retries:
-                            logger.error(f"Failed to fetch artist {artist_name} after {max_retries} retries: {e}")
-                        else:
-                            logger.info(f"Retrying fetch for artist {artist_name} (attempt {retries}/{max_retries})...")
-                            await asyncio.sleep(1)  # Wait 1 second before retrying
+    @property
+    def tivo_cache(self) -> TivoCache:
+        """Persistent tivo lookup cache, opened on first use"""
+        if getattr(self, '_tivo_cache', None) is None:
+            self._tivo_cache = TivoCache(default_cache_path('tivo.sqlite3'))
+        return self._tivo_cache
+
+    async def _fetch_tivo_artist_id(self, client: httpx.AsyncClient, artist_name: str, max_retries: int = 3):
+        """
+        Resolve one artist name to its tivo artist id on a shared client.
+        Cached ids (and cached "not found") are returned without a request; if tivo fails,
+        an expired cache entry is used when there is one.
+
+        Returns:
+            (status, artist_id): status is 'found', 'not_found' or 'failed'
+        """
+        cache_key = self.tivo_cache.artist_key(artist_name)
+        cached, artist_id = self.tivo_cache.get('artist_id', cache_key)
+        if cached:
+            return ("found", artist_id) if artist_id else ("not_found", None)
+        query_name = artist_name.replace(' ', '+')
+        url = f'{TIVO_API_BASE}/search/artist?name={query_name}&limit=1&includeAllFields=false'
+        try:
+            data = await get_json_with_retries(client, url, max_retries=max_retries, description=f"artist {query_name}")
+        except httpx.HTTPError:
+            stale, artist_id = self.tivo_cache.get('artist_id', cache_key, allow_stale=True)
+            if stale and artist_id:
+                logger.warning(f"Tivo lookup failed for artist {artist_name}, using expired cached id")
+                return "found", artist_id
+            return "failed", None
+        logger.info(f'get tivo artist id for {query_name}, response: {data}')
+        if 'hits' in data and data['hits'] and len(data['hits']) > 0:
+            artist_id = data['hits'][0]['id']
+            self.tivo_cache.put('artist_id', cache_key, artist_id)
+            return "found", artist_id
+        self.tivo_cache.put('artist_id', cache_key, None, ttl=self.tivo_cache.ttls['artist_not_found'])
+        return "not_found", None  # No artist found, but not an error
+
+    async def get_tivo_artist_ids(self, artist_names: List[str], max_retries: int = 3, timeout: int = 30, max_concurrency: int = 5, client: httpx.AsyncClient = None):
+        """
+        Get tivo artist ids (async) with retry mechanism.
+
+        Lookups run concurrently on one shared client, at most max_concurrency at a time, and
+        each artist is retried independently. Ids are returned in the order of artist_names
+        (artists that were not found or failed are left out); a per-status summary of the last
+        call is kept in self.tivo_artist_lookup_report.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        progress = tqdm(total=len(artist_names), desc="Resolving tivo artists")
+
+        async def lookup(shared_client, artist_name):
+            async with semaphore:
+                outcome = await self._fetch_tivo_artist_id(shared_client, artist_name, max_retries=max_retries)
+            progress.update(1)
+            return outcome
+
+        async def lookup_all(shared_client):
+            return await asyncio.gather(*(lookup(shared_client, artist_name) for artist_name in artist_names))
+
+        try:
+            if client is not None:
+                outcomes = await lookup_all(client)
+            else:
+                limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+                async with httpx.AsyncClient(timeout=timeout, limits=limits) as shared_client:
+                    outcomes = await lookup_all(shared_client)
+        finally:
+            progress.close()
+
+        artist_ids = [artist_id for status, artist_id in outcomes if status == "found"]
+        report = {
+            "requested": len(artist_names),
+            "found": len(artist_ids),
+            "not_found": [name for name, (status, _) in zip(artist_names, outcomes) if status == "not_found"],
+            "failed": [name for name, (status, _) in zip(artist_names, outcomes) if status == "failed"],
+        }
+        self.tivo_artist_lookup_report = report
+        if report["failed"] or report["not_found"]:
+            logger.warning(
+                f"Resolved {report['found']}/{report['requested']} tivo artist ids "
+                f"(not found: {report['not_found']}, failed: {report['failed']})"
+            )
+        else:
+            logger.info(f"Resolved {report['found']}/{report['requested']} tivo artist ids")
         return artist_ids
     
-    async def get_tivo_artist_album_ids(self, artist_ids: List[str]) -> Set[str]:
-        """Get tivo album ids for a list of artist ids (async)"""
-        artist_album_dict = {}
-        async with httpx.AsyncClient() as client:
-            for artist_id in tqdm(artist_ids):
-                url = f'https://tivomusicapi-staging-elb.digitalsmiths.net/sd/tivomusicapi/taps/v3/lookup/discography?nameId={artist_id}&limit=10&includeAllFields=false';
-                response = await client.get(url)
-                data = response.json()
-                if data['hits'] and len(data['hits']) > 0:
-                    artist_album_dict[artist_id] = [hit['id'] for hit in data['hits'][:2]]  # Get first k albums for the artist
-                else:
-                    continue
-        return artist_album_dict
+    async def _fetch_tivo_cached(self, client: httpx.AsyncClient, kind: str, key: str, url: str, description: str, extract, max_retries: int = 3):
+        """
+        Cached tivo lookup: fresh cache entry, else request and extract (then store), else the
+        expired entry if tivo failed. Returns None when nothing could be obtained.
+        """
+        cached, value = self.tivo_cache.get(kind, key)
+        if cached:
+            return value
+        try:
+            data = await get_json_with_retries(client, url, max_retries=max_retries, description=description)
+        except httpx.HTTPError:
+            stale, value = self.tivo_cache.get(kind, key, allow_stale=True)
+            if stale:
+                logger.warning(f"Tivo lookup failed for {description}, using expired cache entry")
+                return value
+            return None
+        value = extract(data)
+        self.tivo_cache.put(kind, key, value)
+        return value
+
+    async def _fetch_tivo_album_ids(self, client: httpx.AsyncClient, artist_id: str, max_retries: int = 3) -> List[str]:
+        """Get the first tivo album ids of one artist on a shared client (cached), [] if none or failed"""
+        url = f'{TIVO_API_BASE}/lookup/discography?nameId={artist_id}&limit=10&includeAllFields=false'
+        album_ids = await self._fetch_tivo_cached(
+            client, 'album_ids', artist_id, url, f"discography of artist {artist_id}",
+            lambda data: [hit['id'] for hit in data.get('hits') or []],
+            max_retries=max_retries,
+        )
+        return (album_ids or [])[:2]  # Get first k albums for the artist
+
+    async def _fetch_tivo_album_tracks(self, client: httpx.AsyncClient, album_id: str, max_retries: int = 3) -> List[Dict[str, Any]]:
+        """Get (at most 10 random) tivo tracks of one album on a shared client, [] if none or failed.
+        The full track list is cached and sampled on every call."""
+        url = f'{TIVO_API_BASE}/lookup/album?albumId={album_id}&limit=10'
+        tracks = await self._fetch_tivo_cached(
+            client, 'album_tracks', album_id, url, f"tracks for album {album_id}",
+            lambda data: data['hits'][0].get('tracks', []) if data.get('hits') else [],
+            max_retries=max_retries,
+        )
+        if not tracks:
+            return []  # No tracks found, but not an error
+        if len(tracks) > 10:
+            return random.sample(tracks, 10)  # id, title, ...
+        return tracks
+
+    @staticmethod
+    def _tivo_http_client(timeout: int, max_connections: int) -> httpx.AsyncClient:
+        """Pooled client shared by all tivo requests of one call"""
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        return httpx.AsyncClient(timeout=timeout, limits=limits)
+
+    async def get_tivo_artist_album_ids(self, artist_ids: List[str], max_retries: int = 3, timeout: int = 30, max_concurrency: int = 5, client: httpx.AsyncClient = None) -> Dict[str, List[str]]:
+        """Get tivo album ids for a list of artist ids (async), concurrently and with retry mechanism"""
+        if client is None:
+            async with self._tivo_http_client(timeout, max_concurrency) as client:
+                return await self.get_tivo_artist_album_ids(artist_ids, max_retries=max_retries, max_concurrency=max_concurrency, client=client)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def lookup(artist_id):
+            async with semaphore:
+                return await self._fetch_tivo_album_ids(client, artist_id, max_retries=max_retries)
+
+        album_ids_per_artist = await asyncio.gather(*(lookup(artist_id) for artist_id in artist_ids))
+        return {artist_id: album_ids for artist_id, album_ids in zip(artist_ids, album_ids_per_artist) if album_ids}
     
-    async def get_tivo_tracks_in_albums(self, album_ids: List[str], max_retries: int = 3, timeout: int = 30):
-        """Get tivo track ids in a list of album ids (async) with retry mechanism"""
-        tivo_tracks = []
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            for album_id in tqdm(album_ids):
-                url = f'https://tivomusicapi-staging-elb.digitalsmiths.net/sd/tivomusicapi/taps/v3/lookup/album?albumId={album_id}&limit=10';
-                retries = 0
-                success = False
-                while retries <= max_retries and not success:
+    async def get_tivo_tracks_in_albums(self, album_ids: List[str], max_retries: int = 3, timeout: int = 30, max_concurrency: int = 8, client: httpx.AsyncClient = None):
+        """Get tivo track ids in a list of album ids (async), concurrently and with retry mechanism"""
+        if client is None:
+            async with self._tivo_http_client(timeout, max_concurrency) as client:
+                return await self.get_tivo_tracks_in_albums(album_ids, max_retries=max_retries, max_concurrency=max_concurrency, client=client)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def lookup(album_id):
+            async with semaphore:
+                return await self._fetch_tivo_album_tracks(client, album_id, max_retries=max_retries)
+
+        tracks_per_album = await asyncio.gather(*(lookup(album_id) for album_id in album_ids))
+        return [track for album_tracks in tracks_per_album for track in album_tracks]
+
+    async def get_tivo_tracks_in_artist_album_dict(self, artist_album_dict: Dict[str, List[str]], max_retries: int = 3, timeout: int = 30, max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """Get tivo track ids in artist album dict (async), all albums on one pooled client"""
+        album_ids = [album_id for album_ids in artist_album_dict.values() for album_id in album_ids]
+        return await self.get_tivo_tracks_in_albums(album_ids, max_retries=max_retries, timeout=timeout, max_concurrency=max_concurrency)
+
+    async def stream_tivo_tracks(self, artist_names: List[str], artist_concurrency: int = 5, discography_concurrency: int = 5, album_concurrency: int = 8, max_retries: int = 3, timeout: int = 30):
+        """
+        Pipelined artist name -> tivo artist id -> discography -> album tracks (async generator).
+
+        As soon as one artist's discography arrives its album lookups start, and the track list
+        of every album is yielded as soon as it is fetched. All stages share one pooled client
+        and each stage has its own concurrency limit. Closing the generator early cancels the
+        outstanding lookups.
+
+        Yields:
+            List[Dict]: tivo tracks of one album, dict_keys(['id', 'title', 'performers', ...]),
+            plus 'recall_artist', the artist name the album was found for
+        """
+        artist_semaphore = asyncio.Semaphore(artist_concurrency)
+        discography_semaphore = asyncio.Semaphore(discography_concurrency)
+        album_semaphore = asyncio.Semaphore(album_concurrency)
+        queue = asyncio.Queue()
+        done = object()
+        max_connections = artist_concurrency + discography_concurrency + album_concurrency
+
+        async with self._tivo_http_client(timeout, max_connections) as client:
+            async def album_stage(album_id, artist_name):
+                async with album_semaphore:
+                    tracks = await self._fetch_tivo_album_tracks(client, album_id, max_retries=max_retries)
+                if tracks:
+                    await queue.put([{**track, 'recall_artist': artist_name} for track in tracks])
+
+            async def artist_stage(artist_name):
+                async with artist_semaphore:
+                    status, artist_id = await self._fetch_tivo_artist_id(client, artist_name, max_retries=max_retries)
+                if status != "found":
+                    return
+                async with discography_semaphore:
+                    album_ids = await self._fetch_tivo_album_ids(client, artist_id, max_retries=max_retries)
+                await asyncio.gather(*(album_stage(album_id, artist_name) for album_id in album_ids))
+
+            async def run_pipeline():
+                try:
+                    await asyncio.gather(*(artist_stage(artist_name) for artist_name in artist_names))
+                finally:
+                    await queue.put(done)
+
+            pipeline = asyncio.create_task(run_pipeline())
+            try:
+                while True:
+                    tracks = await queue.get()
+                    if tracks is done:
+                        break
+                    yield tracks
+                await pipeline
+            finally:
+                if not pipeline.done():
+                    pipeline.cancel()
                     try:
-                        response = await client.get(url)
-                        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-                        data = response.json()
-                        if data['hits'] and len(data['hits']) > 0 and 'tracks' in data['hits'][0]:
-                            if len(data['hits'][0]['tracks']) > 10:
-                                tivo_tracks.extend(random.sample(data['hits'][0]['tracks'], 10))  # id, title, ...
-                            else:
-                                tivo_tracks.extend(data['hits'][0]['tracks'])
-                            success = True
-                        else:
-                            success = True  # No tracks found, but not an error
-                    except (httpx.TimeoutException, httpx.HTTPError) as e:
-                        retries += 1
-                        if retries > max_retries:
-                            logger.error(f"Failed to fetch tracks for album {album_id} after {max_retries} retries: {e}")
-                        else:
-                            logger.info(f"Retrying fetch for album {album_id} (attempt {retries}/{max_retries})...")
-                            await asyncio.sleep(1)  # Wait 1 second before retrying
-        return tivo_tracks
-
-    async def get_tivo_tracks_in_artist_album_dict(self, artist_album_dict: Dict[str, List[str]]) -> Set[str]:
-        """Get tivo track ids in artist album dict (async)"""
-        tivo_tracks = []
-        for artist_id, album_ids in tqdm(artist_album_dict.items()):
-            tivo_tracks.extend(await self.get_tivo_tracks_in_albums(album_ids))
-        return tivo_tracks
+                        await pipeline
+                    except asyncio.CancelledError:
+                        pass
 
     # def get_several_tracks(self, track_ids: List[str]) -> Dict[str, Any]:
     #     """
@@ -706,82 +892,276 @@ class SpotifyClient:
 
 
 class SpotifySuperClient(SpotifyClient):
-    def recall_artists(self, top_limit: int = 5, recent_limit: int = 5, playlist_limit: int = 5, album_limit: int = 5, saved_tracks_limit: int = 5) -> List[str]:
+    # Order in which recall_artists merges its sources; concurrent mode keeps the same order
+    RECALL_ARTIST_SOURCES = [
+        "recently_played",
+        "top_tracks",
+        "top_artists",
+        "followed_artists",
+        "playlists",
+        "saved_albums",
+        "saved_tracks",
+    ]
+    # Sources read from the local library mirror instead of Spotify
+    LIBRARY_SOURCES = ("playlists", "saved_albums", "saved_tracks")
+    # Seconds before recall syncs the library mirror again
+    LIBRARY_SYNC_INTERVAL = 300
+    # Held while a library sync runs (the candidate pool and recall_artists both start one)
+    _library_sync_lock = threading.Lock()
+
+    @property
+    def reccobeats(self) -> ReccobeatsClient:
+        """Shared async Reccobeats client, created on first use"""
+        if getattr(self, '_reccobeats_client', None) is None:
+            self._reccobeats_client = ReccobeatsClient()
+        return self._reccobeats_client
+
+    @property
+    def resolution_cache(self) -> ResolutionCache:
+        """Persistent title -> Spotify track resolution cache, opened on first use"""
+        if getattr(self, '_resolution_cache', None) is None:
+            self._resolution_cache = ResolutionCache(default_cache_path('resolutions.sqlite3'))
+        return self._resolution_cache
+
+    @property
+    def feature_store(self) -> FeatureStore:
+        """Persistent audio-feature store, opened on first use"""
+        if getattr(self, '_feature_store', None) is None:
+            self._feature_store = FeatureStore(default_cache_path('features.sqlite3'))
+        return self._feature_store
+
+    @property
+    def library_mirror(self) -> LibraryMirror:
+        """Local mirror of the user's library, opened on first use"""
+        if getattr(self, '_library_mirror', None) is None:
+            self._library_mirror = LibraryMirror(default_cache_path('library.sqlite3'))
+        return self._library_mirror
+
+    @staticmethod
+    def _fetch_pages(fetch, page_size: int, stop=None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Page through a Spotify listing, fetch(limit, offset) returning the usual envelope.
+        Paging ends after the last page or at the first item for which stop(item) is true
+        (that item is not returned). Returns None if any page failed.
+        """
+        items = []
+        offset = 0
+        while True:
+            result = fetch(page_size, offset)
+            if not result["success"]:
+                logger.warning(f"Library sync page at offset {offset} failed: {result.get('error')}")
+                return None
+            for item in result["data"]["items"]:
+                if stop is not None and stop(item):
+                    return items
+                items.append(item)
+            if not result["data"].get("next"):
+                return items
+            offset += page_size
+
+    def _sync_playlists(self, report: Dict[str, Any], max_workers: int):
+        """Re-read only the playlists whose snapshot_id changed, forget deleted ones"""
+        playlists = self._fetch_pages(lambda limit, offset: self.get_user_playlists(limit=limit, offset=offset), 50)
+        if playlists is None:
+            report["errors"].append("playlists")
+            return
+        snapshots = self.library_mirror.playlist_snapshots()
+        changed = [playlist for playlist in playlists if snapshots.get(playlist["id"]) != playlist["snapshot_id"]]
+
+        def sync_playlist(playlist):
+            items = self._fetch_pages(
+                lambda limit, offset: self.get_playlist_tracks(playlist["id"], limit=limit, offset=offset), 100
+            )
+            if items is None:
+                report["errors"].append(f"playlist:{playlist['id']}")
+                return
+            # local files and unavailable tracks have no id
+            tracks = [item["track"] for item in items if item.get("track") and item["track"].get("id")]
+            self.library_mirror.replace_playlist(playlist["id"], playlist.get("name", ""), playlist["snapshot_id"], tracks)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="library-sync") as pool:
+            list(pool.map(sync_playlist, changed))
+        removed = set(snapshots) - {playlist["id"] for playlist in playlists}
+        self.library_mirror.remove_playlists(list(removed))
+        report["playlists_changed"] = len(changed)
+        report["playlists_unchanged"] = len(playlists) - len(changed)
+        report["playlists_removed"] = len(removed)
+
+    def _sync_saved(self, report: Dict[str, Any], table: str, item_key: str, fetch, full: bool):
+        """Page saved tracks / albums (newest first) until the first item the mirror already has"""
+        latest = None if full else self.library_mirror.latest_added_at(table)
+
+        def known(item):
+            return latest is not None and (
+                item["added_at"] < latest or self.library_mirror.has_saved(table, item[item_key]["id"])
+            )
+
+        items = self._fetch_pages(fetch, 50, stop=known)
+        if items is None:
+            # a partial page run would leave a gap behind the newest added_at, store nothing
+            report["errors"].append(table)
+            return
+        self.library_mirror.add_saved(table, [(item["added_at"], item[item_key]) for item in items], replace=full)
+        report[f"{table}_added"] = len(items)
+
+    def sync_library(self, full: bool = False, force: bool = False, max_workers: int = 8) -> Dict[str, Any]:
+        """
+        Incrementally sync the local library mirror.
+
+        Playlists whose snapshot_id is unchanged are skipped, saved tracks and albums are paged
+        only until the first item already mirrored. Unless force/full is set, a sync within
+        LIBRARY_SYNC_INTERVAL seconds of the previous one is skipped. full=True re-reads saved
+        tracks and albums completely (picks up un-saved items). A call made while another sync
+        is running is skipped rather than queued. The report of the last call is kept in
+        self.library_sync_report.
+        """
+        if not self._library_sync_lock.acquire(blocking=False):
+            return {"skipped": True, "in_progress": True}
+        try:
+            return self._sync_library(full, force, max_workers)
+        finally:
+            self._library_sync_lock.release()
+
+    def _sync_library(self, full: bool, force: bool, max_workers: int) -> Dict[str, Any]:
+        last_synced = self.library_mirror.last_synced()
+        if not (force or full) and last_synced is not None and time.time() - last_synced < self.LIBRARY_SYNC_INTERVAL:
+            return {"skipped": True, "last_synced": last_synced}
+        start = time.perf_counter()
+        report = {"skipped": False, "errors": []}
+        self._sync_playlists(report, max_workers)
+        self._sync_saved(report, "saved_tracks", "track", lambda limit, offset: self.get_saved_tracks(limit=limit, offset=offset), full)
+        self._sync_saved(report, "saved_albums", "album", lambda limit, offset: self.get_saved_albums(limit=limit, offset=offset), full)
+        if not report["errors"]:
+            self.library_mirror.mark_synced()
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        self.library_sync_report = report
+        logger.info(f"Library sync: {report}")
+        return report
+
+    def _recall_artist_requests(self, top_limit: int, recent_limit: int) -> Dict[str, Any]:
+        """Independent Spotify requests used by recall_artists, keyed by source name"""
+        return {
+            "recently_played": lambda: self.get_recently_played(limit=recent_limit),
+            "top_tracks": lambda: self.get_top_tracks(time_range="long_term", limit=top_limit),
+            "top_artists": lambda: self.get_top_artists(time_range="long_term", limit=top_limit),
+            "followed_artists": lambda: self.get_followed_artists(limit=3, after=None),
+            "playlists": lambda: self.get_user_playlists(limit=3, offset=0),
+            "saved_albums": lambda: self.get_saved_albums(limit=3, offset=0),
+            "saved_tracks": lambda: self.get_saved_tracks(limit=3, offset=0),
+        }
+
+    @staticmethod
+    def _extract_recall_artists(source: str, result: Dict[str, Any]) -> List[tuple]:
+        """Extract (artist_id, artist_name) pairs from one recall source result"""
+        pairs = []
+        if not result["success"]:
+            return pairs
+        if source in ("recently_played", "saved_tracks", "playlist_tracks"):
+            for item in result["data"]["items"]:
+                for artist in item["track"]["artists"]:
+                    pairs.append((artist["id"], artist["name"]))
+        elif source == "top_tracks":
+            for track in result["data"]["items"]:
+                for artist in track["artists"]:
+                    pairs.append((artist["id"], artist["name"]))
+        elif source == "top_artists":
+            for artist in result["data"]["items"]:
+                pairs.append((artist["id"], artist["name"]))
+        elif source == "followed_artists":
+            for artist in result["data"]["artists"]["items"]:
+                pairs.append((artist["id"], artist["name"]))
+        elif source == "saved_albums":
+            for item in result["data"]["items"]:
+                for artist in item["album"]["artists"]:
+                    pairs.append((artist["id"], artist["name"]))
+        return pairs
+
+    @staticmethod
+    def _timed_call(latency: Dict[str, float], source: str, fetch):
+        """Run fetch() and record its wall time (seconds) under source"""
+        start = time.perf_counter()
+        try:
+            return fetch()
+        finally:
+            latency[source] = time.perf_counter() - start
+
+    def _fetch_recall_sources(self, requests_by_source: Dict[str, Any], latency: Dict[str, float]):
+        """Fetch recall sources one after another"""
+        results = {}
+        for source, fetch in requests_by_source.items():
+            results[source] = self._timed_call(latency, source, fetch)
+        playlist_tracks = []
+        if "playlists" in results and results["playlists"]["success"]:
+            for playlist in results["playlists"]["data"]["items"]:
+                playlist_tracks.append(self._timed_call(
+                    latency, f"playlist_tracks:{playlist['id']}",
+                    lambda playlist_id=playlist["id"]: self.get_playlist_tracks(playlist_id, limit=3, offset=0)
+                ))
+        return results, playlist_tracks
+
+    def _fetch_recall_sources_concurrently(self, requests_by_source: Dict[str, Any], latency: Dict[str, float], max_workers: int):
+        """Fetch recall sources in parallel on a bounded thread pool (spotipy is blocking)"""
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recall-artists") as pool:
+            futures = {
+                source: pool.submit(self._timed_call, latency, source, fetch)
+                for source, fetch in requests_by_source.items()
+            }
+            # playlist tracks depend on the playlist listing, queue them as soon as it arrives
+            playlists = futures["playlists"].result() if "playlists" in futures else None
+            playlist_futures = []
+            if playlists and playlists["success"]:
+                for playlist in playlists["data"]["items"]:
+                    playlist_futures.append(pool.submit(
+                        self._timed_call, latency, f"playlist_tracks:{playlist['id']}",
+                        lambda playlist_id=playlist["id"]: self.get_playlist_tracks(playlist_id, limit=3, offset=0)
+                    ))
+            results = {source: future.result() for source, future in futures.items()}
+            playlist_tracks = [future.result() for future in playlist_futures]
+        return results, playlist_tracks
+
+    def recall_artists(self, top_limit: int = 5, recent_limit: int = 5, playlist_limit: int = 5, album_limit: int = 5, saved_tracks_limit: int = 5, concurrent: bool = False, max_workers: int = 8, use_library_mirror: bool = True) -> List[str]:
         """
         Maximize recall of user-related artist ids, including followed artists, all playlists, all saved albums, all saved tracks, top, recently played, etc.
+
+        With concurrent=True the source requests are issued in parallel on a pool of at most
+        max_workers threads. Results are merged in the same order as the sequential mode, and
+        the per-source latency of the last call is kept in self.recall_artists_latency.
+
+        With use_library_mirror=True playlists, saved albums and saved tracks are read from the
+        local library mirror (synced incrementally alongside the other requests), taking the
+        playlist_limit / album_limit / saved_tracks_limit most frequent artists of each.
         """
+        requests_by_source = self._recall_artist_requests(top_limit=top_limit, recent_limit=recent_limit)
+        if use_library_mirror:
+            for source in self.LIBRARY_SOURCES:
+                requests_by_source.pop(source)
+            requests_by_source["library_sync"] = self.sync_library
+        library_limits = {"playlists": playlist_limit, "saved_albums": album_limit, "saved_tracks": saved_tracks_limit}
+        latency = {}
+        recall_start = time.perf_counter()
+        if concurrent:
+            results, playlist_tracks = self._fetch_recall_sources_concurrently(requests_by_source, latency, max_workers)
+        else:
+            results, playlist_tracks = self._fetch_recall_sources(requests_by_source, latency)
+        latency["total"] = time.perf_counter() - recall_start
+        self.recall_artists_latency = latency
+        logger.info('recall_artists latency (s, concurrent=%s): %s', concurrent, {k: round(v, 3) for k, v in latency.items()})
+        logger.info('top_artists: %s', results["top_artists"])
+
+        # 1. recently played, 2. top tracks, 3. top artists, 4. follow artists,
+        # 5. all artist of playlist, 6. artist of saved albums, 7. artists of saved tracks
         artist_ids = []
         artist_names = []
-        # 1. recently played
-        recent = self.get_recently_played(limit=recent_limit)
-        if recent["success"]:
-            for item in recent["data"]["items"]:
-                for artist in item["track"]["artists"]:
-                    artist_ids.append(artist["id"])
-                    artist_names.append(artist["name"])
-
-        # 2. top tracks
-        top_tracks = self.get_top_tracks(time_range="long_term", limit=top_limit)
-        if top_tracks["success"]:
-            for track in top_tracks["data"]["items"]:
-                for artist in track["artists"]:
-                    artist_ids.append(artist["id"])
-                    artist_names.append(artist["name"])
-
-        # 3. top artists
-        top_artists = self.get_top_artists(time_range="long_term", limit=top_limit)
-        logger.info('top_artists: %s', top_artists)
-        if top_artists["success"]:
-            for artist in top_artists["data"]["items"]:
-                artist_ids.append(artist["id"])
-                artist_names.append(artist["name"])
-
-        # 4. follow artists
-        after = None
-        followed = self.get_followed_artists(limit=3, after=after)
-        if followed["success"]:
-            items = followed["data"]["artists"]["items"]
-            for artist in items:
-                artist_ids.append(artist["id"])
-                artist_names.append(artist["name"])
-
-        # 5. all artist of playlist
-        offset = 0
-        playlists = self.get_user_playlists(limit=3, offset=offset)
-        if playlists["success"]:
-            items = playlists["data"]["items"]
-            for playlist in items:
-                track_offset = 0
-                tracks_result = self.get_playlist_tracks(playlist["id"], limit=3, offset=track_offset)
-                if tracks_result["success"]:
-                    track_items = tracks_result["data"]["items"]
-                    for item in track_items:
-                        track = item["track"]
-                        for artist in track["artists"]:
-                            artist_ids.append(artist["id"])
-                            artist_names.append(artist["name"])
-
-        # 6. artist of saved albums
-        offset = 0
-        saved_albums = self.get_saved_albums(limit=3, offset=offset)
-        if saved_albums["success"]:
-            items = saved_albums["data"]["items"]
-            for item in items:
-                album = item["album"]
-                for artist in album["artists"]:
-                    artist_ids.append(artist["id"])
-                    artist_names.append(artist["name"])
-
-        # 7. artists of saved tracks
-        offset = 0
-        saved_tracks = self.get_saved_tracks(limit=3, offset=offset)
-        if saved_tracks["success"]:
-            items = saved_tracks["data"]["items"]
-            for item in items:
-                track = item["track"]
-                for artist in track["artists"]:
-                    artist_ids.append(artist["id"])
-                    artist_names.append(artist["name"])
+        for source in self.RECALL_ARTIST_SOURCES:
+            if use_library_mirror and source in self.LIBRARY_SOURCES:
+                pairs = self.library_mirror.artists(source, limit=library_limits[source])
+            elif source == "playlists":
+                pairs = [pair for tracks_result in playlist_tracks for pair in self._extract_recall_artists("playlist_tracks", tracks_result)]
+            else:
+                pairs = self._extract_recall_artists(source, results[source])
+            for artist_id, artist_name in pairs:
+                artist_ids.append(artist_id)
+                artist_names.append(artist_name)
 
         # 8. third-party crawler to get artists
         # e.g. crawl_music_map_artists, crawl_boil_the_frog_artists_and_tracks
@@ -828,32 +1208,242 @@ class SpotifySuperClient(SpotifyClient):
     #         #             track_set.update(album_tracks["data"]["items"])
     #     return track_set
 
-    async def recall_all_tracks(self, lastfm_client: LastfmClient = None) -> List[Dict[str, Any]]:
+    async def search_tracks_batch(self, queries: List[str], limit: int = 1, max_concurrency: int = 5, semaphore: asyncio.Semaphore = None, artists: List[str] = None) -> Dict[str, Any]:
         """
-        Comprehensive recall of tracks, returning detailed track information.
+        Resolve many track queries (e.g. tivo titles) to Spotify tracks concurrently.
+
+        Identical (query, artist) pairs are searched only once. The blocking spotipy searches
+        run off the event loop, at most max_concurrency at a time to stay clear of Spotify rate
+        limits. Results come back in the order of queries, each with status 'hit', 'miss' (no
+        track found) or 'error' (search failed) and the first matching track (or None), always
+        as compact_track (no album), whether it was searched or cached. Pass a shared semaphore
+        to bound several concurrent batches together.
+
+        artists, if given, is parallel to queries; a query with an artist is searched as
+        "track:<query> artist:<artist>". For single-track resolution (limit=1) the normalised
+        (query, artist) pair is looked up in the persistent resolution cache first; misses are
+        negatively cached for a while so dead titles are not searched again on every call.
+        """
+        artists = artists if artists is not None else [None] * len(queries)
+        use_cache = limit == 1
+        cache_keys = [ResolutionCache.make_key(query, artist) for query, artist in zip(queries, artists)]
+        cached = self.resolution_cache.get_many(cache_keys) if use_cache else {}
+        search_queries = [f"track:{query} artist:{artist}" if artist else query for query, artist in zip(queries, artists)]
+        unique_queries = list(dict.fromkeys(
+            search_query for search_query, key in zip(search_queries, cache_keys) if key not in cached
+        ))
+        semaphore = semaphore or asyncio.Semaphore(max_concurrency)
+        progress = tqdm(total=len(unique_queries), desc="Searching tracks")
+
+        async def search(search_query):
+            async with semaphore:
+                result = await asyncio.to_thread(self.search_tracks, search_query, limit)
+            progress.update(1)
+            if not result['success']:
+                return {'status': 'error', 'track': None, 'message': result['message']}
+            items = result['data']['tracks']['items']
+            if not items:
+                return {'status': 'miss', 'track': None, 'message': result['message']}
+            return {'status': 'hit', 'track': compact_track(items[0]), 'message': result['message']}
+
+        try:
+            unique_results = await asyncio.gather(*(search(search_query) for search_query in unique_queries))
+        finally:
+            progress.close()
+        result_by_query = dict(zip(unique_queries, unique_results))
+
+        results = []
+        new_hits, new_misses = {}, set()
+        for query, search_query, key in zip(queries, search_queries, cache_keys):
+            if key in cached:
+                track = cached[key]
+                results.append({
+                    'query': query,
+                    'status': 'hit' if track else 'miss',
+                    'track': track,
+                    'message': "Resolved from cache" if track else "No track found (cached)",
+                })
+                continue
+            result = {'query': query, **result_by_query[search_query]}
+            results.append(result)
+            if result['status'] == 'hit':
+                new_hits[key] = result['track']
+            elif result['status'] == 'miss':
+                new_misses.add(key)
+        if use_cache:
+            self.resolution_cache.put_hits(list(new_hits.items()))
+            self.resolution_cache.put_misses(list(new_misses))
+
+        hits = sum(1 for result in unique_results if result['status'] == 'hit')
+        errors = sum(1 for result in unique_results if result['status'] == 'error')
+        return {
+            'success': True,
+            'data': {
+                'results': results,
+                'unique_queries': len(unique_queries),
+                'cached': len(set(cached)),
+                'hits': hits,
+                'misses': len(unique_queries) - hits - errors,
+                'errors': errors,
+            },
+            'message': f"Resolved {hits}/{len(unique_queries)} searched queries, {len(set(cached))} from cache ({len(queries)} requested)"
+        }
+
+    @staticmethod
+    def _track_detail_from_spotify_track(spotify_track: Dict[str, Any], reccobeats_id: str) -> Dict[str, Any]:
+        """Same record as get_reccobeats_tracks_details builds, from a Spotify search item"""
+        spotify_id = spotify_track['id']
+        return {
+            'reccobeats_id': reccobeats_id,
+            'name': spotify_track.get('name', ''),
+            'artists': [{'name': artist['name'], 'id': artist.get('id', '')} for artist in spotify_track.get('artists', [])],
+            'duration_ms': spotify_track.get('duration_ms', 0),
+            'popularity': spotify_track.get('popularity', 0),
+            'external_urls': {
+                'spotify': spotify_track.get('external_urls', {}).get('spotify', f"https://open.spotify.com/track/{spotify_id}")
+            },
+            'id': spotify_id,
+            'uri': f"spotify:track:{spotify_id}",
+        }
+
+    async def _recall_featured_tracks(self, spotify_tracks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Reccobeats details plus audio features for Spotify tracks, only tracks with features.
+        Tracks already in the feature store are built from the Spotify item without any request.
+        """
+        if not spotify_tracks:
+            return []
+        spotify_tracks = list({track['id']: track for track in spotify_tracks}.values())
+        stored = self.feature_store.get_many([track['id'] for track in spotify_tracks])
+        tracks = []
+        for spotify_track in spotify_tracks:
+            entry = stored.get(spotify_track['id'])
+            if entry:
+                track = self._track_detail_from_spotify_track(spotify_track, entry['reccobeats_id'])
+                track['features'] = {
+                    'success': True,
+                    'data': entry['features'],
+                    'message': f"Audio features for track {entry['reccobeats_id']} from feature store"
+                }
+                tracks.append(track)
+
+        missing_ids = [track['id'] for track in spotify_tracks if track['id'] not in stored]
+        if missing_ids:
+            reccobeats_tracks = await self.get_reccobeats_tracks_details(missing_ids)
+            if reccobeats_tracks['success']:
+                missing_tracks = list({track['id']: track for track in reccobeats_tracks['data']['tracks']}.values())
+                await self.attach_reccobeats_audio_features(missing_tracks)
+                tracks.extend(missing_tracks)
+            else:
+                logger.warning(reccobeats_tracks['message'])
+        return [track for track in tracks if track['features']['success']]
+
+    async def stream_recall_tracks(self, artist_names: List[str], max_artists: int = 10, reccobeats_seeds: int = 0, max_search_concurrency: int = 5, library_tracks: List[Dict[str, Any]] = None, skip_track_ids: Iterable[str] = None):
+        """
+        Streaming recall of tracks based on artist names (async generator).
+
+        Each tivo album that arrives from stream_tivo_tracks is resolved to Spotify tracks and
+        enriched with Reccobeats details and audio features on its own task, so a fully-featured
+        track is yielded as soon as it is ready. Tracks are de-duplicated by Spotify id. With
+        reccobeats_seeds > 0, Reccobeats recommendations seeded from that many resolved tracks
+        are streamed once the tivo stage is exhausted. Closing the generator early (e.g. once
+        enough tracks were pulled) cancels all outstanding upstream work. library_tracks (Spotify
+        track objects, e.g. from the library mirror) are enriched and streamed alongside.
+        Tracks in skip_track_ids (e.g. already in the candidate pool) are neither enriched nor
+        yielded, they still seed Reccobeats.
+
+        Yields:
+            Dict: track with 'id', 'name', 'artists', 'duration_ms', 'uri', 'reccobeats_id' and
+            'features' ({'success': True, 'data': {...audio features}})
+        """
+        tivo_artist_names = random.sample(artist_names, min(max_artists, len(artist_names)))  # NOTE: tivo is not stable, often timeout
+        search_semaphore = asyncio.Semaphore(max_search_concurrency)
+        output = asyncio.Queue()
+        done = object()
+        seen_track_ids = set(skip_track_ids or ())
+        resolved_tracks = []
+
+        async def emit(spotify_tracks):
+            new_tracks = [track for track in spotify_tracks if track['id'] not in seen_track_ids]
+            seen_track_ids.update(track['id'] for track in new_tracks)
+            for track in await self._recall_featured_tracks(new_tracks):
+                await output.put(track)
+
+        async def process_album(album_tracks):
+            # tivo_tracks: dict_keys(['id', 'title', 'performers', 'composers', 'duration', 'disc', 'phyTrackNum', 'isPick'])
+            album_tracks = [track for track in album_tracks if 'title' in track]
+            resolved_titles = await self.search_tracks_batch(
+                [track['title'] for track in album_tracks],
+                semaphore=search_semaphore,
+                artists=[track.get('recall_artist') for track in album_tracks],
+            )
+            search_items = [resolved['track'] for resolved in resolved_titles['data']['results'] if resolved['status'] == 'hit']
+            resolved_tracks.extend(search_items)
+            await emit(search_items)
+
+        async def process_reccobeats_seeds():
+            # recall more from reccobeats with spotify track ids
+            random_selected_tracks = random.sample(resolved_tracks, min(reccobeats_seeds, len(resolved_tracks)))
+            reccobeat_recommendations = await asyncio.gather(*(
+                self.recall_reccobeats_tracks(seed_spotify_track['id'], num_tracks=5) for seed_spotify_track in random_selected_tracks
+            ))
+            recommended_tracks = []
+            for reccobeat_recommendation in reccobeat_recommendations:
+                if reccobeat_recommendation['success']:
+                    recommended_tracks.extend(reccobeat_recommendation['data']['tracks'])
+            await emit(recommended_tracks)
+
+        async def run_pipeline():
+            album_tasks = []
+            if library_tracks:
+                album_tasks.append(asyncio.create_task(emit(library_tracks)))
+            try:
+                async with contextlib.aclosing(self.stream_tivo_tracks(tivo_artist_names)) as tivo_stream:
+                    async for album_tracks in tivo_stream:
+                        album_tasks.append(asyncio.create_task(process_album(album_tracks)))
+                await asyncio.gather(*album_tasks)
+                if reccobeats_seeds > 0:
+                    await process_reccobeats_seeds()
+            finally:
+                for task in album_tasks:
+                    task.cancel()
+                await asyncio.gather(*album_tasks, return_exceptions=True)
+                await output.put(done)
+
+        pipeline = asyncio.create_task(run_pipeline())
+        try:
+            while True:
+                track = await output.get()
+                if track is done:
+                    break
+                yield track
+            await pipeline
+        finally:
+            if not pipeline.done():
+                pipeline.cancel()
+                try:
+                    await pipeline
+                except asyncio.CancelledError:
+                    pass
+
+    async def stream_all_tracks(self, lastfm_client: LastfmClient = None, library_sample: int = 50, skip_track_ids: Iterable[str] = None):
+        """
+        Streaming version of recall_all_tracks (async generator), recalls the user's artists
+        (plus Last.fm similar artists) and yields fully-featured tracks as they become ready.
+        Up to library_sample random tracks of the mirrored library are candidates as well.
+        Tracks in skip_track_ids are not yielded (see stream_recall_tracks).
         """
         # 1. recall artist
-        _, artist_names = self.recall_artists()
+        _, artist_names = await asyncio.to_thread(self.recall_artists, concurrent=True)
         # lastfm similar artists
         if lastfm_client:
-            lastfm_artist_names = []
-            for artist_name in artist_names:
-                lastfm_similar_artists = await lastfm_client.get_similar_artists(artist_name, limit=10, include_original=True)
-                if lastfm_similar_artists:
-                    lastfm_artist_names.extend(lastfm_similar_artists)
-            artist_names.extend(lastfm_artist_names)
+            artist_names = await lastfm_client.expand_artists(artist_names, hops=1, fan_out=10, min_weight=0.0)
         #### 2. recall track based on artist ids  # NOTE: rate limited
         # track_set = self.recall_tracks(artist_ids, artist_top_limit=10, album_limit=5)
-        # 2. spotify id to tivo id, artist to album to tracks
+        # 2. spotify id to tivo id, artist to album to tracks, 3. track titles to spotify track by search,
+        # 4. recall more from reccobeats with spotify track ids
         logger.info(f'Number of artists: {len(artist_names)}')
         logger.info(f'artist_names: {artist_names}')
-        # NOTE: not stable, often timeout
-        artist_ids = await self.get_tivo_artist_ids(random.sample(artist_names, min(10, len(artist_names))))  # third-party API to get tivo artist ids
-        artist_album_dict = await self.get_tivo_artist_album_ids(artist_ids)
-        tivo_tracks = await self.get_tivo_tracks_in_artist_album_dict(artist_album_dict)
-        # tivo_tracks: dict_keys(['id', 'title', 'performers', 'composers', 'duration', 'disc', 'phyTrackNum', 'isPick'])
-        random.shuffle(tivo_tracks)  # Shuffle tracks to ensure randomness
-        recall_track_titles = [track['title'] for track in tivo_tracks if 'title' in track]
 
         # lastfm_artist_albums_dict = await lastfm_client.get_albums_of_artists(artist_names)
         # albums = [album for artist_albums in lastfm_artist_albums_dict.values() for album in artist_albums]
@@ -870,68 +1460,40 @@ class SpotifySuperClient(SpotifyClient):
         # # De-duplicate track titles
         # recall_track_titles = list(set(recall_track_titles))
 
+        library_tracks = await asyncio.to_thread(self.library_mirror.sample_tracks, library_sample)
 
-        search_tracks = []  
-        search_track_ids = []
-        search_artist_names = []
-        # 4. track titles to spotify track by search
-        # search_tracks: dict_keys(['album', 'artists', 'available_markets', 'disc_number', 'duration_ms', 'explicit', 'external_ids', 'external_urls', 'href', 'id', 'is_local', 'is_playable', 'name', 'popularity', 'preview_url', 'track_number', 'type', 'uri'])
-        for track_title in tqdm(recall_track_titles, desc="Searching tracks"):
-            search_track = self.search_tracks(track_title)
-            if search_track['success'] and len(search_track['data']['tracks']['items']) > 0:
-                search_item = search_track['data']['tracks']['items'][0]
-                if search_item['id'] in search_track_ids:
-                    continue
-                search_tracks.append(search_item)
-                search_track_ids.append(search_item['id'])
-                search_artist_names.append(', '.join([artist['name'] for artist in search_item['artists']]))
-
-        # recall more from reccobeats with spotify track ids
-        random_selected_tracks = random.sample(search_tracks, min(10, len(search_tracks)))
-        for seed_spotify_track in tqdm(random_selected_tracks, desc="Getting Reccobeats recommendations"):
-            reccobeat_recommendation = await self.recall_reccobeats_tracks(seed_spotify_track['id'], num_tracks=5)
-            if reccobeat_recommendation['success']:
-                for track in tqdm(reccobeat_recommendation['data']['tracks'], desc="Converting to Reccobeats tracks"):
-                    if track['id'] not in search_track_ids:
-                        search_tracks.append(track)
-                        search_track_ids.append(track['id'])
-                        search_artist_names.append(', '.join([artist['name'] for artist in track['artists']]))
-        random.shuffle(search_tracks)
-        recall_result = {
-            'success': True,
-            'data': {
-                'tracks': search_tracks,
-                # 'track_ids': search_track_ids,
-                # 'artist_names': search_artist_names,
-            },
-            'message': "Successfully recall tracks",
-        }
+        async with contextlib.aclosing(self.stream_recall_tracks(artist_names, reccobeats_seeds=10, library_tracks=library_tracks, skip_track_ids=skip_track_ids)) as tracks:
+            async for track in tracks:
+                yield track
 
+    async def collect_track_table(self, stream, stop=None, table: TrackTable = None) -> TrackTable:
+        """
+        Pull a recall stream (stream_all_tracks / stream_recall_tracks) into a TrackTable.
 
-        # import pdb; pdb.set_trace()
-        reccobeats_tracks = await self.get_reccobeats_tracks_details(search_track_ids)
-        recall_all_tracks = []
-        recall_all_track_ids = []
-        recall_all_artist_names = []
-        seen_track_ids = set()
-        if reccobeats_tracks['success']:
-            for track in tqdm(reccobeats_tracks['data']['tracks'], desc="Adding Reccobeats tracks features"):
-                # Skip duplicate tracks
-                if track['id'] in seen_track_ids:
-                    continue
-                seen_track_ids.add(track['id'])
-                track['features'] = await self.get_reccobeats_track_audio_features(track['reccobeats_id'])
-                recall_all_tracks.append(track)
-                recall_all_track_ids.append(track['id'])
-                recall_all_artist_names.append(', '.join([artist['name'] for artist in track['artists']]))
+        stop(table, row) is called after every newly added row; once it returns True the
+        stream is closed, which cancels the outstanding upstream work. An existing table can
+        be passed to top it up in place.
+        """
+        if table is None:
+            table = TrackTable()
+        async with contextlib.aclosing(stream):
+            async for track in stream:
+                num_rows = len(table)
+                index = table.append(track)
+                if index is not None and len(table) > num_rows and stop is not None and stop(table, table[index]):
+                    break
+        return table
 
+    async def recall_all_tracks(self, lastfm_client: LastfmClient = None) -> List[Dict[str, Any]]:
+        """
+        Comprehensive recall of tracks, returning detailed track information.
+        """
+        recall_all_tracks = [track async for track in self.stream_all_tracks(lastfm_client)]
         random.shuffle(recall_all_tracks)
         recall_result = {
             'success': True,
             'data': {
                 'tracks': recall_all_tracks,
-                # 'track_ids': recall_all_track_ids,
-                # 'artist_names': recall_all_artist_names,
             },
             'message': "Successfully recall tracks",
         }
@@ -943,77 +1505,13 @@ class SpotifySuperClient(SpotifyClient):
         """
         Comprehensive recall of tracks based on a list of artist names, returning detailed track information.
         """
-        artist_names = lastfm_similar_artists
-        artist_ids = await self.get_tivo_artist_ids(random.sample(artist_names, min(10, len(artist_names))))  # third-party API to get tivo artist ids
-        artist_album_dict = await self.get_tivo_artist_album_ids(artist_ids)
-        tivo_tracks = await self.get_tivo_tracks_in_artist_album_dict(artist_album_dict)
-        # tivo_tracks: dict_keys(['id', 'title', 'performers', 'composers', 'duration', 'disc', 'phyTrackNum', 'isPick'])
-        random.shuffle(tivo_tracks)  # Shuffle tracks to ensure randomness
-        logger.info(f'Number of tracks from tivo: {len(tivo_tracks)}')
-        # logger.info(f'tivo_tracks: {tivo_tracks}')
-        recall_track_titles = [track['title'] for track in tivo_tracks if 'title' in track]
-
-        search_tracks = []  
-        search_track_ids = []
-        search_artist_names = []
-        # 4. track titles to spotify track by search
-        # search_tracks: dict_keys(['album', 'artists', 'available_markets', 'disc_number', 'duration_ms', 'explicit', 'external_ids', 'external_urls', 'href', 'id', 'is_local', 'is_playable', 'name', 'popularity', 'preview_url', 'track_number', 'type', 'uri'])
-        for track_title in tqdm(recall_track_titles, desc="Searching tracks"):
-            search_track = self.search_tracks(track_title)
-            if search_track['success'] and len(search_track['data']['tracks']['items']) > 0:
-                search_item = search_track['data']['tracks']['items'][0]
-                if search_item['id'] in search_track_ids:
-                    continue
-                search_tracks.append(search_item)
-                search_track_ids.append(search_item['id'])
-                search_artist_names.append(', '.join([artist['name'] for artist in search_item['artists']]))
-
-        # # recall more from reccobeats with spotify track ids
-        # random_selected_tracks = random.sample(search_tracks, min(10, len(search_tracks)))
-        # for seed_spotify_track in tqdm(random_selected_tracks, desc="Getting Reccobeats recommendations"):
-        #     reccobeat_recommendation = await self.recall_reccobeats_tracks(seed_spotify_track['id'], num_tracks=5)
-        #     if reccobeat_recommendation['success']:
-        #         for track in tqdm(reccobeat_recommendation['data']['tracks'], desc="Converting to Reccobeats tracks"):
-        #             if track['id'] not in search_track_ids:
-        #                 search_tracks.append(track)
-        #                 search_track_ids.append(track['id'])
-        #                 search_artist_names.append(', '.join([artist['name'] for artist in track['artists']]))
-        random.shuffle(search_tracks)
-        recall_result = {
-            'success': True,
-            'data': {
-                'tracks': search_tracks,
-                # 'track_ids': search_track_ids,
-                # 'artist_names': search_artist_names,
-            },
-            'message': "Successfully recall tracks",
-        }
-
-
-        # import pdb; pdb.set_trace()
-        reccobeats_tracks = await self.get_reccobeats_tracks_details(search_track_ids)
-        recall_all_tracks = []
-        recall_all_track_ids = []
-        recall_all_artist_names = []
-        seen_track_ids = set()
-        if reccobeats_tracks['success']:
-            for track in tqdm(reccobeats_tracks['data']['tracks'], desc="Adding Reccobeats tracks features"):
-                # Skip duplicate tracks
-                if track['id'] in seen_track_ids:
-                    continue
-                seen_track_ids.add(track['id'])
-                track['features'] = await self.get_reccobeats_track_audio_features(track['reccobeats_id'])
-                recall_all_tracks.append(track)
-                recall_all_track_ids.append(track['id'])
-                recall_all_artist_names.append(', '.join([artist['name'] for artist in track['artists']]))
-
+        recall_all_tracks = [track async for track in self.stream_recall_tracks(lastfm_similar_artists)]
+        logger.info(f'Number of recalled tracks: {len(recall_all_tracks)}')
         random.shuffle(recall_all_tracks)
         recall_result = {
             'success': True,
             'data': {
                 'tracks': recall_all_tracks,
-                # 'track_ids': recall_all_track_ids,
-                # 'artist_names': recall_all_artist_names,
             },
             'message': "Successfully recall tracks",
         }
@@ -1026,13 +1524,11 @@ class SpotifySuperClient(SpotifyClient):
         Randomly fill k tracks for new playlist
         """
         # 1. recall artist
-        _, artist_names = self.recall_artists()
+        _, artist_names = await asyncio.to_thread(self.recall_artists, concurrent=True)
         #### 2. recall track based on artist ids  # NOTE: rate limited
         # track_set = self.recall_tracks(artist_ids, artist_top_limit=10, album_limit=5)
         # 2. spotify id to tivo id, artist to album to tracks
-        artist_ids = await self.get_tivo_artist_ids(artist_names)  # third-party API to get tivo artist ids
-        artist_album_dict = await self.get_tivo_artist_album_ids(artist_ids)
-        tivo_tracks = await self.get_tivo_tracks_in_artist_album_dict(artist_album_dict)
+        tivo_tracks = [track async for album_tracks in self.stream_tivo_tracks(artist_names) for track in album_tracks]  # third-party API, artist to album to tracks
         # tivo_tracks: dict_keys(['id', 'title', 'performers', 'composers', 'duration', 'disc', 'phyTrackNum', 'isPick'])
         # random sample 10
         tivo_tracks = random.sample(tivo_tracks, min(num_tracks, len(tivo_tracks)))
@@ -1041,11 +1537,11 @@ class SpotifySuperClient(SpotifyClient):
         search_track_ids = []
         search_artist_names = []
         # 3. track titles to spotify track by search
-        # search_tracks: dict_keys(['album', 'artists', 'available_markets', 'disc_number', 'duration_ms', 'explicit', 'external_ids', 'external_urls', 'href', 'id', 'is_local', 'is_playable', 'name', 'popularity', 'preview_url', 'track_number', 'type', 'uri'])
-        for track_title in tqdm(recall_track_titles, desc="Searching tracks for random fill"):
-            search_track = self.search_tracks(track_title)
-            if search_track['success'] and len(search_track['data']['tracks']['items']) > 0:
-                search_item = search_track['data']['tracks']['items'][0]
+        # search_tracks: compact_track dicts, dict_keys(['id', 'name', 'artists', 'duration_ms', 'popularity', 'uri', 'external_urls'])
+        resolved_titles = await self.search_tracks_batch(recall_track_titles)
+        for resolved in resolved_titles['data']['results']:
+            if resolved['status'] == 'hit':
+                search_item = resolved['track']
                 search_tracks.append(search_item)
                 search_track_ids.append(search_item['id'])
                 search_artist_names.append(', '.join([artist['name'] for artist in search_item['artists']]))
@@ -1064,18 +1560,10 @@ class SpotifySuperClient(SpotifyClient):
         """
         Get track recommendations from Reccobeats API
         """
-        url = f"https://api.reccobeats.com/v1/track/recommendation?size={num_tracks}&seeds={track_seed}"
-        
-        payload = {}
-        headers = {
-            'Accept': 'application/json'
-        }
+        path = f"/track/recommendation?size={num_tracks}&seeds={track_seed}"
         
         try:
-            response = requests.request("GET", url, headers=headers, data=payload)
-            response.raise_for_status()
-            
-            data = response.json()['content']
+            data = (await self.reccobeats.get(path))['content']
 
             
             recommended_tracks = []
@@ -1104,7 +1592,7 @@ class SpotifySuperClient(SpotifyClient):
                 'message': f"Successfully got {len(recommended_tracks)} recommendations from Reccobeats"
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {
                 'success': False,
                 'data': None,
@@ -1139,18 +1627,10 @@ class SpotifySuperClient(SpotifyClient):
             all_requested_ids.extend(batch_ids)
             
             track_ids_str = ','.join(batch_ids)
-            url = f"https://api.reccobeats.com/v1/track?ids={track_ids_str}"
-            
-            payload = {}
-            headers = {
-                'Accept': 'application/json'
-            }
+            path = f"/track?ids={track_ids_str}"
             
             try:
-                response = requests.request("GET", url, headers=headers, data=payload)
-                response.raise_for_status()
-                
-                data = response.json()
+                data = await self.reccobeats.get(path)
                 
                 tracks_details = []
                 if 'content' in data and len(data['content']):
@@ -1173,7 +1653,7 @@ class SpotifySuperClient(SpotifyClient):
                 
                 all_tracks_details.extend(tracks_details)
                 
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 return {
                     'success': False,
                     'data': None,
@@ -1204,6 +1684,22 @@ class SpotifySuperClient(SpotifyClient):
             'message': f"Successfully retrieved details for {len(all_tracks_details)} tracks from Reccobeats in {(len(track_ids) + batch_size - 1) // batch_size} batches"
         }
 
+    @staticmethod
+    def _parse_reccobeats_audio_features(reccobeats_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Audio features dict of one track from a Reccobeats audio-features payload"""
+        return {
+            'id': reccobeats_id,
+            'acousticness': data.get('acousticness', 0),
+            'danceability': data.get('danceability', 0),
+            'energy': data.get('energy', 0),
+            'instrumentalness': data.get('instrumentalness', 0),
+            'liveness': data.get('liveness', 0),
+            'loudness': data.get('loudness', 0),
+            'speechiness': data.get('speechiness', 0),
+            'tempo': data.get('tempo', 0),
+            'valence': data.get('valence', 0)
+        }
+
     async def get_reccobeats_track_audio_features(self, reccobeats_id: str) -> Dict[str, Any]:
         """
         Get audio features for a single track from Reccobeats API
@@ -1215,31 +1711,12 @@ class SpotifySuperClient(SpotifyClient):
                 'message': "No Reccobeats ID provided"
             }
         
-        url = f"https://api.reccobeats.com/v1/track/{reccobeats_id}/audio-features"
-        
-        payload = {}
-        headers = {
-            'Accept': 'application/json'
-        }
+        path = f"/track/{reccobeats_id}/audio-features"
         
         try:
-            response = requests.request("GET", url, headers=headers, data=payload)
-            response.raise_for_status()
+            data = await self.reccobeats.get(path)
             
-            data = response.json()
-            
-            audio_features = {
-                'id': reccobeats_id,
-                'acousticness': data.get('acousticness', 0),
-                'danceability': data.get('danceability', 0),
-                'energy': data.get('energy', 0),
-                'instrumentalness': data.get('instrumentalness', 0),
-                'liveness': data.get('liveness', 0),
-                'loudness': data.get('loudness', 0),
-                'speechiness': data.get('speechiness', 0),
-                'tempo': data.get('tempo', 0),
-                'valence': data.get('valence', 0)
-            }
+            audio_features = self._parse_reccobeats_audio_features(reccobeats_id, data)
             
             return {
                 'success': True,
@@ -1247,7 +1724,7 @@ class SpotifySuperClient(SpotifyClient):
                 'message': f"Successfully retrieved audio features for track {reccobeats_id}"
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return {
                 'success': False,
                 'data': None,
@@ -1266,4 +1743,100 @@ class SpotifySuperClient(SpotifyClient):
                 'message': f"Unexpected error: {str(e)}"
             }
 
-  
\ No newline at end of file
+    async def get_reccobeats_tracks_audio_features(self, reccobeats_ids: List[str], batch_size: int = 40) -> Dict[str, Any]:
+        """
+        Get audio features for multiple tracks from Reccobeats API, batch_size ids per request
+        (Reccobeats accepts at most 40 ids per call).
+
+        Returns:
+            dict: data['features'] maps reccobeats id -> audio features, data['missing_ids'] lists
+            the ids the batch endpoint did not return.
+        """
+        reccobeats_ids = list(dict.fromkeys(reccobeats_id for reccobeats_id in reccobeats_ids if reccobeats_id))
+        if not reccobeats_ids:
+            return {
+                'success': False,
+                'data': None,
+                'message': "No Reccobeats IDs provided"
+            }
+
+        features_by_id = {}
+
+        async def fetch_batch(batch_number, batch_ids):
+            try:
+                data = await self.reccobeats.get(f"/audio-features?ids={','.join(batch_ids)}")
+            except (httpx.HTTPError, json.JSONDecodeError) as e:
+                # leave the whole batch to the per-track fallback
+                logger.warning(f"Failed to get audio features batch {batch_number} from Reccobeats: {str(e)}")
+                return
+            for item in data.get('content', []):
+                if item.get('id') in batch_ids:
+                    features_by_id[item['id']] = self._parse_reccobeats_audio_features(item['id'], item)
+
+        await asyncio.gather(*(
+            fetch_batch(i // batch_size + 1, reccobeats_ids[i:i + batch_size])
+            for i in range(0, len(reccobeats_ids), batch_size)
+        ))
+
+        missing_ids = [reccobeats_id for reccobeats_id in reccobeats_ids if reccobeats_id not in features_by_id]
+        return {
+            'success': True,
+            'data': {
+                'features': features_by_id,
+                'missing_ids': missing_ids,
+                'batches_processed': (len(reccobeats_ids) + batch_size - 1) // batch_size
+            },
+            'message': f"Successfully retrieved audio features for {len(features_by_id)}/{len(reccobeats_ids)} tracks from Reccobeats"
+        }
+
+    async def attach_reccobeats_audio_features(self, tracks: List[Dict[str, Any]], max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Set track['features'] for every track (which must carry a 'reccobeats_id') in one pass.
+
+        Features are fetched with the batched Reccobeats endpoint; ids the batch call does not
+        return fall back to concurrent single-track requests. track['features'] has the same
+        {'success', 'data', 'message'} shape as get_reccobeats_track_audio_features.
+        """
+        # recall paths already counted these tracks when looking them up by spotify id
+        stored = self.feature_store.get_many_by_reccobeats_id([track.get('reccobeats_id') for track in tracks], record=False)
+        features_by_id = {reccobeats_id: entry['features'] for reccobeats_id, entry in stored.items()}
+        batch_result = await self.get_reccobeats_tracks_audio_features(
+            [track.get('reccobeats_id') for track in tracks if track.get('reccobeats_id') not in features_by_id]
+        )
+        if batch_result['success']:
+            features_by_id.update(batch_result['data']['features'])
+        missing_ids = batch_result['data']['missing_ids'] if batch_result['success'] else []
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch_single(reccobeats_id):
+            async with semaphore:
+                return await self.get_reccobeats_track_audio_features(reccobeats_id)
+
+        fallback_results = await asyncio.gather(*(fetch_single(reccobeats_id) for reccobeats_id in missing_ids))
+        fallback_by_id = dict(zip(missing_ids, fallback_results))
+        logger.info(f"Audio features: {len(stored)} from feature store, {len(features_by_id) - len(stored)} from batch requests, {len(missing_ids)} single-track fallbacks")
+
+        for track in tracks:
+            reccobeats_id = track.get('reccobeats_id')
+            if reccobeats_id in features_by_id:
+                track['features'] = {
+                    'success': True,
+                    'data': features_by_id[reccobeats_id],
+                    'message': f"Successfully retrieved audio features for track {reccobeats_id}"
+                }
+            elif reccobeats_id in fallback_by_id:
+                track['features'] = fallback_by_id[reccobeats_id]
+            else:
+                track['features'] = {
+                    'success': False,
+                    'data': None,
+                    'message': "No Reccobeats ID provided"
+                }
+        # write through everything that was fetched from Reccobeats
+        self.feature_store.put_many(
+            (track['id'], track['reccobeats_id'], track['features']['data'])
+            for track in tracks
+            if track.get('id') and track.get('reccobeats_id') not in stored and track['features']['success']
+        )
+        return tracks
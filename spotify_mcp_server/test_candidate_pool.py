@@ -0,0 +1,124 @@
+import asyncio
+import unittest
+
+from candidate_pool import CandidatePool
+from spotify_client import SpotifySuperClient
+
+
+def track(track_id, valence, energy):
+    return {
+        'id': track_id,
+        'name': track_id,
+        'artists': [{'id': f'artist_{track_id}', 'name': f'Artist {track_id}'}],
+        'features': {'success': True, 'data': {'valence': valence, 'energy': energy}},
+    }
+
+
+class FakeSpotifyClient:
+    """Recall stream over synthetic tracks, records what it was asked to skip and yielded"""
+
+    def __init__(self, tracks):
+        self.tracks = tracks
+        self.skipped = []
+        self.yielded = []
+        self.gate = None
+
+    async def stream_all_tracks(self, lastfm_client=None, library_sample=50, skip_track_ids=None):
+        skip_track_ids = set(skip_track_ids or ())
+        self.skipped.append(skip_track_ids)
+        gate = self.gate
+        for item in self.tracks:
+            if gate is not None:
+                await gate.wait()
+            if item['id'] in skip_track_ids:
+                continue
+            self.yielded.append(item['id'])
+            yield item
+
+    async def collect_track_table(self, stream, stop=None, table=None):
+        return await SpotifySuperClient.collect_track_table(self, stream, stop=stop, table=table)
+
+
+def in_happy(row):
+    return row.valence > 0.5 and row.energy > 0.5
+
+
+class CandidatePoolTest(unittest.TestCase):
+    def setUp(self):
+        happy = [track(f'happy{i}', 0.8, 0.8) for i in range(5)]
+        sad = [track(f'sad{i}', 0.2, 0.2) for i in range(5)]
+        self.client = FakeSpotifyClient([item for pair in zip(sad, happy) for item in pair])
+        self.pool = CandidatePool(self.client, per_region=2)
+
+    def count_happy(self):
+        return self.pool.count_in_region((0.5, 1.0), (0.5, 1.0))
+
+    def test_count_in_region(self):
+        self.assertEqual(self.count_happy(), 0)
+        asyncio.run(self.pool.refresh())
+        self.assertEqual(self.count_happy(), 5)
+        self.assertEqual(self.pool.count_in_region((0.0, 0.5), (0.0, 0.1)), 0)
+        self.assertEqual(self.pool.count_in_region((0.2, 0.2), (0.2, 0.2), (0.2, 0.2), radius=0.01), 5)
+        self.assertEqual(self.pool.count_in_region((0.7, 0.7), (0.7, 0.7), radius=0.05), 0)
+        self.assertEqual(self.pool.stats()['regions'], {'Sad': 5, 'Angry': 0, 'Relaxed': 0, 'Happy': 5})
+
+    def test_refresh_stops_once_regions_are_filled(self):
+        asyncio.run(self.pool.refresh())
+        # the two empty quadrants never fill, so the whole stream is pulled
+        self.assertEqual(len(self.pool.table), 10)
+        self.pool.resolution = 1
+        self.pool.region_counts = self.pool.region_counts[:1, :1]
+        self.client.yielded.clear()
+        asyncio.run(self.pool.refresh())
+        self.assertEqual(self.client.yielded, ['sad0', 'happy0'])
+
+    def test_top_up_skips_recall_when_enough(self):
+        asyncio.run(self.pool.refresh())
+        self.client.skipped.clear()
+        table = asyncio.run(self.pool.top_up(5, self.count_happy, in_happy))
+        self.assertIs(table, self.pool.table)
+        self.assertEqual(self.client.skipped, [])
+        self.assertEqual(self.pool.top_ups, 0)
+
+    def test_top_up_stops_early_and_skips_pooled_tracks(self):
+        self.client.tracks = self.client.tracks[:4]
+        asyncio.run(self.pool.refresh())
+        self.client.tracks = [track(f'more{i}', 0.9, 0.9) for i in range(5)] + self.client.tracks
+        self.client.yielded.clear()
+        table = asyncio.run(self.pool.top_up(4, self.count_happy, in_happy))
+        self.assertEqual(self.client.skipped[-1], {'sad0', 'happy0', 'sad1', 'happy1'})
+        self.assertEqual(self.client.yielded, ['more0', 'more1'])
+        self.assertEqual(len(table), 6)
+        self.assertEqual(self.count_happy(), 4)
+        self.assertEqual(self.pool.stats()['regions']['Happy'], 4)
+        self.assertEqual(self.pool.top_ups, 1)
+
+    def test_top_up_of_cold_pool_becomes_the_pool(self):
+        table = asyncio.run(self.pool.top_up(1, self.count_happy, in_happy))
+        self.assertEqual(self.client.yielded, ['sad0', 'happy0'])
+        self.assertIs(table, self.pool.table)
+        self.assertTrue(self.pool.is_stale())
+
+    def test_top_up_during_refresh_is_not_blocked_or_lost(self):
+        async def scenario():
+            gate = self.client.gate = asyncio.Event()
+            refresh = asyncio.create_task(self.pool.refresh())
+            await asyncio.sleep(0)
+            # the refresh holds its lock and waits on its stream, the top-up does not wait for it
+            self.client.gate = None
+            self.client.tracks = [track('extra', 0.9, 0.9)]
+            table = await asyncio.wait_for(self.pool.top_up(1, self.count_happy, in_happy), timeout=1)
+            self.assertFalse(refresh.done())
+            self.assertEqual(table.ids, ['extra'])
+            gate.set()
+            await refresh
+
+        asyncio.run(scenario())
+        self.assertIn('extra', self.pool.table)
+        self.assertEqual(len(self.pool.table), 11)
+        self.assertEqual(self.pool.stats()['regions']['Happy'], 6)
+        self.assertEqual((self.pool.refreshes, self.pool.top_ups), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
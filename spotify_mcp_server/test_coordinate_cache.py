@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from coordinate_cache import CoordinateCache, activity_tokens, similarity
+from resolution_cache import normalize_key
+
+HAPPY_TO_SAD = {'start_valence': 0.8, 'start_energy': 0.6, 'end_valence': 0.2, 'end_energy': 0.3}
+CALM_TO_ENERGETIC = {'start_valence': 0.6, 'start_energy': 0.2, 'end_valence': 0.7, 'end_energy': 0.9}
+WORKOUT = {'start_valence': 0.7, 'start_energy': 0.8, 'end_valence': 0.8, 'end_energy': 0.9}
+
+
+def score(a, b):
+    return similarity(activity_tokens(normalize_key(a)), activity_tokens(normalize_key(b)))
+
+
+class CoordinateCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'coordinates.sqlite3')
+        self.cache = CoordinateCache(self.path)
+        self.cache.put('mood changing from happy to sad', [], HAPPY_TO_SAD)
+        self.cache.put('calm to energetic', [], CALM_TO_ENERGETIC)
+        self.cache.put('working out at the gym', ['rock'], WORKOUT)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_exact_hit(self):
+        self.assertEqual(self.cache.get('Mood changing from Happy to Sad!', []), HAPPY_TO_SAD)
+        self.assertEqual(self.cache.similar_hits, 0)
+
+    def test_near_duplicate_hit(self):
+        # stopwords, a one-letter typo and an added word still match
+        self.assertEqual(self.cache.get('working out in the gym', ['Rock']), WORKOUT)
+        self.assertEqual(self.cache.get('workng out at the gym', ['rock']), WORKOUT)
+        self.cache.put('long evening walk along the quiet beach', [], CALM_TO_ENERGETIC)
+        self.assertEqual(self.cache.get('long evening walk along the quiet sandy beach', []), CALM_TO_ENERGETIC)
+        self.assertEqual(self.cache.similar_hits, 3)
+
+    def test_reversed_direction_misses(self):
+        self.assertIsNone(self.cache.get('mood changing from sad to happy', []))
+        self.assertIsNone(self.cache.get('energetic to calm', []))
+        self.assertIsNone(self.cache.get('mood changing to happy from sad', []))
+        self.assertEqual(score('mood changing from happy to sad', 'mood changing from sad to happy'), 0.0)
+        self.assertEqual(score('calm to energetic', 'energetic to calm'), 0.0)
+
+    def test_negation_misses(self):
+        self.assertIsNone(self.cache.get('not working out at the gym', ['rock']))
+        self.cache.put("can't sleep", [], CALM_TO_ENERGETIC)
+        self.assertIsNone(self.cache.get('can sleep', []))
+        self.cache.put('working out', [], WORKOUT)
+        self.assertIsNone(self.cache.get('not working out', []))
+        self.assertEqual(score('not working out', 'working out'), 0.0)
+        self.assertEqual(score('working out', 'not working out'), 0.0)
+
+    def test_replaced_word_misses(self):
+        self.cache.put('mood changing from happy to calm', [], CALM_TO_ENERGETIC)
+        self.assertIsNone(self.cache.get('mood changing from happy to angry', []))
+        self.assertEqual(score('mood changing from happy to calm', 'mood changing from happy to sad'), 0.0)
+
+    def test_genres_and_ttl(self):
+        self.assertIsNone(self.cache.get('working out at the gym', ['jazz']))
+        self.cache.put('cooking dinner', [], WORKOUT, ttl=-1)
+        self.assertIsNone(self.cache.get('cooking dinner', []))
+
+    def test_persisted(self):
+        self.cache.close()
+        self.cache = CoordinateCache(self.path)
+        self.assertEqual(self.cache.get('calm to energetic', []), CALM_TO_ENERGETIC)
+        self.assertIsNone(self.cache.get('energetic to calm', []))
+
+
+if __name__ == '__main__':
+    unittest.main()
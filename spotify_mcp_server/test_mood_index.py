@@ -0,0 +1,96 @@
+import math
+import unittest
+
+import numpy as np
+
+from mood_index import MoodIndex, points_in_polygon
+
+# concave "L" shape
+L_SHAPE = [(0.1, 0.1), (0.9, 0.1), (0.9, 0.4), (0.4, 0.4), (0.4, 0.9), (0.1, 0.9)]
+
+
+class MoodIndexTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        # a few points on cell borders, on the plane edges and slightly outside it
+        extra = [(0.5, 0.5), (0.25, 0.75), (0.0, 0.0), (1.0, 1.0), (-0.05, 0.5), (1.05, 0.2)]
+        self.points = np.vstack([rng.random((500, 2)), extra])
+        self.index = MoodIndex(self.points, resolution=8)
+        self.x, self.y = self.points[:, 0], self.points[:, 1]
+
+    def distances(self, center):
+        return np.hypot(self.x - center[0], self.y - center[1])
+
+    def test_rect(self):
+        for valence_range, energy_range in [((0.2, 0.6), (0.5, 0.9)), ((0.5, 0.5), (0.0, 1.0)), ((0.0, 1.0), (0.0, 1.0)), ((0.7, 0.3), (0, 1))]:
+            expected = np.flatnonzero(
+                (self.x >= valence_range[0]) & (self.x <= valence_range[1])
+                & (self.y >= energy_range[0]) & (self.y <= energy_range[1])
+            )
+            np.testing.assert_array_equal(self.index.rect(valence_range, energy_range), expected)
+
+    def test_radius(self):
+        center = (0.3, 0.6)
+        indices, distances = self.index.radius(center, 0.2)
+        expected = np.flatnonzero(self.distances(center) <= 0.2)
+        self.assertEqual(sorted(indices), list(expected))
+        np.testing.assert_allclose(distances, self.distances(center)[indices])
+        self.assertTrue(np.all(np.diff(distances) >= 0))
+        # a point exactly on the border of the circle is inside
+        self.assertIn(len(self.points) - 6, self.index.radius((0.5, 0.4), 0.1)[0])
+
+    def test_nearest(self):
+        for center, k in [((0.5, 0.5), 10), ((0.0, 1.0), 3), ((1.2, -0.2), 5), ((0.5, 0.5), 1000)]:
+            indices, distances = self.index.nearest(center, k)
+            expected = np.sort(self.distances(center))[:k]
+            np.testing.assert_allclose(distances, expected)
+            np.testing.assert_allclose(self.distances(center)[indices], distances)
+        # ties are broken by the lower index
+        index = MoodIndex([(0.6, 0.5), (0.4, 0.5), (0.5, 0.6)])
+        self.assertEqual(list(index.nearest((0.5, 0.5), 2)[0]), [0, 1])
+        self.assertEqual(len(MoodIndex(np.empty((0, 2))).nearest((0.5, 0.5), 3)[0]), 0)
+
+    def test_corridor(self):
+        start, end = np.array([0.1, 0.2]), np.array([0.8, 0.9])
+        length = np.linalg.norm(end - start)
+        direction = (end - start) / length
+        relative = self.points - start
+        offsets = relative @ direction
+        across = np.abs(relative[:, 0] * direction[1] - relative[:, 1] * direction[0])
+        on_segment = (offsets >= 0) & (offsets <= length)
+
+        indices, found_offsets = self.index.corridor(start, end, width=0.05)
+        self.assertEqual(sorted(indices), list(np.flatnonzero(on_segment & (across <= 0.05))))
+        np.testing.assert_allclose(found_offsets, offsets[indices])
+        self.assertTrue(np.all(np.diff(found_offsets) >= 0))
+
+        unordered, _ = self.index.corridor(start, end, ordered=False)
+        self.assertEqual(sorted(unordered), list(np.flatnonzero(on_segment)))
+        # a zero-length corridor is a circle around the point
+        indices, found_offsets = self.index.corridor((0.5, 0.5), (0.5, 0.5), width=0.1)
+        self.assertEqual(list(indices), list(self.index.radius((0.5, 0.5), 0.1)[0]))
+        self.assertFalse(found_offsets.any())
+
+    def test_polygon(self):
+        mask = points_in_polygon(self.points, L_SHAPE)
+        in_bottom = (self.x > 0.1) & (self.x < 0.9) & (self.y > 0.1) & (self.y < 0.4)
+        in_left = (self.x > 0.1) & (self.x < 0.4) & (self.y > 0.1) & (self.y < 0.9)
+        borders = np.isclose(self.x, [[0.1], [0.4], [0.9]]).any(axis=0) | np.isclose(self.y, [[0.1], [0.4], [0.9]]).any(axis=0)
+        np.testing.assert_array_equal(mask[~borders], (in_bottom | in_left)[~borders])
+        np.testing.assert_array_equal(self.index.polygon(L_SHAPE), np.flatnonzero(mask))
+        self.assertFalse(points_in_polygon([(0.6, 0.6)], L_SHAPE)[0])
+        # fewer than three vertices enclose nothing
+        self.assertEqual(len(self.index.polygon([(0, 0), (1, 1)])), 0)
+        self.assertFalse(points_in_polygon(self.points, [(0, 0), (1, 1)]).any())
+
+    def test_empty_index(self):
+        index = MoodIndex([])
+        self.assertEqual(len(index), 0)
+        self.assertEqual(len(index.rect((0, 1), (0, 1))), 0)
+        self.assertEqual(len(index.radius((0.5, 0.5), 1)[0]), 0)
+        self.assertEqual(len(index.corridor((0, 0), (1, 1), width=math.inf)[0]), 0)
+        self.assertEqual(len(index.polygon(L_SHAPE)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from mood_state import MoodState
+
+START = {'x': 0.2, 'y': 0.3, 'type': 'start'}
+END = {'x': 0.8, 'y': 0.7, 'type': 'end'}
+
+
+class MoodStateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'point_meta.json')
+        self.state = MoodState(self.path, check_interval=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content, mtime_ns=None):
+        with open(self.path, 'w') as f:
+            f.write(content if isinstance(content, str) else json.dumps(content))
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_missing_file(self):
+        self.assertEqual(self.state.get(), {'start': None, 'end': None})
+        self.assertIsNone(self.state.trajectory())
+        self.assertEqual(self.state.reloads, 0)
+
+    def test_reloads_only_on_signature_change(self):
+        self.write({'start': START, 'end': None}, mtime_ns=10**18)
+        self.assertEqual(self.state.get()['start'], START)
+        self.state.get()
+        self.assertEqual(self.state.reloads, 1)
+        # same size, new mtime
+        moved = {'x': 0.4, 'y': 0.6, 'type': 'start'}
+        self.write({'start': moved, 'end': None}, mtime_ns=10**18 + 1)
+        self.assertEqual(self.state.get()['start'], moved)
+        self.assertEqual(self.state.reloads, 2)
+        os.remove(self.path)
+        self.assertEqual(self.state.get(), {'start': None, 'end': None})
+
+    def test_check_interval_skips_stat(self):
+        state = MoodState(self.path, check_interval=0.05)
+        self.assertIsNone(state.get()['start'])
+        self.write({'start': START, 'end': END})
+        # checked just now, the new file is picked up at the next check
+        self.assertIsNone(state.get()['start'])
+        time.sleep(0.06)
+        self.assertEqual(state.get()['start'], START)
+
+    def test_broken_file_keeps_last_good_points(self):
+        self.write({'start': START, 'end': END}, mtime_ns=10**18)
+        self.state.get()
+        self.write('{"start": {"x": 0.', mtime_ns=10**18 + 1)
+        self.assertEqual(self.state.get(), {'start': START, 'end': END})
+        self.assertEqual(self.state.reloads, 1)
+
+    def test_trajectory(self):
+        self.write({'start': START, 'end': {'x': None, 'y': 0.9}})
+        self.assertEqual(self.state.trajectory(), ((0.2, 0.3), (0.5, 0.5)))
+
+    def test_update_writes_atomically_and_merges(self):
+        self.write({'start': START, 'end': None})
+        points = self.state.update(end=(0.9, 0.1))
+        self.assertEqual(points, {'start': START, 'end': {'x': 0.9, 'y': 0.1, 'type': 'end'}})
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), points)
+        # no temp file is left behind
+        self.assertEqual(os.listdir(self.directory.name), ['point_meta.json'])
+        reloads = self.state.reloads
+        self.assertEqual(self.state.get(), points)
+        self.assertEqual(self.state.reloads, reloads)
+        self.assertEqual(self.state.trajectory(), ((0.2, 0.3), (0.9, 0.1)))
+
+    def test_update_reset(self):
+        self.state.update(start=(0.1, 0.1), end=(0.2, 0.2))
+        points = self.state.update(start=(0.4, 0.6), reset=True)
+        self.assertEqual(points, {'start': {'x': 0.4, 'y': 0.6, 'type': 'start'}, 'end': None})
+        self.assertEqual(MoodState(self.path).get(), points)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+
+import numpy as np
+
+from mood_index import MoodIndex
+from ranking import rank_candidates, sample_trajectory
+
+POINTS = np.array([
+    (0.50, 0.50),  # 0 box center
+    (0.90, 0.90),  # 1 far outside the box
+    (0.55, 0.45),  # 2 in the box
+    (0.65, 0.50),  # 3 just outside the box
+    (0.45, 0.50),  # 4 in the box, same distance to the center as 5
+    (0.55, 0.50),  # 5
+    (0.10, 0.10),  # 6 far outside the box
+])
+BOX = {'valence_range': (0.4, 0.6), 'energy_range': (0.4, 0.6)}
+
+
+class RankCandidatesTest(unittest.TestCase):
+    def test_without_box_keeps_input_order(self):
+        ranked = rank_candidates(POINTS)
+        self.assertEqual(list(ranked.indices), list(range(len(POINTS))))
+        self.assertTrue(np.isnan(ranked.distances).all())
+        self.assertTrue(np.isnan(ranked.projections).all())
+
+    def test_exclude_and_duplicate_keys(self):
+        keys = ['a', 'b', 'a', 'c', 'b', 'd', 'e']
+        exclude = [False, False, False, True, False, False, False]
+        ranked = rank_candidates(POINTS, exclude=exclude, keys=keys)
+        self.assertEqual(list(ranked.indices), [0, 1, 5, 6])
+
+    def test_box_ranks_by_distance_to_center(self):
+        ranked = rank_candidates(POINTS, limit=3, **BOX)
+        # ties (4 and 5) by the lower index
+        self.assertEqual(list(ranked.indices), [0, 4, 5, 2])
+        np.testing.assert_allclose(ranked.distances, [0, 0.05, 0.05, np.hypot(0.05, 0.05)])
+
+    def test_box_fills_up_with_nearest_outside_rows(self):
+        ranked = rank_candidates(POINTS, limit=6, **BOX)
+        self.assertEqual(list(ranked.indices), [0, 4, 5, 2, 3, 1])
+        ranked = rank_candidates(POINTS, limit=6, exclude=[True] + [False] * 6, **BOX)
+        self.assertEqual(list(ranked.indices), [4, 5, 2, 3, 1, 6])
+        # fewer rows than limit: every row is kept
+        self.assertEqual(len(rank_candidates(POINTS, limit=100, **BOX).indices), len(POINTS))
+
+    def test_collapsed_box_ranks_every_row_by_distance_to_target(self):
+        ranked = rank_candidates(POINTS, (0.5, 0.5), (0.5, 0.5), target_point=(0.9, 0.9), limit=2)
+        self.assertEqual(list(ranked.indices), [1, 3, 5, 0, 2, 4, 6])
+        self.assertEqual(ranked.distances[0], 0)
+
+    def test_trajectory_orders_along_segment(self):
+        ranked = rank_candidates(POINTS, trajectory=((0.4, 0.5), (0.7, 0.5)))
+        # 1 and 6 project outside the segment; 2 and 5 share an offset, ties go by index without a box
+        self.assertEqual(list(ranked.indices), [4, 0, 2, 5, 3])
+        np.testing.assert_allclose(ranked.projections, [0.05, 0.1, 0.15, 0.15, 0.25])
+        ranked = rank_candidates(POINTS, trajectory=((0.4, 0.5), (0.7, 0.5)), **BOX, limit=0)
+        # and by distance to the box center with one
+        self.assertEqual(list(ranked.indices), [4, 0, 5, 2])
+        # a zero-length trajectory is ignored
+        self.assertEqual(list(rank_candidates(POINTS, trajectory=((0.5, 0.5), (0.5, 0.5))).indices), list(range(7)))
+
+    def test_given_index_matches_built_one(self):
+        rng = np.random.default_rng(3)
+        points = rng.random((300, 2))
+        keys = rng.integers(0, 250, 300)
+        for kwargs in [
+            {'valence_range': (0.2, 0.5), 'energy_range': (0.6, 0.9), 'limit': 40},
+            {'trajectory': ((0.1, 0.9), (0.8, 0.2)), 'valence_range': (0.3, 0.7), 'energy_range': (0.3, 0.7), 'limit': 10},
+        ]:
+            built = rank_candidates(points, keys=keys, **kwargs)
+            given = rank_candidates(points, keys=keys, index=MoodIndex(points, resolution=4), **kwargs)
+            np.testing.assert_array_equal(built.indices, given.indices)
+
+
+class SampleTrajectoryTest(unittest.TestCase):
+    TRAJECTORY = ((0.0, 0.0), (1.0, 0.0))
+
+    def test_without_trajectory_returns_first_rows(self):
+        self.assertEqual(list(sample_trajectory(POINTS, [3, 1, 2], None, 2)), [3, 1])
+        self.assertEqual(list(sample_trajectory(POINTS, [3, 1, 2], ((0.5, 0.5), (0.5, 0.5)), 2)), [3, 1])
+        self.assertEqual(len(sample_trajectory(POINTS, [3, 1, 2], self.TRAJECTORY, 0)), 0)
+
+    def test_few_candidates_ordered_along_trajectory(self):
+        points = [(0.8, 0.0), (0.2, 0.3), (0.5, 0.1)]
+        self.assertEqual(list(sample_trajectory(points, [0, 1, 2], self.TRAJECTORY, 5)), [1, 2, 0])
+
+    def test_one_row_per_bucket_closest_to_line(self):
+        points = [(0.1, 0.2), (0.2, 0.0), (0.4, 0.1), (0.3, 0.05), (0.6, 0.0), (0.9, 0.3), (0.8, 0.1)]
+        picked = sample_trajectory(points, range(len(points)), self.TRAJECTORY, 4)
+        self.assertEqual(list(picked), [1, 3, 4, 6])
+
+    def test_empty_bucket_borrows_from_nearest_spare(self):
+        points = [(0.1, 0.0), (0.2, 0.05), (0.6, 0.01), (0.55, 0.02), (0.9, 0.0)]
+        # bucket [0.25, 0.5) is empty; buckets 0 and 2 are equally near, the earlier one donates
+        self.assertEqual(list(sample_trajectory(points, range(5), self.TRAJECTORY, 4)), [0, 1, 2, 4])
+        # without a spare row next to it, the nearest bucket with one donates
+        points = [(0.1, 0.0), (0.6, 0.0), (0.9, 0.0), (0.95, 0.1), (0.99, 0.2)]
+        self.assertEqual(list(sample_trajectory(points, range(5), self.TRAJECTORY, 4)), [0, 1, 2, 3])
+
+    def test_ties_pick_lower_index(self):
+        points = [(0.1, 0.1), (0.2, 0.1), (0.7, 0.1), (0.6, -0.1), (0.3, 0.2)]
+        self.assertEqual(list(sample_trajectory(points, [4, 1, 0, 3, 2], self.TRAJECTORY, 2)), [0, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from track_table import TrackTable
+
+
+def track(track_id, valence, energy, artists=('Artist',), success=True):
+    return {
+        'id': track_id,
+        'name': f'Song {track_id}',
+        'artists': [{'id': name.lower(), 'name': name} for name in artists],
+        'duration_ms': 200000,
+        'reccobeats_id': f'rb_{track_id}',
+        'features': {'success': success, 'data': {'valence': valence, 'energy': energy, 'tempo': 120.0}},
+    }
+
+
+class TrackTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = TrackTable([
+            track('a', 0.1, 0.2, ('Alpha', 'Beta')),
+            track('b', 0.8, 0.9, ('Beta',)),
+        ])
+
+    def test_append_returns_row_index(self):
+        self.assertEqual(self.table.append(track('c', 0.5, 0.5)), 2)
+        self.assertEqual(len(self.table), 3)
+        row = self.table[2]
+        self.assertEqual((row.id, row.name, row.valence, row.energy), ('c', 'Song c', 0.5, 0.5))
+        self.assertEqual(self.table[-1].id, 'c')
+        with self.assertRaises(IndexError):
+            self.table[3]
+
+    def test_duplicates_and_tracks_without_features(self):
+        self.assertEqual(self.table.append(track('a', 0.9, 0.9)), 0)
+        self.assertIsNone(self.table.append(track('x', 0.5, 0.5, success=False)))
+        self.assertIsNone(self.table.append({'id': 'y', 'name': 'no features'}))
+        self.assertEqual(self.table.ids, ['a', 'b'])
+        # the first occurrence is kept
+        self.assertEqual(self.table[0].valence, 0.1)
+        self.assertIn('a', self.table)
+        self.assertNotIn('x', self.table)
+        self.assertEqual(self.table.row_of('b'), 1)
+        self.assertIsNone(self.table.row_of('x'))
+
+    def test_shared_artist_vocabulary(self):
+        self.assertEqual(self.table.artist_names, ['Alpha', 'Beta'])
+        self.assertEqual(self.table[0].artists, ['Alpha', 'Beta'])
+        self.assertEqual(self.table[1].artists, ['Beta'])
+        self.assertEqual(list(self.table.artist_indices(1)), [1])
+
+    def test_columns(self):
+        np.testing.assert_allclose(self.table.points, [[0.1, 0.2], [0.8, 0.9]])
+        self.assertEqual(self.table.features.shape[0], 2)
+        self.assertEqual(self.table[1].features['tempo'], 120.0)
+        self.assertEqual(self.table[0].features['danceability'], 0.0)
+        self.assertEqual([row.id for row in self.table.rows([1, 0])], ['b', 'a'])
+
+    def test_to_track_round_trip(self):
+        copy = TrackTable(row.to_track() for row in self.table)
+        self.assertEqual(copy.ids, self.table.ids)
+        np.testing.assert_array_equal(copy.features, self.table.features)
+        self.assertEqual(copy[0].to_dict(), self.table[0].to_dict())
+        self.assertEqual(copy[0].reccobeats_id, 'rb_a')
+        self.assertEqual(self.table[0].to_dict(rank=1)['rank'], 1)
+
+    def test_mood_index_invalidated_by_append(self):
+        index = self.table.mood_index
+        self.assertIs(self.table.mood_index, index)
+        self.assertEqual(list(index.rect((0.7, 1.0), (0.7, 1.0))), [1])
+        # a duplicate or rejected track leaves the index as it is
+        self.table.append(track('b', 0.8, 0.9))
+        self.table.append(track('x', 0.8, 0.9, success=False))
+        self.assertIs(self.table.mood_index, index)
+        self.table.append(track('c', 0.75, 0.75))
+        self.assertIsNot(self.table.mood_index, index)
+        self.assertEqual(list(self.table.mood_index.rect((0.7, 1.0), (0.7, 1.0))), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
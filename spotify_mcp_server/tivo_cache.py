@@ -0,0 +1,97 @@
+"""
+Tivo Cache Class
+Persistent cache of tivo lookups: artist name -> artist id, artist id -> album ids, album id -> tracks
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+import logging
+from util.sqlite_store import SQLiteStore
+from resolution_cache import normalize_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600
+
+# Seconds an entry of each kind is trusted before tivo is asked again
+DEFAULT_TTLS = {
+    'artist_id': 90 * DAY,
+    'artist_not_found': 3 * DAY,
+    'album_ids': 30 * DAY,
+    'album_tracks': 90 * DAY,
+}
+
+
+class TivoCache(SQLiteStore):
+    """
+    Tivo Cache Class
+
+    Entries are (kind, key) -> JSON value with their own expiry. Expired entries are kept: when
+    tivo fails, a stale entry is still better than nothing, so lookups can ask for one explicitly.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tivo_entries (
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (kind, key)
+    );
+    """
+    STATS_TABLE = 'tivo_entries'
+
+    def __init__(self, path: str, ttls: Dict[str, float] = None):
+        """
+        Args:
+            path: SQLite file path
+            ttls: Per-kind TTL overrides in seconds, see DEFAULT_TTLS
+        """
+        super().__init__(path)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale_hits = 0
+
+    @staticmethod
+    def artist_key(artist_name: str) -> str:
+        """Normalised artist name"""
+        return normalize_key(artist_name)
+
+    def get(self, kind: str, key: str, allow_stale: bool = False) -> Tuple[bool, Any]:
+        """
+        Look up one entry
+
+        Args:
+            kind: 'artist_id', 'album_ids' or 'album_tracks'
+            key: Normalised artist name, tivo artist id or tivo album id
+            allow_stale: Also return expired entries (used when tivo itself failed)
+
+        Returns:
+            (found, value): value is None for a cached "artist not found"
+        """
+        rows = self._query('SELECT value, expires_at FROM tivo_entries WHERE kind = ? AND key = ?', [kind, key])
+        if rows and (allow_stale or rows[0][1] > self._now()):
+            if allow_stale:
+                self.stale_hits += 1
+            else:
+                self.record(hits=1)
+            return True, json.loads(rows[0][0])
+        if not allow_stale:
+            self.record(misses=1)
+        return False, None
+
+    def put(self, kind: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Store one entry for ttl seconds (defaults to the kind's TTL)"""
+        ttl = self.ttls[kind] if ttl is None else ttl
+        self._write(
+            'INSERT OR REPLACE INTO tivo_entries (kind, key, value, expires_at) VALUES (?, ?, ?, ?)',
+            [kind, key, json.dumps(value), self._now() + ttl],
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, stale fallbacks and entry counts per kind"""
+        stats = super().stats()
+        stats['stale_hits'] = self.stale_hits
+        stats['entries_by_kind'] = dict(self._query('SELECT kind, COUNT(*) FROM tivo_entries GROUP BY kind'))
+        return stats
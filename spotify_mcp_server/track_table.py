@@ -0,0 +1,202 @@
+"""
+Track Table Class
+Columnar container of recalled candidate tracks: interned ids and names, artists as indices into
+a shared artist vocabulary, and audio features as one float matrix
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from feature_store import FEATURE_NAMES
+from mood_index import MoodIndex
+
+VALENCE = FEATURE_NAMES.index('valence')
+ENERGY = FEATURE_NAMES.index('energy')
+
+
+class TrackRow:
+    """Read-only view of one row of a TrackTable"""
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: 'TrackTable', index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def id(self) -> str:
+        return self.table.ids[self.index]
+
+    @property
+    def name(self) -> str:
+        return self.table.names[self.index]
+
+    @property
+    def uri(self) -> str:
+        return f"spotify:track:{self.id}"
+
+    @property
+    def duration_ms(self) -> int:
+        return self.table.duration_ms[self.index]
+
+    @property
+    def reccobeats_id(self) -> str:
+        return self.table.reccobeats_ids[self.index]
+
+    @property
+    def artists(self) -> List[str]:
+        """Artist names"""
+        return [self.table.artist_names[i] for i in self.table.artist_indices(self.index)]
+
+    @property
+    def valence(self) -> float:
+        return self.table.feature_values[self.index * len(FEATURE_NAMES) + VALENCE]
+
+    @property
+    def energy(self) -> float:
+        return self.table.feature_values[self.index * len(FEATURE_NAMES) + ENERGY]
+
+    @property
+    def features(self) -> Dict[str, float]:
+        """All audio features by name"""
+        start = self.index * len(FEATURE_NAMES)
+        return dict(zip(FEATURE_NAMES, self.table.feature_values[start:start + len(FEATURE_NAMES)]))
+
+    def to_dict(self, **extra) -> Dict[str, Any]:
+        """Candidate summary returned by the recommend tools"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "artists": self.artists,
+            "duration_ms": self.duration_ms,
+            "uri": self.uri,
+            "valence": self.valence,
+            "energy": self.energy,
+            **extra,
+        }
+
+    def to_track(self) -> Dict[str, Any]:
+        """Same shape as the track dicts yielded by the recall streams"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'artists': [
+                {'name': self.table.artist_names[i], 'id': self.table.artist_ids[i]}
+                for i in self.table.artist_indices(self.index)
+            ],
+            'duration_ms': self.duration_ms,
+            'uri': self.uri,
+            'reccobeats_id': self.reccobeats_id,
+            'features': {'success': True, 'data': self.features},
+        }
+
+
+class TrackTable:
+    """
+    Track Table Class
+
+    Rows are appended one track dict at a time (as recall streams them) and de-duplicated by
+    Spotify id. Strings are interned, numbers live in typed arrays, so a row costs about a
+    hundred bytes instead of a nested dict; `points` and `features` return NumPy arrays for
+    ranking, `mood_index` a grid index over the points.
+    """
+
+    __slots__ = (
+        'ids', 'names', 'reccobeats_ids', 'duration_ms', 'feature_values',
+        'artist_offsets', 'artist_index_values', 'artist_names', 'artist_ids', '_row_of', '_artist_of', '_mood_index',
+    )
+
+    def __init__(self, tracks: Iterable[Dict[str, Any]] = ()):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.reccobeats_ids: List[Optional[str]] = []
+        self.duration_ms = array('q')
+        self.feature_values = array('d')
+        self.artist_offsets = array('l', [0])
+        self.artist_index_values = array('l')
+        self.artist_names: List[str] = []
+        self.artist_ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._artist_of: Dict[str, int] = {}
+        self._mood_index: Optional[MoodIndex] = None
+        self.extend(tracks)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> TrackRow:
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return TrackRow(self, index % len(self))
+
+    def __iter__(self):
+        return (TrackRow(self, index) for index in range(len(self)))
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._row_of
+
+    def row_of(self, track_id: str) -> Optional[int]:
+        """Row index of a Spotify track id, None if absent"""
+        return self._row_of.get(track_id)
+
+    def _artist(self, artist: Dict[str, Any]) -> int:
+        key = artist.get('id') or artist['name']
+        index = self._artist_of.get(key)
+        if index is None:
+            index = self._artist_of[key] = len(self.artist_names)
+            self.artist_names.append(sys.intern(artist['name']))
+            self.artist_ids.append(sys.intern(artist.get('id', '')))
+        return index
+
+    def append(self, track: Dict[str, Any]) -> Optional[int]:
+        """
+        Add one recalled track (dict with 'features' envelope)
+
+        Returns:
+            Row index of the track, None if it has no audio features (not added)
+        """
+        index = self._row_of.get(track['id'])
+        if index is not None:
+            return index
+        features = track.get('features', {})
+        if not features.get('success', False):
+            return None
+        index = self._row_of[track['id']] = len(self.ids)
+        self.ids.append(sys.intern(track['id']))
+        self.names.append(sys.intern(track.get('name', '')))
+        self.reccobeats_ids.append(track.get('reccobeats_id'))
+        self.duration_ms.append(int(track.get('duration_ms', 0)))
+        self.feature_values.extend(float(features['data'].get(name, 0)) for name in FEATURE_NAMES)
+        self.artist_index_values.extend(self._artist(artist) for artist in track.get('artists', []))
+        self.artist_offsets.append(len(self.artist_index_values))
+        return index
+
+    def extend(self, tracks: Iterable[Dict[str, Any]]):
+        for track in tracks:
+            self.append(track)
+
+    def artist_indices(self, index: int) -> array:
+        """Indices into artist_names / artist_ids of one row"""
+        return self.artist_index_values[self.artist_offsets[index]:self.artist_offsets[index + 1]]
+
+    @property
+    def features(self) -> np.ndarray:
+        """(n, len(FEATURE_NAMES)) feature matrix (a copy, the table stays appendable)"""
+        return np.frombuffer(self.feature_values, dtype=np.float64).reshape(-1, len(FEATURE_NAMES)).copy()
+
+    @property
+    def points(self) -> np.ndarray:
+        """(n, 2) (valence, energy) of every row"""
+        return self.features[:, [VALENCE, ENERGY]]
+
+    @property
+    def mood_index(self) -> MoodIndex:
+        """MoodIndex over `points`, rebuilt only after rows were appended"""
+        if self._mood_index is None or len(self._mood_index) != len(self):
+            self._mood_index = MoodIndex(self.points)
+        return self._mood_index
+
+    def rows(self, indices: Iterable[int]) -> List[TrackRow]:
+        """Row views for the given indices"""
+        return [TrackRow(self, int(index)) for index in indices]
@@ -0,0 +1,51 @@
+"""
+Shared retry helper for the third-party HTTP APIs (TiVo, Reccobeats, ...)
+"""
+
+import asyncio
+import logging
+import httpx
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 4XX responses that are worth retrying, every 5XX response is retried
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+
+async def get_json_with_retries(client: httpx.AsyncClient, url: str, max_retries: int = 3, retry_delay: float = 1.0, description: str = None, **kwargs):
+    """
+    GET a url on an existing client and decode the JSON body, retrying on timeouts, transport
+    errors, 5XX responses and RETRYABLE_STATUS_CODES.
+
+    Args:
+        client: Shared httpx.AsyncClient
+        url: Request url
+        max_retries: Number of retries after the first attempt
+        retry_delay: Seconds to wait between attempts
+        description: What is being fetched, used in log messages
+        **kwargs: Extra arguments for client.get (params, headers, ...)
+
+    Returns:
+        The decoded JSON body
+
+    Raises:
+        httpx.HTTPError: The last error once all retries are exhausted
+    """
+    description = description or url
+    retries = 0
+    while True:
+        try:
+            response = await client.get(url, **kwargs)
+            response.raise_for_status()  # Raise exception for 4XX/5XX responses
+            return response.json()
+        except (httpx.TimeoutException, httpx.HTTPError) as e:
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code not in RETRYABLE_STATUS_CODES and e.response.status_code < 500:
+                raise  # client errors (bad id, not found, ...) will not succeed on retry
+            retries += 1
+            if retries > max_retries:
+                logger.error(f"Failed to fetch {description} after {max_retries} retries: {e}")
+                raise
+            logger.info(f"Retrying fetch for {description} (attempt {retries}/{max_retries})...")
+            await asyncio.sleep(retry_delay)  # Wait before retrying
@@ -0,0 +1,98 @@
+"""
+Prompt template registry: prompt files parsed once, re-read only when they change on disk
+"""
+
+import os
+import string
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PromptTemplate:
+    """
+    A str.format-style template ({name} placeholders, {{ }} for literal braces), pre-parsed
+    into literal / field pieces so rendering is a single join.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pieces: List[Tuple[str, Optional[str]]] = []
+        for literal, field, format_spec, conversion in string.Formatter().parse(text):
+            if field is not None and (format_spec or conversion or not field.isidentifier()):
+                raise ValueError(f'Unsupported placeholder {{{field}}} in prompt template')
+            self.pieces.append((literal, field))
+        self.fields = {field for _, field in self.pieces if field is not None}
+
+    def render(self, **values) -> str:
+        """Fill in every placeholder; values are converted with str()"""
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f'Missing prompt values: {sorted(missing)}')
+        return ''.join(
+            literal + (str(values[field]) if field is not None else '')
+            for literal, field in self.pieces
+        )
+
+
+class PromptRegistry:
+    """
+    Named prompt templates loaded from files of one directory.
+
+    Every file is read and parsed when the registry is created, so a missing or broken
+    template fails at start-up. Afterwards a file is re-read only when its mtime changed,
+    checked at most every check_interval seconds; a file that fails to load keeps the
+    previous template.
+    """
+
+    def __init__(self, directory: str, files: Dict[str, str], check_interval: float = 1.0):
+        """
+        Args:
+            directory: Directory of the prompt files
+            files: template name -> file name
+            check_interval: Seconds between two mtime checks of a template file
+        """
+        self.directory = directory
+        self.files = files
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        for name in files:
+            self._load(name)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, self.files[name])
+
+    def _load(self, name: str):
+        path = self.path(name)
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, 'r', encoding='utf-8') as f:
+            self._templates[name] = PromptTemplate(f.read())
+        self._mtimes[name] = mtime
+
+    def get(self, name: str) -> PromptTemplate:
+        """Template by name, re-read first if its file changed"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at.get(name, 0.0) >= self.check_interval:
+                self._checked_at[name] = now
+                try:
+                    if os.stat(self.path(name)).st_mtime_ns != self._mtimes[name]:
+                        self._load(name)
+                        self.reloads += 1
+                        logger.info(f'Reloaded prompt template {name} from {self.path(name)}')
+                except (OSError, ValueError) as e:
+                    logger.warning(f'Failed to reload prompt template {name}: {e}, keeping the previous one')
+            return self._templates[name]
+
+    def render(self, name: str, **values) -> str:
+        """Render a template with the given placeholder values"""
+        return self.get(name).render(**values)
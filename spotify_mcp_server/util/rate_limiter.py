@@ -0,0 +1,36 @@
+"""
+Token-bucket rate limiter for async clients of rate-limited APIs (Last.fm, ...)
+"""
+
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Allows `rate` acquisitions per second on average with bursts of up to `burst`.
+
+    A caller reserves its slot before sleeping, so concurrent callers never need a lock and
+    the limiter can be shared across event loops.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Sustained acquisitions per second
+            burst: Acquisitions allowed back to back when the bucket is full
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            # the token is owed, wait until it has been refilled
+            await asyncio.sleep(-self._tokens / self.rate)
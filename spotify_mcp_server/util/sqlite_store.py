@@ -0,0 +1,107 @@
+"""
+Base class for the persistent local stores (feature store, caches, mirrors)
+Each store is one SQLite file under the cache directory
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Override with SPOTIFY_MCP_CACHE_DIR, defaults to spotify_mcp_server/.cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+
+
+def default_cache_path(filename: str) -> str:
+    """Path of a store file inside the cache directory"""
+    return os.path.join(os.getenv('SPOTIFY_MCP_CACHE_DIR', DEFAULT_CACHE_DIR), filename)
+
+
+class SQLiteStore:
+    """
+    One SQLite connection shared by all threads (guarded by a lock), plus hit/miss counters.
+
+    Subclasses set SCHEMA (executed once on open) and STATS_TABLE (counted in stats()).
+    """
+
+    SCHEMA = ""
+    STATS_TABLE = None
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) the store
+
+        Args:
+            path: SQLite file path, ':memory:' for a throwaway store
+        """
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        """Run a read query and return all rows"""
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def _write(self, sql: str, params: Iterable[Any] = ()):
+        """Run one write statement in its own transaction"""
+        with self._lock:
+            self._conn.execute(sql, tuple(params))
+            self._conn.commit()
+
+    def _write_many(self, sql: str, rows: Iterable[Iterable[Any]]):
+        """Run one write statement for many rows in a single transaction"""
+        rows = [tuple(row) for row in rows]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(sql, rows)
+            self._conn.commit()
+
+    @staticmethod
+    def _chunks(values: List[Any], size: int = 500):
+        """Split values to stay below SQLite's bound-parameter limit"""
+        for i in range(0, len(values), size):
+            yield values[i:i + size]
+
+    @staticmethod
+    def _now() -> float:
+        return time.time()
+
+    def record(self, hits: int = 0, misses: int = 0):
+        """Count cache hits / misses for stats()"""
+        self.hits += hits
+        self.misses += misses
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since start and number of stored entries"""
+        lookups = self.hits + self.misses
+        stats = {
+            'path': self.path,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+        }
+        if self.STATS_TABLE:
+            stats['entries'] = self._query(f'SELECT COUNT(*) FROM {self.STATS_TABLE}')[0][0]
+        return stats
+
+    def close(self):
+        """Close the connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,133 @@
+"""
+Warm-up Class
+Optional start-up stage that fills the caches behind the recommend tools while the server is
+already accepting requests
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Warm-up Class
+
+    Runs the cold-start work of a first recommend call in the background, one step after the
+    other: refresh the OAuth token, recall the user's top / recent / library artists, prefetch
+    their Last.fm similar artists, then build the candidate pool, which resolves the tracks
+    and primes the feature store. Everything a step fetches lands in the persistent caches,
+    so even a warm-up cut short by its time budget saves the first call that work.
+    """
+
+    STEPS = ('token', 'artists', 'similar_artists', 'candidate_pool')
+
+    def __init__(self, spotify_client, lastfm_client=None, candidate_pool=None, budget: float = 60):
+        """
+        Args:
+            spotify_client: SpotifySuperClient
+            lastfm_client: Last.fm client, None to skip the similar-artist prefetch
+            candidate_pool: CandidatePool to build (and start) at the end, None to skip it
+            budget: Seconds the whole warm-up may take before it is cancelled
+        """
+        self.spotify_client = spotify_client
+        self.lastfm_client = lastfm_client
+        self.candidate_pool = candidate_pool
+        self.budget = budget
+        self.state = 'idle'
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {name: {'state': 'pending'} for name in self.STEPS}
+        self._artist_names: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _token(self):
+        result = await asyncio.to_thread(self.spotify_client.refresh_access_token)
+        if not result['success']:
+            raise RuntimeError(result['message'])
+        return result['message']
+
+    async def _artists(self):
+        _, self._artist_names = await asyncio.to_thread(self.spotify_client.recall_artists, concurrent=True)
+        return f'{len(self._artist_names)} artists'
+
+    async def _similar_artists(self):
+        if self.lastfm_client is None:
+            return 'skipped, no Last.fm client'
+        # same expansion as stream_all_tracks, so the pool build below hits the cache
+        artist_names = await self.lastfm_client.expand_artists(self._artist_names, hops=1, fan_out=10, min_weight=0.0)
+        return f'{len(artist_names)} artists after expansion'
+
+    async def _candidate_pool(self):
+        if self.candidate_pool is None:
+            return 'skipped, no candidate pool'
+        stats = await self.candidate_pool.refresh()
+        return f"{stats['tracks']} tracks"
+
+    async def run(self):
+        """Run all steps within the budget, then start the candidate pool's background loop"""
+        self.state, self.started_at = 'running', time.time()
+        current = None
+        try:
+            async with asyncio.timeout(self.budget):
+                for current in self.STEPS:
+                    step = self.steps[current]
+                    step['state'] = 'running'
+                    start = time.perf_counter()
+                    try:
+                        step['detail'] = await getattr(self, f'_{current}')()
+                        step['state'] = 'done'
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        # later steps still warm what they can
+                        logger.error(f'Warm-up step {current} failed: {e}')
+                        step['state'], step['detail'] = 'failed', str(e)
+                    finally:
+                        step['seconds'] = round(time.perf_counter() - start, 3)
+            self.state = 'done'
+        except TimeoutError:
+            self.state = 'timeout'
+            self.steps[current]['state'] = 'timeout'
+        finally:
+            if self.state == 'running':
+                self.state = 'cancelled'
+            for step in self.steps.values():
+                if step['state'] in ('pending', 'running'):
+                    step['state'] = 'skipped' if step['state'] == 'pending' else 'cancelled'
+            self.finished_at = time.time()
+            logger.info(f'Warm-up {self.state} after {self.finished_at - self.started_at:.1f}s: {self.steps}')
+        if self.candidate_pool is not None:
+            self.candidate_pool.start()
+
+    def start(self) -> asyncio.Task:
+        """Start the warm-up on the running event loop (once)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel a warm-up that is still running"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        """Overall state, per-step state / detail / seconds, elapsed time and budget"""
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {
+            'state': self.state,
+            'steps': self.steps,
+            'elapsed': elapsed,
+            'budget': self.budget,
+        }
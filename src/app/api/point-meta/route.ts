@@ -4,6 +4,22 @@ import path from 'path';
 
 const POINT_META_FILE = path.join(process.cwd(), 'point_meta.json');
 
+// Write to a temp file in the same directory and rename it over the target, so the MCP server
+// never reads a half-written file
+function writePointMetaAtomically(pointMeta: Record<string, any>) {
+  const tmpFile = path.join(
+    path.dirname(POINT_META_FILE),
+    `.point_meta.${process.pid}.${Date.now()}.tmp`
+  );
+  try {
+    fs.writeFileSync(tmpFile, JSON.stringify(pointMeta, null, 2));
+    fs.renameSync(tmpFile, POINT_META_FILE);
+  } catch (error) {
+    fs.rmSync(tmpFile, { force: true });
+    throw error;
+  }
+}
+
 export async function GET() {
   try {
     if (fs.existsSync(POINT_META_FILE)) {
@@ -40,7 +56,7 @@ export async function POST(req: NextRequest) {
       pointMeta = { start: null, end: null };
     }
     
-    fs.writeFileSync(POINT_META_FILE, JSON.stringify(pointMeta, null, 2));
+    writePointMetaAtomically(pointMeta);
     
     return NextResponse.json({ success: true, data: pointMeta });
   } catch (error) {